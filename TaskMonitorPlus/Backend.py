@@ -0,0 +1,636 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+The window-system backend that the rest of the plugin talks to.
+
+Every Win32 call made by TaskMonitorPlus, WindowInfo and ProcessInfo goes
+through the object returned by GetBackend(). On a real desktop that is a
+Win32Backend; benchmarks and load tests install a SimulatedDesktop with
+SetBackend() instead.
+"""
+
+import ctypes
+import os
+import threading
+from timeit import default_timer
+
+from .Constants import (
+    SMTO_ABORTIFHUNG, SMTO_BLOCK, SMTO_ERRORONEXIT, WAIT_TIMEOUT,
+    WINEVENT_OUTOFCONTEXT, WM_GETTEXT, WM_GETTEXTLENGTH, WM_QUIT,
+)
+
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+SYNCHRONIZE = 0x00100000
+SYSTEM_PROCESS_INFORMATION_CLASS = 5
+STATUS_INFO_LENGTH_MISMATCH = 0xC0000004
+
+
+class _UnicodeString(ctypes.Structure):
+    _fields_ = [
+        ("Length", ctypes.c_ushort),
+        ("MaximumLength", ctypes.c_ushort),
+        ("Buffer", ctypes.c_void_p),
+    ]
+
+
+class _SystemProcessInformation(ctypes.Structure):
+    """
+    SYSTEM_PROCESS_INFORMATION, as returned by NtQuerySystemInformation():
+    one per process, each followed by its threads, NextEntryOffset bytes
+    apart.
+    """
+    _fields_ = [
+        ("NextEntryOffset", ctypes.c_uint32),
+        ("NumberOfThreads", ctypes.c_uint32),
+        ("WorkingSetPrivateSize", ctypes.c_int64),
+        ("HardFaultCount", ctypes.c_uint32),
+        ("NumberOfThreadsHighWatermark", ctypes.c_uint32),
+        ("CycleTime", ctypes.c_uint64),
+        ("CreateTime", ctypes.c_int64),
+        ("UserTime", ctypes.c_int64),
+        ("KernelTime", ctypes.c_int64),
+        ("ImageName", _UnicodeString),
+        ("BasePriority", ctypes.c_int32),
+        ("UniqueProcessId", ctypes.c_void_p),
+        ("InheritedFromUniqueProcessId", ctypes.c_void_p),
+        ("HandleCount", ctypes.c_uint32),
+        ("SessionId", ctypes.c_uint32),
+        ("UniqueProcessKey", ctypes.c_size_t),
+        ("PeakVirtualSize", ctypes.c_size_t),
+        ("VirtualSize", ctypes.c_size_t),
+        ("PageFaultCount", ctypes.c_uint32),
+        ("PeakWorkingSetSize", ctypes.c_size_t),
+        ("WorkingSetSize", ctypes.c_size_t),
+        ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+        ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+        ("PagefileUsage", ctypes.c_size_t),
+        ("PeakPagefileUsage", ctypes.c_size_t),
+        ("PrivatePageCount", ctypes.c_size_t),
+    ]
+
+
+class Backend(object):
+    """
+    Interface implemented by every window-system backend. Method names and
+    arguments follow the Win32 functions they stand in for.
+    """
+
+    def Now(self):
+        """
+        Returns the current time in seconds. Timestamps and timeouts all use
+        this clock, so that simulated desktops can control time.
+        """
+        raise NotImplementedError
+
+    # Window enumeration and identity
+
+    def GetTopLevelWindowList(self, includeInvisible):
+        """Returns a list of all top-level window handles."""
+        raise NotImplementedError
+
+    def GetShellWindow(self):
+        """Returns the handle of the desktop (shell) window."""
+        raise NotImplementedError
+
+    def FindWindow(self, className, windowName=None):
+        """Returns the first top-level window matching, or 0."""
+        raise NotImplementedError
+
+    def IsWindow(self, hwnd):
+        raise NotImplementedError
+
+    def IsWindowVisible(self, hwnd):
+        raise NotImplementedError
+
+    def IsWindowEnabled(self, hwnd):
+        raise NotImplementedError
+
+    def GetAncestor(self, hwnd, flags):
+        raise NotImplementedError
+
+    def GetParent(self, hwnd):
+        raise NotImplementedError
+
+    def GetWindow(self, hwnd, cmd):
+        raise NotImplementedError
+
+    def GetWindowLong(self, hwnd, index):
+        raise NotImplementedError
+
+    def GetWindowPid(self, hwnd):
+        """Returns the id of the process owning hwnd."""
+        raise NotImplementedError
+
+    def GetWindowText(self, hwnd):
+        raise NotImplementedError
+
+    def GetWindowTextTimeout(self, hwnd, timeout):
+        """
+        Like GetWindowText(), but gives up after `timeout` seconds, or
+        right away if the window is hung. Returns None when it gave up.
+        Safe to call from any thread.
+        """
+        raise NotImplementedError
+
+    def IsHungAppWindow(self, hwnd):
+        raise NotImplementedError
+
+    def GetClassName(self, hwnd):
+        raise NotImplementedError
+
+    def GetActiveWindow(self):
+        raise NotImplementedError
+
+    def GetFocus(self):
+        raise NotImplementedError
+
+    def GetWindowRect(self, hwnd):
+        """Returns (left, top, right, bottom) in screen coordinates."""
+        raise NotImplementedError
+
+    def GetClientRect(self, hwnd):
+        """Returns (0, 0, width, height) of the window's client area."""
+        raise NotImplementedError
+
+    def GetWindowPlacement(self, hwnd):
+        """
+        Returns (flags, showCmd, minPosition, maxPosition, normalRect), as
+        win32gui does.
+        """
+        raise NotImplementedError
+
+    # Processes
+
+    def GetProcessName(self, pid):
+        """Returns the executable name (with extension) of a process."""
+        raise NotImplementedError
+
+    def GetProcessCreationTime(self, pid):
+        """
+        Returns the creation time of a process as an integer (a FILETIME on
+        Windows), or 0 if it can't be queried. Together with the pid, this
+        identifies a process even when its pid is reused.
+        """
+        raise NotImplementedError
+
+    def GetCurrentProcessId(self):
+        raise NotImplementedError
+
+    def GetProcessTable(self):
+        """
+        Returns every running process, in one call, as a dict:
+        key=(pid, creation time as by GetProcessCreationTime()),
+        val=executable name (with extension).
+        """
+        raise NotImplementedError
+
+    def GetProcessResources(self):
+        """
+        Returns what every running process uses, in one call, as a dict:
+        key=pid, val=(creation time, CPU time in 100 ns units (user and
+        kernel), working set in bytes, handle count).
+        """
+        raise NotImplementedError
+
+    def WaitForInputIdle(self, pid, timeout):
+        """
+        Waits up to `timeout` seconds for a process to be waiting for user
+        input. Returns False if it timed out, True otherwise (including
+        when the process can't be waited for).
+        """
+        raise NotImplementedError
+
+    # Window manipulation
+
+    def AnimateWindow(self, hwnd, duration, flags):
+        raise NotImplementedError
+
+    def FlashWindowEx(self, hwnd, flags, count, timeout):
+        raise NotImplementedError
+
+    def BringWindowToTop(self, hwnd):
+        raise NotImplementedError
+
+    def EnableWindow(self, hwnd, enable):
+        raise NotImplementedError
+
+    def ShowWindow(self, hwnd, cmdShow):
+        raise NotImplementedError
+
+    def SetWindowPos(self, hwnd, hwndInsertAfter, x, y, cx, cy, flags):
+        """Returns whether the window could be moved."""
+        raise NotImplementedError
+
+    def BeginDeferWindowPos(self, numWindows):
+        """
+        Starts a batch of window moves that EndDeferWindowPos() applies
+        in one go. Returns a handle for the batch, or 0 on failure.
+        """
+        raise NotImplementedError
+
+    def DeferWindowPos(self, hdwp, hwnd, hwndInsertAfter, x, y, cx, cy, flags):
+        """
+        Adds a move to a batch. Returns the handle to use from then on, or
+        0 if it failed, in which case the batch is abandoned.
+        """
+        raise NotImplementedError
+
+    def EndDeferWindowPos(self, hdwp):
+        raise NotImplementedError
+
+    def SetFocus(self, hwnd):
+        raise NotImplementedError
+
+    def SendMessage(self, hwnd, message, wparam, lparam):
+        raise NotImplementedError
+
+    def PostMessage(self, hwnd, message, wparam, lparam):
+        raise NotImplementedError
+
+    # Shell hook
+
+    def RegisterWindowMessage(self, name):
+        raise NotImplementedError
+
+    def RegisterShellHookWindow(self, hwnd):
+        raise NotImplementedError
+
+    def DeregisterShellHookWindow(self, hwnd):
+        raise NotImplementedError
+
+    # WinEvent hooks
+
+    def StartWinEventHooks(self, ranges, callback):
+        """
+        Hooks the WinEvents in the (eventMin, eventMax) ranges given, out
+        of context. callback(event, hwnd, idObject, idChild) is called for
+        each, on a thread of the backend's choosing. Returns a handle for
+        StopWinEventHooks().
+        """
+        raise NotImplementedError
+
+    def StopWinEventHooks(self, hooks):
+        raise NotImplementedError
+
+
+class Win32Backend(Backend):
+    """
+    Backend for a live Windows desktop. The underlying functions are bound
+    directly onto the instance so that a call through the backend costs no
+    more than calling the Win32 wrapper itself.
+    """
+
+    WIN32GUI_FUNCTIONS = (
+        "AnimateWindow", "BringWindowToTop", "EnableWindow", "FlashWindowEx", "GetActiveWindow", "GetClientRect", "GetFocus",
+        "GetParent", "GetWindow", "GetWindowPlacement", "GetWindowRect",
+        "IsWindow", "IsWindowEnabled",
+        "PostMessage", "SendMessage", "SetFocus", "SetWindowPos",
+        "ShowWindow",
+    )
+
+    def __init__(self):
+        from ctypes import wintypes
+        import win32gui
+        from eg.WinApi import GetClassName, GetTopLevelWindowList, GetWindowText
+        from eg.WinApi.Dynamic import (
+            byref, DeregisterShellHookWindow, DWORD, GetAncestor,
+            GetShellWindow, GetWindowLong, GetWindowThreadProcessId,
+            IsWindowVisible, RegisterShellHookWindow, RegisterWindowMessage,
+        )
+        from eg.WinApi.Utils import GetProcessName
+
+        for name in self.WIN32GUI_FUNCTIONS:
+            setattr(self, name, getattr(win32gui, name))
+
+        self.GetTopLevelWindowList = GetTopLevelWindowList
+        self.GetShellWindow = GetShellWindow
+        self.IsWindowVisible = IsWindowVisible
+        self.GetAncestor = GetAncestor
+        self.GetWindowLong = GetWindowLong
+        self.GetWindowText = GetWindowText
+        self.GetClassName = GetClassName
+        self.GetProcessName = GetProcessName
+        self.RegisterWindowMessage = RegisterWindowMessage
+        self.RegisterShellHookWindow = RegisterShellHookWindow
+        self.DeregisterShellHookWindow = DeregisterShellHookWindow
+
+        def GetWindowPid(hwnd):
+            dwProcessId = DWORD()
+            GetWindowThreadProcessId(hwnd, byref(dwProcessId))
+            return dwProcessId.value
+        self.GetWindowPid = GetWindowPid
+
+        from pywintypes import error
+        def FindWindow(className, windowName=None):
+            # win32gui's raises when nothing matches
+            try:
+                return win32gui.FindWindow(className, windowName)
+            except error:
+                return 0
+        self.FindWindow = FindWindow
+
+        self.user32 = ctypes.WinDLL("user32")
+        self.user32.IsHungAppWindow.argtypes = [wintypes.HWND]
+        self.user32.SendMessageTimeoutW.argtypes = [
+            wintypes.HWND, wintypes.UINT, wintypes.WPARAM, wintypes.LPARAM,
+            wintypes.UINT, wintypes.UINT, ctypes.POINTER(ctypes.c_size_t),
+        ]
+        self.user32.SendMessageTimeoutW.restype = ctypes.c_size_t
+        self.user32.WaitForInputIdle.argtypes = [
+            wintypes.HANDLE, wintypes.DWORD
+        ]
+        self.user32.WaitForInputIdle.restype = wintypes.DWORD
+        self.user32.BeginDeferWindowPos.argtypes = [ctypes.c_int]
+        self.user32.BeginDeferWindowPos.restype = wintypes.HANDLE
+        self.user32.DeferWindowPos.argtypes = [
+            wintypes.HANDLE, wintypes.HWND, wintypes.HWND, ctypes.c_int,
+            ctypes.c_int, ctypes.c_int, ctypes.c_int, wintypes.UINT,
+        ]
+        self.user32.DeferWindowPos.restype = wintypes.HANDLE
+        self.user32.EndDeferWindowPos.argtypes = [wintypes.HANDLE]
+        self.BeginDeferWindowPos = self.user32.BeginDeferWindowPos
+        self.DeferWindowPos = self.user32.DeferWindowPos
+        self.EndDeferWindowPos = self.user32.EndDeferWindowPos
+        self.kernel32 = ctypes.WinDLL("kernel32")
+        self.kernel32.OpenProcess.restype = wintypes.HANDLE
+        self.kernel32.OpenProcess.argtypes = [
+            wintypes.DWORD, wintypes.BOOL, wintypes.DWORD
+        ]
+        self.kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        self.kernel32.GetProcessTimes.argtypes = [wintypes.HANDLE] + [
+            ctypes.POINTER(ctypes.c_ulonglong)
+        ] * 4
+        self.ntdll = ctypes.WinDLL("ntdll")
+        self.ntdll.NtQuerySystemInformation.argtypes = [
+            wintypes.ULONG, ctypes.c_void_p, wintypes.ULONG,
+            ctypes.POINTER(wintypes.ULONG),
+        ]
+        self.ntdll.NtQuerySystemInformation.restype = ctypes.c_long
+        # Grown to fit the process table, and kept for the next query
+        self.processTableSize = 0x40000
+
+    def GetProcessCreationTime(self, pid):
+        kernel32 = self.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return 0
+        try:
+            creation = ctypes.c_ulonglong()
+            unused = ctypes.c_ulonglong()
+            if not kernel32.GetProcessTimes(
+                handle, ctypes.byref(creation), ctypes.byref(unused),
+                ctypes.byref(unused), ctypes.byref(unused)
+            ):
+                return 0
+            return creation.value
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def SystemProcesses(self):
+        """
+        Yields a _SystemProcessInformation for every process; each is only
+        valid until the next one is yielded.
+        """
+        query = self.ntdll.NtQuerySystemInformation
+        needed = ctypes.c_ulong()
+        while True:
+            size = self.processTableSize
+            buffer = ctypes.create_string_buffer(size)
+            status = query(
+                SYSTEM_PROCESS_INFORMATION_CLASS, buffer, size,
+                ctypes.byref(needed)
+            ) & 0xFFFFFFFF
+            if status != STATUS_INFO_LENGTH_MISMATCH:
+                break
+            # Processes may start before the next try
+            self.processTableSize = max(needed.value + 0x10000, 2 * size)
+        if status:
+            raise OSError("NtQuerySystemInformation failed: 0x%08X" % status)
+        offset = 0
+        while True:
+            entry = _SystemProcessInformation.from_buffer(buffer, offset)
+            yield entry
+            if not entry.NextEntryOffset:
+                break
+            offset += entry.NextEntryOffset
+
+    def GetProcessTable(self):
+        table = {}
+        for entry in self.SystemProcesses():
+            pid = entry.UniqueProcessId
+            if not pid:
+                # The idle process
+                continue
+            name = entry.ImageName
+            table[(pid, entry.CreateTime)] = (
+                ctypes.wstring_at(name.Buffer, name.Length // 2)
+                if name.Buffer else u""
+            )
+        return table
+
+    def GetProcessResources(self):
+        resources = {}
+        for entry in self.SystemProcesses():
+            pid = entry.UniqueProcessId
+            if pid:
+                resources[pid] = (
+                    entry.CreateTime, entry.UserTime + entry.KernelTime,
+                    entry.WorkingSetSize, entry.HandleCount,
+                )
+        return resources
+
+    def WaitForInputIdle(self, pid, timeout):
+        kernel32 = self.kernel32
+        handle = kernel32.OpenProcess(
+            SYNCHRONIZE | PROCESS_QUERY_LIMITED_INFORMATION, False, pid
+        )
+        if not handle:
+            return True
+        try:
+            milliseconds = max(0, int(timeout * 1000))
+            return self.user32.WaitForInputIdle(handle, milliseconds) != WAIT_TIMEOUT
+        finally:
+            kernel32.CloseHandle(handle)
+
+    def IsHungAppWindow(self, hwnd):
+        return bool(self.user32.IsHungAppWindow(hwnd))
+
+    def GetWindowTextTimeout(self, hwnd, timeout):
+        user32 = self.user32
+        if user32.IsHungAppWindow(hwnd):
+            return None
+        flags = SMTO_ABORTIFHUNG | SMTO_BLOCK | SMTO_ERRORONEXIT
+        milliseconds = max(1, int(timeout * 1000))
+        length = ctypes.c_size_t()
+        if not user32.SendMessageTimeoutW(
+            hwnd, WM_GETTEXTLENGTH, 0, 0, flags, milliseconds,
+            ctypes.byref(length)
+        ):
+            return None if self.IsWindow(hwnd) else ""
+        buf = ctypes.create_unicode_buffer(length.value + 1)
+        copied = ctypes.c_size_t()
+        if not user32.SendMessageTimeoutW(
+            hwnd, WM_GETTEXT, len(buf), ctypes.addressof(buf), flags,
+            milliseconds, ctypes.byref(copied)
+        ):
+            return None if self.IsWindow(hwnd) else ""
+        return buf.value
+
+    def GetCurrentProcessId(self):
+        return os.getpid()
+
+    def StartWinEventHooks(self, ranges, callback):
+        return WinEventThread(ranges, callback)
+
+    def StopWinEventHooks(self, hooks):
+        hooks.Stop()
+
+    # Not time.time(): the timeouts and ages measured with it mustn't jump
+    # when the system clock is changed
+    Now = staticmethod(default_timer)
+
+
+class WinEventThread(threading.Thread):
+    """
+    Out-of-context WinEvent callbacks are made on the thread that set the
+    hook, from its message loop, so the hooks get a thread of their own.
+    """
+
+    def __init__(self, ranges, callback):
+        threading.Thread.__init__(self, name="TaskMonitorPlus.WinEvents")
+        self.daemon = True
+        self.ranges = ranges
+        self.callback = callback
+        self.threadId = None
+        self.ready = threading.Event()
+        self.start()
+        self.ready.wait()
+
+    def run(self):
+        from ctypes import wintypes
+        user32 = ctypes.WinDLL("user32")
+        kernel32 = ctypes.WinDLL("kernel32")
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None, wintypes.HANDLE, wintypes.DWORD, wintypes.HWND,
+            wintypes.LONG, wintypes.LONG, wintypes.DWORD, wintypes.DWORD,
+        )
+        user32.SetWinEventHook.argtypes = [
+            wintypes.DWORD, wintypes.DWORD, wintypes.HMODULE, WinEventProc,
+            wintypes.DWORD, wintypes.DWORD, wintypes.DWORD,
+        ]
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        user32.UnhookWinEvent.argtypes = [wintypes.HANDLE]
+        callback = self.callback
+        def Proc(
+            dummyHook, event, hwnd, idObject, idChild, dummyThread, dummyTime
+        ):
+            callback(event, hwnd or 0, idObject, idChild)
+        # Must stay referenced for as long as the hooks are set
+        proc = WinEventProc(Proc)
+        hooks = [
+            user32.SetWinEventHook(
+                eventMin, eventMax, None, proc, 0, 0, WINEVENT_OUTOFCONTEXT
+            )
+            for eventMin, eventMax in self.ranges
+        ]
+        self.threadId = kernel32.GetCurrentThreadId()
+        self.ready.set()
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), None, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        for hook in hooks:
+            if hook:
+                user32.UnhookWinEvent(hook)
+
+    def Stop(self):
+        ctypes.WinDLL("user32").PostThreadMessageW(self.threadId, WM_QUIT, 0, 0)
+        self.join(1.0)
+
+
+class CountingBackend(object):
+    """
+    Wraps another backend and counts the calls made through it, by function
+    name. Used to measure how many Win32 round-trips a code path costs.
+    """
+    NOT_COUNTED = frozenset(["Now"])
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.calls = {}
+
+    def __getattr__(self, name):
+        func = getattr(self.backend, name)
+        if not callable(func) or name.startswith("_") or name in self.NOT_COUNTED:
+            return func
+        calls = self.calls
+        def CountedCall(*args):
+            calls[name] = calls.get(name, 0) + 1
+            return func(*args)
+        # Cache the wrapper so the next lookup skips __getattr__
+        setattr(self, name, CountedCall)
+        return CountedCall
+
+    def Total(self):
+        return sum(self.calls.values())
+
+    def Reset(self):
+        self.calls.clear()
+
+
+def Unwrap(backend):
+    """Returns the backend under any CountingBackend wrapping it."""
+    while isinstance(backend, CountingBackend):
+        backend = backend.backend
+    return backend
+
+
+_backend = None
+
+def GetBackend():
+    """
+    Returns the backend in use, creating a Win32Backend on first use.
+    """
+    global _backend
+    if _backend is None:
+        _backend = Win32Backend()
+    return _backend
+
+def SetBackend(backend):
+    """
+    Replaces the backend used by the plugin. Pass None to go back to the
+    default Win32Backend.
+    """
+    global _backend
+    _backend = backend
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Captures of the messages reaching the plugin, for replaying them later
+against a SimulatedDesktop (see benchmarks/replay.py).
+
+A capture is a text file with one JSON value per line:
+- the header: {"version", "settings", "now", "ourPid", "shellWindow",
+  "windows"}, where settings are the plugin's __start__ arguments and
+  windows lists the state (see ObserveWindow()) of every top-level window
+  when the plugin started, as [hwnd, state]
+- ["M", time, mesg, wParam, lParam, state] for each message handled: mesg is
+  0 for the shell hook, -1 for a WinEvent (see EventSource) or n for
+  WM_APP + n, and state is the window the message is about as it was when
+  the message arrived
+- ["C", time] each time the plugin ran the calls it had queued for
+  itself (scheduled ones, such as coalesced title checks, and the results
+  of worker thread lookups)
+- ["E", time, kind, exe, hwnd] for each event triggered (hwnd is null for
+  process events)
+Times are from the backend's clock.
+"""
+
+import json
+
+from .Backend import GetBackend
+from .Constants import GA_ROOT, GWL_HWNDPARENT
+
+VERSION = 1
+SHELLHOOK = 0
+WINEVENT = -1
+
+
+class CaptureError(ValueError): pass
+
+
+def ObserveWindow(backend, hwnd, timeout=0.5):
+    """
+    Returns what the plugin could find out about a window, as a list
+    [pid, exe, class, title, visible, owner, root], or None if there's no
+    such window. root is the top-level window hwnd belongs to, or 0 if
+    that's hwnd itself. The title is None if the window didn't answer
+    within `timeout` seconds.
+    """
+    if not hwnd or not backend.IsWindow(hwnd):
+        return None
+    pid = backend.GetWindowPid(hwnd)
+    root = backend.GetAncestor(hwnd, GA_ROOT)
+    return [
+        pid,
+        backend.GetProcessName(pid),
+        backend.GetClassName(hwnd),
+        backend.GetWindowTextTimeout(hwnd, timeout),
+        bool(backend.IsWindowVisible(hwnd)),
+        backend.GetWindowLong(hwnd, GWL_HWNDPARENT),
+        root if root != hwnd else 0,
+    ]
+
+
+class Recorder(object):
+    """
+    Writes a capture. Create it before the plugin builds its registries,
+    so that the desktop in the header is the one they were built from.
+    """
+
+    def __init__(self, path, settings):
+        backend = GetBackend()
+        self.file = open(path, "w")
+        self.messages = 0
+        self.events = 0
+        self.Write({
+            "version": VERSION,
+            "settings": settings,
+            "now": backend.Now(),
+            "ourPid": backend.GetCurrentProcessId(),
+            "shellWindow": backend.GetShellWindow(),
+            "windows": [
+                [hwnd, ObserveWindow(backend, hwnd)]
+                for hwnd in backend.GetTopLevelWindowList(True)
+            ],
+        })
+
+    def Write(self, value):
+        self.file.write(json.dumps(value, separators=(",", ":")))
+        self.file.write("\n")
+
+    def Recorded(self, mesg, handler):
+        """
+        Returns handler (a message handler) wrapped so that the messages
+        reaching it are captured first. mesg is SHELLHOOK, WINEVENT or n
+        for WM_APP + n.
+        """
+        write = self.Write
+        def RecordedHandler(hwnd, message, wParam, lParam):
+            backend = GetBackend()
+            target = lParam if mesg in (SHELLHOOK, WINEVENT) else wParam
+            write([
+                "M", backend.Now(), mesg, wParam, lParam,
+                ObserveWindow(backend, target),
+            ])
+            self.messages += 1
+            return handler(hwnd, message, wParam, lParam)
+        RecordedHandler.__name__ = handler.__name__
+        return RecordedHandler
+
+    def RecordedCalls(self, handler):
+        """Like Recorded(), for the handler of the plugin's own calls."""
+        write = self.Write
+        def RecordedHandler(hwnd, message, wParam, lParam):
+            write(["C", GetBackend().Now()])
+            return handler(hwnd, message, wParam, lParam)
+        RecordedHandler.__name__ = handler.__name__
+        return RecordedHandler
+
+    def Event(self, kind, exe, hwnd):
+        self.Write(["E", GetBackend().Now(), kind, exe, hwnd])
+        self.events += 1
+
+    def Close(self):
+        self.file.close()
+
+    def Stats(self):
+        return {"messages": self.messages, "events": self.events}
+
+
+def ReadCapture(path):
+    """
+    Reads a capture. Returns (header, records), records being a list of
+    the "M", "C" and "E" lists.
+    """
+    with open(path) as f:
+        try:
+            header = json.loads(f.readline())
+            records = [json.loads(line) for line in f if line.strip()]
+        except ValueError as exc:
+            raise CaptureError("%s: not a capture (%s)" % (path, exc))
+    if not isinstance(header, dict) or header.get("version") != VERSION:
+        raise CaptureError("%s: not a capture, or an unsupported version" % path)
+    return header, records
+
+
+def ApplyWindow(desktop, hwnd, state):
+    """
+    Makes a window on a SimulatedDesktop look the way ObserveWindow()
+    saw it.
+    """
+    if state is None:
+        desktop.RemoveWindow(hwnd)
+        return
+    pid, exe, windowClass, title, visible, owner, root = state
+    desktop.PutWindow(
+        hwnd, pid, exe, title or "", windowClass, visible, owner, root
+    )
+    desktop.SetWindowHung(hwnd, title is None)
+
+
+def BuildDesktop(header):
+    """Returns a SimulatedDesktop set up like the one a capture started on."""
+    from .SimulatedDesktop import SimulatedDesktop
+    desktop = SimulatedDesktop(withShell=False)
+    desktop.processes.pop(desktop.ourPid, None)
+    desktop.ourPid = header["ourPid"]
+    desktop.shellWindow = header["shellWindow"]
+    desktop.clock = header["now"]
+    for hwnd, state in header["windows"]:
+        ApplyWindow(desktop, hwnd, state)
+    return desktop
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from .Backend import GetBackend
+
+# Coalescing modes:
+# - off: every redraw is checked (and may trigger an event) right away,
+#   as far as the max-rate cap allows
+# - leading: the first redraw is checked right away; redraws during the
+#   following interval are collapsed into one check at its end
+# - trailing: redraws are only checked once none has arrived for interval
+# - both: leading and trailing combined
+MODES = ("off", "leading", "trailing", "both")
+
+class CoalescePolicy(object):
+    __slots__ = ("mode", "interval", "spacing")
+
+    def __init__(self, mode="off", interval=0.0, maxRate=0.0):
+        if mode not in MODES:
+            raise ValueError("unknown coalescing mode: %r" % (mode,))
+        self.mode = mode
+        self.interval = interval
+        # Minimum time between two checks, from the max-rate cap
+        self.spacing = 1.0 / maxRate if maxRate else 0.0
+
+    @property
+    def active(self):
+        """Whether any redraw may be put off."""
+        return self.mode != "off" or self.spacing > 0
+
+    @property
+    def leading(self):
+        # With the mode off, only the max-rate cap puts checks off
+        return self.mode != "trailing"
+
+    @property
+    def trailing(self):
+        return self.mode in ("trailing", "both")
+
+
+def ParseOverrides(text):
+    """
+    Parses per-executable overrides, one per line, in the form
+    `exe=mode[,interval ms[,max per second]]`, e.g.:
+        qbittorrent=trailing,2000,0.5
+        putty=off
+    Returns a dict of executable name (lowercase) to CoalescePolicy.
+    """
+    overrides = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        exe, sep, spec = line.partition("=")
+        if not sep:
+            raise ValueError("expected exe=mode,...: %r" % line)
+        fields = [x.strip() for x in spec.split(",")]
+        mode = fields[0].lower()
+        interval = float(fields[1]) / 1000.0 if len(fields) > 1 else 0.0
+        maxRate = float(fields[2]) if len(fields) > 2 else 0.0
+        overrides[exe.strip().lower()] = CoalescePolicy(mode, interval, maxRate)
+    return overrides
+
+
+class _WindowState(object):
+    __slots__ = ("policy", "lastCheck", "lastRedraw", "task")
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.lastCheck = None
+        self.lastRedraw = None
+        self.task = None
+
+
+class TitleCoalescer(object):
+    """
+    Collapses floods of HSHELL_REDRAW notifications for a window into
+    fewer title checks (and so fewer TitleChanged events).
+
+    Defer() is called for every redraw. It returns False when the caller
+    should check the title now, or True when the check has been put off;
+    `check(hwnd)` is then called (through `callLater`) once the flood for
+    that window settles. A put-off check is never dropped, so the final
+    title is always delivered.
+    """
+
+    def __init__(self, check, callLater, cancelCall, policy, overrides=None):
+        self.check = check
+        self.callLater = callLater
+        self.cancelCall = cancelCall
+        self.policy = policy
+        self.overrides = overrides or {}
+        self.windows = {}       # key=hwnd, val=_WindowState
+        self.deferred = 0
+        self.flushed = 0
+
+    def PolicyFor(self, name):
+        if self.overrides:
+            return self.overrides.get(name.lower(), self.policy)
+        return self.policy
+
+    def Defer(self, hwnd, name):
+        policy = self.PolicyFor(name)
+        if not policy.active:
+            return False
+        now = GetBackend().Now()
+        state = self.windows.get(hwnd, None)
+        if state is None:
+            state = self.windows[hwnd] = _WindowState(policy)
+        state.lastRedraw = now
+        if state.task is None and policy.leading and (
+            state.lastCheck is None or
+            now - state.lastCheck >= max(policy.interval, policy.spacing)
+        ):
+            state.lastCheck = now
+            return False
+        self.deferred += 1
+        if state.task is None:
+            self.Schedule(hwnd, state, now)
+        return True
+
+    def Due(self, state):
+        policy = state.policy
+        if policy.trailing:
+            due = state.lastRedraw + policy.interval
+        else:
+            due = state.lastCheck + policy.interval
+        if state.lastCheck is not None:
+            due = max(due, state.lastCheck + policy.spacing)
+        return due
+
+    def Schedule(self, hwnd, state, now):
+        delay = max(0.0, self.Due(state) - now)
+        state.task = self.callLater(delay, self.Flush, hwnd)
+
+    def Flush(self, hwnd):
+        state = self.windows.get(hwnd, None)
+        if state is None or state.task is None:
+            return
+        state.task = None
+        now = GetBackend().Now()
+        if self.Due(state) > now:
+            # More redraws arrived since this was scheduled
+            self.Schedule(hwnd, state, now)
+            return
+        state.lastCheck = now
+        self.flushed += 1
+        self.check(hwnd)
+
+    def Forget(self, hwnd):
+        """Called when a window is destroyed."""
+        state = self.windows.pop(hwnd, None)
+        if state is not None and state.task is not None:
+            self.cancelCall(state.task)
+
+    def Clear(self):
+        for hwnd in list(self.windows):
+            self.Forget(hwnd)
+
+    def Stats(self):
+        return {
+            "windows": len(self.windows),
+            "deferred": self.deferred,
+            "flushed": self.flushed,
+        }
+
+
+class FocusSettler(object):
+    """
+    Collapses runs of quick focus changes (alt-tabbing through windows)
+    into one: a window only counts as activated once it has kept the focus
+    for `interval` seconds.
+
+    Put() is called for every focus change. `activate(hwnd, since, left)`
+    is then called (through `callLater`) for the window that kept the
+    focus, with the time it got it and the time the run of changes began
+    (when the window before lost the focus). The windows passed through on
+    the way are counted in `suppressed`.
+    """
+
+    def __init__(self, activate, callLater, cancelCall, interval):
+        self.activate = activate
+        self.callLater = callLater
+        self.cancelCall = cancelCall
+        self.interval = interval
+        # The window with the focus, not settled yet, and since when
+        self.hwnd = None
+        self.since = None
+        # When the run of changes began
+        self.left = None
+        self.task = None
+        self.settled = 0
+        self.suppressed = 0
+
+    def Put(self, hwnd):
+        now = GetBackend().Now()
+        if self.hwnd is not None:
+            if hwnd == self.hwnd:
+                return
+            self.suppressed += 1
+        if self.left is None:
+            self.left = now
+        self.hwnd = hwnd
+        self.since = now
+        if self.task is None:
+            self.task = self.callLater(self.interval, self.Flush)
+
+    def Flush(self):
+        self.task = None
+        hwnd = self.hwnd
+        if hwnd is None:
+            # It was closed, and nothing else got the focus
+            self.left = None
+            return
+        remaining = self.since + self.interval - GetBackend().Now()
+        if remaining > 0:
+            self.task = self.callLater(remaining, self.Flush)
+            return
+        since = self.since
+        left = self.left
+        self.hwnd = self.since = self.left = None
+        self.settled += 1
+        self.activate(hwnd, since, left)
+
+    def Forget(self, hwnd):
+        """Called when a window is destroyed."""
+        if hwnd == self.hwnd:
+            self.hwnd = self.since = None
+            self.suppressed += 1
+
+    def Clear(self):
+        if self.task is not None:
+            self.cancelCall(self.task)
+            self.task = None
+        self.hwnd = self.since = self.left = None
+
+    def Stats(self):
+        return {
+            "pending": self.hwnd is not None,
+            "settled": self.settled,
+            "suppressed": self.suppressed,
+        }
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Win32 constants used by this plugin.
+
+They are spelled out here (instead of being taken from win32con or
+eg.WinApi.Dynamic) so that the plugin can be imported and driven by a
+simulated backend on machines that don't have those modules.
+"""
+
+# GetAncestor() / GetWindowLong() / GetWindow()
+GA_PARENT = 1
+GA_ROOT = 2
+GA_ROOTOWNER = 3
+GWL_HWNDPARENT = -8
+GW_CHILD = 5
+
+# Messages
+WM_APP = 0x8000
+WM_CLOSE = 0x0010
+WM_DESTROY = 0x0002
+WM_GETTEXT = 0x000D
+WM_GETTEXTLENGTH = 0x000E
+WM_QUIT = 0x0012
+
+SMTO_BLOCK = 0x0001
+SMTO_ABORTIFHUNG = 0x0002
+SMTO_ERRORONEXIT = 0x0020
+WAIT_TIMEOUT = 0x0102
+
+# https://msdn.microsoft.com/en-us/library/windows/desktop/ms644991(v=vs.85).aspx
+HSHELL_WINDOWCREATED = 1
+HSHELL_WINDOWDESTROYED = 2
+HSHELL_WINDOWACTIVATED = 4
+HSHELL_REDRAW = 6 # "The title of a window in the task bar has been redrawn."
+HSHELL_RUDEAPPACTIVATED = 0x8004
+HSHELL_FLASH = 0x8006
+
+# https://msdn.microsoft.com/en-us/library/windows/desktop/dd318066(v=vs.85).aspx
+EVENT_SYSTEM_FOREGROUND = 0x0003
+EVENT_SYSTEM_MINIMIZESTART = 0x0016
+EVENT_SYSTEM_MINIMIZEEND = 0x0017
+EVENT_OBJECT_DESTROY = 0x8001
+EVENT_OBJECT_SHOW = 0x8002
+EVENT_OBJECT_HIDE = 0x8003
+EVENT_OBJECT_LOCATIONCHANGE = 0x800B
+EVENT_OBJECT_NAMECHANGE = 0x800C
+WINEVENT_OUTOFCONTEXT = 0x0000
+OBJID_WINDOW = 0
+OBJID_CURSOR = -9
+CHILDID_SELF = 0
+
+# ShowWindow()
+SW_HIDE = 0
+SW_SHOWNORMAL = 1
+SW_SHOWMINIMIZED = 2
+SW_MAXIMIZE = 3
+SW_SHOWMAXIMIZED = 3
+SW_SHOWNOACTIVATE = 4
+SW_SHOW = 5
+SW_MINIMIZE = 6
+SW_SHOWMINNOACTIVE = 7
+SW_SHOWNA = 8
+SW_RESTORE = 9
+SW_SHOWDEFAULT = 10
+SW_FORCEMINIMIZE = 11
+
+# SetWindowPos()
+SWP_NOSIZE = 0x0001
+SWP_NOMOVE = 0x0002
+SWP_NOZORDER = 0x0004
+SWP_NOACTIVATE = 0x0010
+SWP_NOOWNERZORDER = 0x0200
+
+# AnimateWindow()
+AW_HOR_POSITIVE = 0x00000001
+AW_HOR_NEGATIVE = 0x00000002
+AW_VER_POSITIVE = 0x00000004
+AW_VER_NEGATIVE = 0x00000008
+AW_CENTER = 0x00000010
+AW_HIDE = 0x00010000
+AW_ACTIVATE = 0x00020000
+AW_SLIDE = 0x00040000
+AW_BLEND = 0x00080000
+
+# FlashWindowEx()
+FLASHW_STOP = 0
+FLASHW_CAPTION = 0x00000001
+FLASHW_TRAY = 0x00000002
+FLASHW_ALL = 0x00000003
+FLASHW_TIMER = 0x00000004
+FLASHW_TIMERNOFG = 0x0000000C
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
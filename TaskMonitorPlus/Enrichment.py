@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+from collections import deque
+
+try:
+    from Queue import Queue
+except ImportError:
+    from queue import Queue
+
+import eg
+
+class WorkerPool(object):
+    """
+    A few daemon threads running lookups that may block (on a hung window,
+    say) away from the message pump.
+    """
+
+    def __init__(self, workers):
+        self.queue = Queue()
+        self.threads = []
+        for i in range(workers):
+            thread = threading.Thread(
+                target=self.Run, name="TaskMonitorPlus worker %d" % (i + 1)
+            )
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+    def Submit(self, func, args, callback):
+        """
+        Runs func(*args) on a worker thread, then callback(result) on the
+        same thread. The result is None if func raised.
+        """
+        self.queue.put((func, args, callback))
+
+    def Run(self):
+        queue = self.queue
+        while True:
+            job = queue.get()
+            try:
+                if job is None:
+                    return
+                func, args, callback = job
+                try:
+                    result = func(*args)
+                except Exception:
+                    eg.PrintTraceback()
+                    result = None
+                callback(result)
+            finally:
+                queue.task_done()
+
+    def Join(self):
+        """Waits until every job submitted so far has finished."""
+        self.queue.join()
+
+    def Stop(self):
+        for thread in self.threads:
+            self.queue.put(None)
+        self.threads = []
+
+
+class _Pending(object):
+    __slots__ = (
+        "kind", "processInfo", "hwnd", "windowInfo", "apply", "done", "task",
+    )
+
+    def __init__(self, kind, processInfo, hwnd, windowInfo, apply):
+        self.kind = kind
+        self.processInfo = processInfo
+        self.hwnd = hwnd
+        self.windowInfo = windowInfo
+        self.apply = apply
+        self.done = False
+        self.task = None
+
+
+class EventSequencer(object):
+    """
+    Keeps events in the order the plugin saw them while some of them wait
+    for a lookup on the worker pool.
+
+    Add() is called on the message pump for every event. An event with a
+    `fetch` has it run on a worker; `apply(result)` then runs back on the
+    pump and returns whether the event should still be triggered. If the
+    worker hasn't answered within `timeout` seconds, apply(None) is called
+    instead. Events go out, through
+    `emit(kind, processInfo, hwnd, windowInfo)`, once every event before
+    them has gone out too.
+    """
+
+    def __init__(self, emit, pool, postCall, callLater, cancelCall, timeout):
+        self.emit = emit
+        self.pool = pool
+        self.postCall = postCall
+        self.callLater = callLater
+        self.cancelCall = cancelCall
+        self.timeout = timeout
+        self.pending = deque()
+        # The counters are read by GetStats() from other threads
+        self.statsLock = threading.Lock()
+        self.enriched = 0
+        self.timeouts = 0
+
+    def Add(
+        self, kind, processInfo, hwnd=None, windowInfo=None, fetch=None,
+        args=(), apply=None
+    ):
+        if fetch is None and not self.pending:
+            self.emit(kind, processInfo, hwnd, windowInfo)
+            return
+        entry = _Pending(kind, processInfo, hwnd, windowInfo, apply)
+        self.pending.append(entry)
+        if fetch is None:
+            entry.done = True
+            return
+        entry.task = self.callLater(self.timeout, self.TimedOut, entry)
+        postCall = self.postCall
+        done = self.Done
+        self.pool.Submit(
+            fetch, args, lambda result: postCall(done, (entry, result))
+        )
+
+    def Done(self, entry, result):
+        if entry.done:
+            # Already timed out
+            return
+        self.cancelCall(entry.task)
+        with self.statsLock:
+            self.enriched += 1
+        self.Resolve(entry, result)
+
+    def TimedOut(self, entry):
+        if entry.done:
+            return
+        with self.statsLock:
+            self.timeouts += 1
+        self.Resolve(entry, None)
+
+    def Resolve(self, entry, result):
+        entry.done = True
+        entry.task = None
+        if entry.apply is not None and not entry.apply(result):
+            entry.kind = None
+        self.Release()
+
+    def Release(self):
+        pending = self.pending
+        while pending and pending[0].done:
+            entry = pending.popleft()
+            if entry.kind is not None:
+                self.emit(
+                    entry.kind, entry.processInfo, entry.hwnd, entry.windowInfo
+                )
+
+    def Clear(self):
+        for entry in self.pending:
+            entry.done = True
+            if entry.task is not None:
+                self.cancelCall(entry.task)
+        self.pending.clear()
+
+    def Stats(self):
+        with self.statsLock:
+            return {
+                "pending": len(self.pending),
+                "enriched": self.enriched,
+                "timeouts": self.timeouts,
+            }
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,190 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+from fnmatch import translate
+
+from .ProcessInfo import EVENT_KINDS
+
+class FilterRule(object):
+    """
+    One line of the event filter. Patterns left out match anything.
+    - allow: True for an allow rule, False for a deny rule
+    - exe, windowClass: compiled glob patterns (case-insensitive) or None
+    - kinds: frozenset of event kinds, or None for all of them
+    - suppressed: how many events this rule has denied
+    """
+    __slots__ = ("text", "allow", "exe", "windowClass", "kinds", "suppressed")
+
+    def __init__(self, text, allow, exe=None, windowClass=None, kinds=None):
+        self.text = text
+        self.allow = allow
+        self.exe = _Compile(exe)
+        self.windowClass = _Compile(windowClass)
+        self.kinds = kinds
+        self.suppressed = 0
+
+    def __repr__(self):
+        return "<FilterRule %r suppressed=%d>" % (self.text, self.suppressed)
+
+
+def _Compile(pattern):
+    if pattern is None or pattern == "*":
+        return None
+    return re.compile(translate(pattern), re.IGNORECASE)
+
+
+def ParseRules(text):
+    """
+    Parses the event filter, one rule per line:
+        allow|deny [exe=<glob>] [class=<glob>] [kind=<kind>[,<kind>...]]
+    e.g.:
+        deny exe=qbittorrent kind=TitleChanged
+        deny class=tooltips_class32
+        deny kind=Flashed
+    Blank lines and lines starting with # are skipped. Returns a list of
+    FilterRule.
+    """
+    rules = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        words = line.split()
+        action = words[0].lower()
+        if action not in ("allow", "deny"):
+            raise ValueError("filter rule must start with allow or deny: %r" % line)
+        fields = {}
+        for word in words[1:]:
+            key, sep, value = word.partition("=")
+            key = key.lower()
+            if not sep or key not in ("exe", "class", "kind"):
+                raise ValueError("expected exe=, class= or kind=: %r" % line)
+            fields[key] = value
+        kinds = None
+        if "kind" in fields:
+            kinds = frozenset(fields["kind"].split(","))
+            unknown = kinds.difference(EVENT_KINDS)
+            if unknown:
+                raise ValueError(
+                    "unknown event kind %s: %r" % (", ".join(sorted(unknown)), line)
+                )
+        rules.append(FilterRule(
+            line, action == "allow", fields.get("exe"), fields.get("class"),
+            kinds,
+        ))
+    return rules
+
+
+class EventFilter(object):
+    """
+    Decides which events get triggered. The first rule that matches an
+    event decides; events no rule matches are allowed.
+
+    The rules that can apply to an (event kind, executable) pair are worked
+    out once and kept in a table, so most events are decided with a single
+    dict lookup. Only rules with a class pattern need the window class,
+    which is looked up (and from then on cached by the WindowInfo) just for
+    events those rules might match.
+    """
+
+    def __init__(self, rules):
+        self.rules = rules
+        self.table = {}     # key=(kind, exe name), val=tuple of FilterRule
+        self.byKind = dict(
+            (kind, [x for x in rules if x.kinds is None or kind in x.kinds])
+            for kind in EVENT_KINDS
+        )
+
+    def Allowed(self, kind, processInfo, hwnd=None, windowInfo=None, count=True):
+        """
+        Returns True if the event should be triggered. hwnd is the window
+        the event is about, or None for process events (which class
+        patterns never match); windowInfo is its WindowInfo, if the caller
+        has it to hand. With count=False, the rule that denies the event
+        doesn't count it as suppressed.
+        """
+        key = (kind, processInfo.name)
+        rules = self.table.get(key, None)
+        if rules is None:
+            rules = self.table[key] = self.Compile(kind, processInfo.name)
+        if not rules:
+            return True
+        windowClass = None
+        for rule in rules:
+            if rule.windowClass is not None:
+                if hwnd is None:
+                    continue
+                if windowClass is None:
+                    if windowInfo is None:
+                        windowInfo = processInfo.GetWindowInfo(hwnd)
+                    windowClass = windowInfo.window_class
+                if not rule.windowClass.match(windowClass):
+                    continue
+            if rule.allow:
+                return True
+            if count:
+                rule.suppressed += 1
+            return False
+        return True
+
+    def Compile(self, kind, name):
+        """
+        Returns the rules that can match `kind` events for executable
+        `name`, up to and including the first one that always does. An
+        empty tuple means every such event is allowed.
+        """
+        rules = []
+        for rule in self.byKind[kind]:
+            if rule.exe is not None and not rule.exe.match(name):
+                continue
+            rules.append(rule)
+            if rule.windowClass is None:
+                break
+        if all(x.allow for x in rules):
+            return ()
+        return tuple(rules)
+
+    def DisabledKinds(self):
+        """
+        Returns {kind: rule} for the event kinds denied outright: the first
+        rule that can apply to them denies everything.
+        """
+        disabled = {}
+        for kind, rules in self.byKind.items():
+            if rules and not rules[0].allow and (
+                rules[0].exe is None and rules[0].windowClass is None
+            ):
+                disabled[kind] = rules[0]
+        return disabled
+
+    def Stats(self):
+        return [(rule.text, rule.suppressed) for rule in self.rules]
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
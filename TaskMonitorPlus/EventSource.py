@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from .Backend import GetBackend
+from .Constants import (
+    CHILDID_SELF, EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE,
+    EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_SHOW,
+    EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_MINIMIZEEND,
+    EVENT_SYSTEM_MINIMIZESTART, GA_ROOT, OBJID_WINDOW,
+)
+
+# Where the plugin hears about windows from: the shell hook
+# (RegisterShellHookWindow()) or WinEvent hooks (WinEventSource)
+EVENT_SOURCES = ("shellhook", "winevent")
+
+# The WinEvents hooked, as (eventMin, eventMax) ranges; one hook each, so
+# that the events in between aren't delivered at all
+WINEVENT_RANGES = (
+    (EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_FOREGROUND),
+    (EVENT_SYSTEM_MINIMIZESTART, EVENT_SYSTEM_MINIMIZEEND),
+    (EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE),
+    (EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE),
+)
+
+# Events that can be about a window the plugin doesn't track yet; the
+# others are only passed on for tracked windows
+UNTRACKED_EVENTS = frozenset([EVENT_SYSTEM_FOREGROUND, EVENT_OBJECT_SHOW])
+
+
+class WinEventSource(object):
+    """
+    Window notifications from WinEvent hooks (SetWinEventHook()), for use
+    instead of the shell hook. Unlike the shell hook, WinEvents say what
+    changed (the title, the position, the minimized state), and cover
+    every top-level window rather than only those on the taskbar.
+
+    The hooks' callback runs outside the message pump (on a thread of the
+    backend's, or wherever a SimulatedDesktop raises the event), so it
+    only filters: events about the window itself (not its caret, cursor
+    or child objects), about top-level windows when they can announce a
+    new window, and otherwise only about windows in `tracked` (a dict
+    read, never written, here) or `pending` (the windows open at start
+    that the plugin hasn't registered yet). The rest are posted to `hwnd` as
+    `message`, with the event in wParam and the window in lParam, so the
+    plugin handles them in order with everything else.
+
+    A window is untracked as soon as it's hidden, so the destruction of a
+    window whose hiding was posted isn't posted too.
+    """
+
+    def __init__(self, hwnd, message, tracked, pending=frozenset()):
+        self.hwnd = hwnd
+        self.message = message
+        self.tracked = tracked
+        self.pending = pending
+        self.hooks = None
+        # Windows whose EVENT_OBJECT_HIDE was posted, and not shown since
+        self.hidden = set()
+        self.posted = 0
+        self.dropped = 0
+
+    def Start(self):
+        backend = GetBackend()
+        self.postMessage = backend.PostMessage
+        self.getAncestor = backend.GetAncestor
+        self.hooks = backend.StartWinEventHooks(WINEVENT_RANGES, self.Callback)
+
+    def Stop(self):
+        if self.hooks is not None:
+            GetBackend().StopWinEventHooks(self.hooks)
+            self.hooks = None
+
+    def Callback(self, event, hwnd, idObject, idChild):
+        hidden = self.hidden
+        if (
+            not hwnd or idObject != OBJID_WINDOW or idChild != CHILDID_SELF or
+            (event == EVENT_OBJECT_DESTROY and hwnd in hidden) or
+            (
+                hwnd not in self.tracked and hwnd not in self.pending and (
+                    event not in UNTRACKED_EVENTS or
+                    self.getAncestor(hwnd, GA_ROOT) != hwnd
+                )
+            )
+        ):
+            if event == EVENT_OBJECT_DESTROY:
+                hidden.discard(hwnd)
+            self.dropped += 1
+            return
+        if event == EVENT_OBJECT_HIDE:
+            hidden.add(hwnd)
+        elif event == EVENT_OBJECT_SHOW:
+            hidden.discard(hwnd)
+        self.posted += 1
+        self.postMessage(self.hwnd, self.message, event, hwnd)
+
+    def Stats(self):
+        return {"posted": self.posted, "dropped": self.dropped}
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+
+class FocusHistory(object):
+    """
+    Which windows had the focus, most recent first, and for how long.
+
+    The plugin calls Activated() and Deactivated() on the same transitions
+    it triggers the Activated and Deactivated events for (whether or not
+    the events themselves are filtered out), and Closed() when a window is
+    destroyed. Each of those is a few dict operations, however many
+    windows there are:
+    - windows: key=hwnd, val=seconds it has had the focus, least recently
+      focused first; at most maxWindows entries, the oldest are dropped
+    - exeTimes: key=executable name, val=seconds its windows have had the
+      focus, closed windows included, least recently focused first; at
+      most maxExes entries, the oldest are dropped
+    - unnamed: key=ProcessInfo, val=seconds, for processes whose name
+      wasn't known yet (it's looked up on a worker); moved to exeTimes
+      once it is
+    Times are by the backend's clock and count from the plugin's start or
+    the last Reset().
+    """
+
+    def __init__(self, maxWindows=256, maxExes=256):
+        self.maxWindows = maxWindows
+        self.maxExes = maxExes
+        self.windows = OrderedDict()
+        self.exeTimes = OrderedDict()
+        self.unnamed = OrderedDict()
+        # The window that has the focus, its ProcessInfo, and since when
+        self.current = None
+        self.processInfo = None
+        self.since = None
+        self.changes = 0
+
+    def Activated(self, hwnd, processInfo, now):
+        if self.current is not None:
+            self.Deactivated(self.current, now)
+        windows = self.windows
+        windows[hwnd] = windows.pop(hwnd, 0.0)
+        if len(windows) > self.maxWindows:
+            windows.popitem(last=False)
+        self.current = hwnd
+        self.processInfo = processInfo
+        self.since = now
+        self.changes += 1
+
+    def Deactivated(self, hwnd, now):
+        """
+        Returns how long hwnd has had the focus this time (its dwell time),
+        or None if it didn't have it.
+        """
+        if hwnd != self.current or hwnd is None:
+            return None
+        dwell = now - self.since
+        if hwnd in self.windows:
+            self.windows[hwnd] += dwell
+        processInfo = self.processInfo
+        if processInfo.name is None:
+            self.AddTime(self.unnamed, processInfo, dwell)
+        else:
+            self.AddExeTime(processInfo.name, dwell)
+        self.current = self.processInfo = self.since = None
+        return dwell
+
+    def AddTime(self, times, key, seconds):
+        times[key] = times.pop(key, 0.0) + seconds
+        if len(times) > self.maxExes:
+            times.popitem(last=False)
+
+    def AddExeTime(self, name, seconds):
+        unnamed = self.unnamed
+        if unnamed:
+            for processInfo in [x for x in unnamed if x.name is not None]:
+                self.AddTime(
+                    self.exeTimes, processInfo.name, unnamed.pop(processInfo)
+                )
+        if name is not None:
+            self.AddTime(self.exeTimes, name, seconds)
+
+    def Closed(self, hwnd, now):
+        self.Deactivated(hwnd, now)
+        self.windows.pop(hwnd, None)
+
+    def Recent(self, count=None):
+        """
+        Returns up to `count` hwnds, the most recently focused first (which
+        is the one with the focus now, if it's tracked).
+        """
+        recent = []
+        for hwnd in reversed(self.windows):
+            if count is not None and len(recent) >= count:
+                break
+            recent.append(hwnd)
+        return recent
+
+    def Running(self, now):
+        return now - self.since if self.current is not None else 0.0
+
+    def WindowTime(self, hwnd, now):
+        """Seconds hwnd has had the focus, including now."""
+        seconds = self.windows.get(hwnd, 0.0)
+        if hwnd == self.current:
+            seconds += self.Running(now)
+        return seconds
+
+    def ExeTimes(self, now):
+        """
+        Returns {executable name: seconds it has had the focus}. Processes
+        whose name isn't known yet aren't in it.
+        """
+        self.AddExeTime(None, 0.0)
+        exeTimes = dict(self.exeTimes)
+        if self.current is not None:
+            name = self.processInfo.name
+            if name is not None:
+                exeTimes[name] = exeTimes.get(name, 0.0) + self.Running(now)
+        return exeTimes
+
+    def Reset(self, now):
+        """Starts counting the time windows have had the focus again."""
+        for hwnd in list(self.windows):
+            self.windows[hwnd] = 0.0
+        self.exeTimes.clear()
+        self.unnamed.clear()
+        if self.current is not None:
+            self.since = now
+
+    def Stats(self):
+        return {
+            "windows": len(self.windows),
+            "maxWindows": self.maxWindows,
+            "exes": len(self.exeTimes),
+            "maxExes": self.maxExes,
+            "unnamed": len(self.unnamed),
+            "changes": self.changes,
+        }
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+On-disk journal of window lifecycle events.
+
+The file is a fixed-size ring buffer, written through a memory map:
+- a header (HEADER_SIZE bytes): magic, version, record size, capacity (in
+  records) and the number of records ever written
+- `capacity` records of RECORD_SIZE bytes each; record n is kept in slot
+  n % capacity, so once the ring is full the oldest record is overwritten
+
+Appending a record is a struct.pack_into() into the mapped memory; the
+operating system writes the pages out in its own time, so the message pump
+never waits on the disk. Records are appended in time order, which lets
+the reader find a time range with a binary search and then read just the
+records in it.
+"""
+
+import mmap
+import os
+import struct
+from collections import namedtuple
+
+from .ProcessInfo import EVENT_KINDS
+
+MAGIC = b"TMPJRNL\0"
+VERSION = 1
+
+# magic, version, record size, capacity, records written
+_HEADER = struct.Struct("<8sIIQQ")
+HEADER_SIZE = 64
+_WRITTEN_OFFSET = 24
+
+# timestamp, hwnd, pid, kind, exe, class, title (UTF-8, truncated and
+# zero-padded)
+_RECORD = struct.Struct("<dQIB3x40s64s128s")
+RECORD_SIZE = _RECORD.size
+
+JournalRecord = namedtuple(
+    "JournalRecord", "timestamp kind hwnd pid exe window_class title"
+)
+
+_KIND_CODES = dict((kind, i) for i, kind in enumerate(EVENT_KINDS))
+
+
+class JournalError(ValueError): pass
+
+
+def _Encode(text):
+    if not text:
+        return b""
+    if isinstance(text, bytes):
+        # Already encoded (Python 2 str)
+        return text
+    return text.encode("utf-8")
+
+
+def _Decode(data):
+    # A truncated multi-byte character is dropped
+    return data.rstrip(b"\0").decode("utf-8", "ignore")
+
+
+def _ReadHeader(mapped):
+    magic, version, recordSize, capacity, written = _HEADER.unpack_from(mapped, 0)
+    if magic != MAGIC or version != VERSION or recordSize != RECORD_SIZE:
+        raise JournalError("not a TaskMonitorPlus journal")
+    return capacity, written
+
+
+class Journal(object):
+    """
+    Writes the journal. An existing journal with the same capacity is
+    appended to; anything else at `path` is replaced.
+    """
+
+    def __init__(self, path, capacity=65536):
+        if capacity < 1:
+            raise ValueError("journal capacity must be at least 1 record")
+        self.path = path
+        self.capacity = capacity
+        size = HEADER_SIZE + capacity * RECORD_SIZE
+        written = 0
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            with open(path, "rb") as f:
+                header = f.read(_HEADER.size)
+            try:
+                oldCapacity, written = _ReadHeader(header)
+            except (JournalError, struct.error):
+                oldCapacity = None
+            if oldCapacity != capacity:
+                written = 0
+        self.file = open(path, "r+b" if written else "w+b")
+        if not written:
+            self.file.truncate(size)
+        self.map = mmap.mmap(self.file.fileno(), size)
+        if not written:
+            _HEADER.pack_into(self.map, 0, MAGIC, VERSION, RECORD_SIZE, capacity, 0)
+        self.written = written
+
+    def Append(self, timestamp, kind, hwnd, pid, exe, windowClass, title):
+        """Adds one record; hwnd is 0 for process events."""
+        offset = HEADER_SIZE + (self.written % self.capacity) * RECORD_SIZE
+        _RECORD.pack_into(
+            self.map, offset, timestamp, hwnd or 0, pid, _KIND_CODES[kind],
+            _Encode(exe), _Encode(windowClass), _Encode(title),
+        )
+        self.written += 1
+        struct.pack_into("<Q", self.map, _WRITTEN_OFFSET, self.written)
+
+    def Flush(self):
+        self.map.flush()
+
+    def Close(self):
+        if self.map is not None:
+            self.map.flush()
+            self.map.close()
+            self.file.close()
+            self.map = None
+
+    def Stats(self):
+        return {
+            "written": self.written,
+            "kept": min(self.written, self.capacity),
+            "capacity": self.capacity,
+        }
+
+
+class JournalReader(object):
+    """
+    Reads a journal, which may still be being written to. Only the pages
+    holding the records asked for are read from the file.
+    """
+
+    def __init__(self, path):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty file
+            self.file.close()
+            raise JournalError("not a TaskMonitorPlus journal")
+        try:
+            self.capacity = _ReadHeader(self.map)[0]
+        except (JournalError, struct.error):
+            self.Close()
+            raise JournalError("not a TaskMonitorPlus journal")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.Close()
+
+    def Close(self):
+        self.map.close()
+        self.file.close()
+
+    def Span(self):
+        """
+        Returns (first, end): the numbers of the oldest record still kept
+        and of the next record to be written.
+        """
+        written = _ReadHeader(self.map)[1]
+        return max(0, written - self.capacity), written
+
+    def Read(self, n):
+        """Returns record number n as a JournalRecord."""
+        offset = HEADER_SIZE + (n % self.capacity) * RECORD_SIZE
+        timestamp, hwnd, pid, kind, exe, windowClass, title = (
+            _RECORD.unpack_from(self.map, offset)
+        )
+        return JournalRecord(
+            timestamp, EVENT_KINDS[kind], hwnd, pid, _Decode(exe),
+            _Decode(windowClass), _Decode(title),
+        )
+
+    def Timestamp(self, n):
+        offset = HEADER_SIZE + (n % self.capacity) * RECORD_SIZE
+        return struct.unpack_from("<d", self.map, offset)[0]
+
+    def Find(self, timestamp, first, end):
+        """
+        Returns the number of the first record from `first` to `end` at or
+        after timestamp.
+        """
+        while first < end:
+            middle = (first + end) // 2
+            if self.Timestamp(middle) < timestamp:
+                first = middle + 1
+            else:
+                end = middle
+        return first
+
+    def Records(self, start=None, end=None):
+        """
+        Yields the records with start <= timestamp < end, oldest first
+        (either bound can be left out). If the writer laps the reader, the
+        records it overwrote are skipped.
+        """
+        first, stop = self.Span()
+        if start is not None:
+            first = self.Find(start, first, stop)
+        n = first
+        while n < stop:
+            record = self.Read(n)
+            oldest = self.Span()[0]
+            if n < oldest:
+                # Overwritten, maybe while it was being read
+                n = oldest
+                continue
+            if end is not None and record.timestamp >= end:
+                return
+            yield record
+            n += 1
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+import time
+from collections import deque
+
+import eg
+
+class KeystrokeQueue(object):
+    """
+    Sends keystrokes to windows on a thread of its own, so that the action
+    thread doesn't wait for the windows to be ready.
+
+    Put() returns at once. Keystrokes are sent in the order they were put.
+    Those for a window whose last queued keystrokes are still waiting, with
+    the same method and mode, are appended to them and go out in the same
+    SendKeys call. The thread is started by the first Put().
+    """
+
+    def __init__(self):
+        self.condition = threading.Condition()
+        # [windowInfo, [texts], useAlternateMethod, mode], in sending order
+        self.pending = deque()
+        # key=hwnd, val=the window's last entry in pending
+        self.last = {}
+        self.busy = False
+        self.thread = None
+        self.sent = 0
+        self.batches = 0
+        self.merged = 0
+        self.failed = 0
+        self.dead = 0
+
+    def Put(self, windowInfo, text, useAlternateMethod=False, mode=2):
+        hwnd = windowInfo.hwnd
+        with self.condition:
+            entry = self.last.get(hwnd, None)
+            if entry is not None and entry[2:] == [useAlternateMethod, mode]:
+                entry[1].append(text)
+                self.merged += 1
+            else:
+                entry = [windowInfo, [text], useAlternateMethod, mode]
+                self.pending.append(entry)
+                self.last[hwnd] = entry
+            if self.thread is None:
+                self.thread = threading.Thread(
+                    target=self.Run, name="TaskMonitorPlus keystrokes"
+                )
+                self.thread.daemon = True
+                self.thread.start()
+            self.condition.notify()
+
+    def Run(self):
+        condition = self.condition
+        while True:
+            with condition:
+                while not self.pending:
+                    self.busy = False
+                    condition.notify_all()
+                    condition.wait()
+                self.busy = True
+                entry = self.pending.popleft()
+                windowInfo, texts, useAlternateMethod, mode = entry
+                if self.last.get(windowInfo.hwnd, None) is entry:
+                    del self.last[windowInfo.hwnd]
+            try:
+                windowInfo.SendKeystrokes(
+                    "".join(texts), useAlternateMethod, mode
+                )
+            except windowInfo.DeadWindow:
+                # Closed before its turn; nothing to report
+                self.dead += len(texts)
+            except Exception:
+                self.failed += len(texts)
+                eg.PrintTraceback()
+            else:
+                self.sent += len(texts)
+                self.batches += 1
+
+    def Join(self, timeout=None):
+        """
+        Waits until everything queued so far has been sent, or for at most
+        `timeout` seconds. Returns whether the queue is empty.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        with self.condition:
+            while self.pending or self.busy:
+                if deadline is None:
+                    self.condition.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self.condition.wait(remaining)
+            return True
+
+    def Stats(self):
+        return {
+            "pending": sum(len(x[1]) for x in list(self.pending)),
+            "sent": self.sent,
+            "batches": self.batches,
+            "merged": self.merged,
+            "failed": self.failed,
+            "dead": self.dead,
+        }
+
+
+keystrokeQueue = KeystrokeQueue()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
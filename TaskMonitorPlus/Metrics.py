@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+from timeit import default_timer
+
+from . import Constants
+
+# wParam values of the shell hook, by number, for reporting
+SHELLHOOK_NAMES = dict(
+    (getattr(Constants, name), name) for name in dir(Constants)
+    if name.startswith("HSHELL_")
+)
+
+class Histogram(object):
+    """
+    Latency histogram with power-of-two buckets: bucket 0 counts samples
+    under 1 microsecond, bucket i those from 2**(i-1) up to 2**i
+    microseconds. Recording a sample is a few integer operations.
+    """
+    __slots__ = ("buckets", "count", "total", "max")
+
+    BUCKETS = 32
+
+    def __init__(self):
+        self.buckets = array("L", [0] * self.BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def Record(self, seconds):
+        self.buckets[min(int(seconds * 1e6).bit_length(), self.BUCKETS - 1)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def Percentile(self, fraction):
+        """
+        Returns the upper bound, in microseconds, of the bucket holding the
+        given fraction of the samples.
+        """
+        if not self.count:
+            return 0
+        wanted = fraction * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= wanted:
+                return 1 << i
+        return 1 << (self.BUCKETS - 1)
+
+    def Merged(self, other):
+        """Returns a new Histogram holding the samples of both."""
+        merged = Histogram()
+        for i in range(self.BUCKETS):
+            merged.buckets[i] = self.buckets[i] + other.buckets[i]
+        merged.count = self.count + other.count
+        merged.total = self.total + other.total
+        merged.max = max(self.max, other.max)
+        return merged
+
+    def Stats(self):
+        return {
+            "count": self.count,
+            "mean_us": self.total / self.count * 1e6 if self.count else 0.0,
+            "max_us": self.max * 1e6,
+            "p50_us": self.Percentile(0.50),
+            "p99_us": self.Percentile(0.99),
+            # key=upper bound in microseconds
+            "buckets": dict(
+                (1 << i, n) for i, n in enumerate(self.buckets) if n
+            ),
+        }
+
+
+class Metrics(object):
+    """
+    Counters for what the plugin does on the message pump:
+    - shellHook: a Histogram per shell-hook wParam, known or not, of the
+      time taken to handle it (so also a count of them)
+    - handlers: a Histogram per other timed handler
+    - events: events triggered, by kind
+    Each message is timed once, where it enters the plugin, so the cost is
+    two clock reads and a bucket increment. The plugin adds Win32 call
+    counts, registry sizes and the statistics of its caches and other parts
+    in TaskMonitorPlus.GetMetrics().
+    """
+
+    def __init__(self):
+        self.Reset()
+
+    def Reset(self):
+        self.started = default_timer()
+        self.shellHook = {}
+        self.handlers = {}
+        self.events = {}
+
+    def Timed(self, name, func):
+        """Returns func wrapped so that its run time is recorded."""
+        record = self.handlers.setdefault(name, Histogram()).Record
+        def TimedCall(*args):
+            start = default_timer()
+            result = func(*args)
+            record(default_timer() - start)
+            return result
+        TimedCall.__name__ = name
+        return TimedCall
+
+    def TimedShellHook(self, func):
+        """
+        Like Timed(), for the shell-hook handler: the time is recorded by
+        wParam.
+        """
+        histograms = self.shellHook
+        def TimedShellHook(hwnd, mesg, wParam, lParam):
+            start = default_timer()
+            result = func(hwnd, mesg, wParam, lParam)
+            elapsed = default_timer() - start
+            histogram = histograms.get(wParam, None)
+            if histogram is None:
+                histogram = histograms[wParam] = Histogram()
+            histogram.Record(elapsed)
+            return result
+        return TimedShellHook
+
+    def CountEvent(self, kind):
+        self.events[kind] = self.events.get(kind, 0) + 1
+
+    def Stats(self, shellHookProcs=None):
+        """
+        shellHookProcs maps wParam to the method handling it; their shell
+        hook timings are then also reported under the method's name.
+        """
+        handlers = {}
+        for name, histogram in self.handlers.items():
+            if histogram.count:
+                handlers[name] = histogram
+        for wParam, histogram in self.shellHook.items():
+            proc = (shellHookProcs or {}).get(wParam, None)
+            name = proc.__name__ if proc is not None else "MyWndProc(unhandled)"
+            if name in handlers:
+                handlers[name] = handlers[name].Merged(histogram)
+            else:
+                handlers[name] = histogram
+        return {
+            "seconds": default_timer() - self.started,
+            "messages": dict(
+                (SHELLHOOK_NAMES.get(wParam, "0x%04X" % wParam), histogram.count)
+                for wParam, histogram in self.shellHook.items()
+            ),
+            "handlers": dict(
+                (name, histogram.Stats()) for name, histogram in handlers.items()
+            ),
+            "events": dict(self.events),
+        }
+
+
+def Dump(stats, path):
+    """Writes metrics (as returned by GetMetrics()) to a JSON file."""
+    import json
+    with open(path, "w") as f:
+        json.dump(stats, f, indent=1, sort_keys=True)
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+from collections import OrderedDict
+from os.path import splitext
+
+from .Backend import GetBackend, Unwrap
+
+_names = {}
+
+def InternName(name):
+    """
+    Returns a shared copy of an executable or window class name, so that
+    the many objects holding the same name don't each keep their own.
+    (The intern() builtin can't be used: these names may be unicode.)
+    """
+    return _names.setdefault(name, name)
+
+class ProcessCache(object):
+    """
+    Bounded LRU cache of process names, shared by everything that needs
+    the executable name for a pid.
+
+    Entries are keyed by pid and remember the process's creation time. A
+    lookup answers from the cache without asking Windows anything; it's up
+    to the plugin to Forget() a process it sees exit. A pid it doesn't know
+    about yet may have been reused by a process that exited unseen, so for
+    those GetName(verify=True) compares the creation time of the process
+    that has the pid now. Counters:
+    - hits: lookups answered from the cache
+    - misses: lookups that had to ask for the process name
+    - reused: entries dropped because their pid now names another process
+    - evictions: entries dropped to stay within maxSize
+
+    Lookups may come from the enrichment worker threads as well as the
+    message pump, so they are serialised with a lock.
+    """
+
+    def __init__(self, maxSize=512):
+        self.maxSize = maxSize
+        self.entries = OrderedDict()    # key=pid, val=(creationTime, name)
+        self.backend = None
+        self.hits = 0
+        self.misses = 0
+        self.reused = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def GetName(self, pid, verify=False):
+        """
+        Returns the executable name of a process, without its extension.
+        With verify, a cached name is only used if the process that has the
+        pid now is the one it was cached for.
+        """
+        with self.lock:
+            return self._GetName(pid, verify)
+
+    def _GetName(self, pid, verify):
+        backend = GetBackend()
+        self._CheckBackend(backend)
+        entries = self.entries
+        creationTime = None
+        entry = entries.pop(pid, None)
+        if entry is not None:
+            if verify:
+                creationTime = backend.GetProcessCreationTime(pid)
+            if not verify or entry[0] == creationTime:
+                self.hits += 1
+                entries[pid] = entry
+                return entry[1]
+            self.reused += 1
+        self.misses += 1
+        if creationTime is None:
+            creationTime = backend.GetProcessCreationTime(pid)
+        name = InternName(splitext(backend.GetProcessName(pid))[0])
+        if creationTime:
+            # 0 means the process couldn't be opened; caching that would
+            # make any process that gets the pid later look the same
+            self._Add(pid, creationTime, name)
+        return name
+
+    def Store(self, pid, creationTime, name):
+        """
+        Records the name of a process learned some other way (from the
+        process table, say), and returns it the way GetName() would.
+        """
+        name = InternName(splitext(name)[0])
+        with self.lock:
+            self._CheckBackend(GetBackend())
+            self.entries.pop(pid, None)
+            if creationTime:
+                self._Add(pid, creationTime, name)
+        return name
+
+    def _CheckBackend(self, backend):
+        # With the lock held
+        backend = Unwrap(backend)
+        if backend is not self.backend:
+            # Another backend means another desktop; nothing here applies
+            # (counting the calls, when metrics are on, doesn't change it)
+            self.entries.clear()
+            self.backend = backend
+
+    def _Add(self, pid, creationTime, name):
+        # With the lock held
+        entries = self.entries
+        entries[pid] = (creationTime, name)
+        if len(entries) > self.maxSize:
+            entries.popitem(last=False)
+            self.evictions += 1
+
+    def Forget(self, pid):
+        """Called when the process with this pid has exited."""
+        with self.lock:
+            self.entries.pop(pid, None)
+
+    def Clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def Stats(self):
+        return {
+            "size": len(self.entries),
+            "maxSize": self.maxSize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "reused": self.reused,
+            "evictions": self.evictions,
+        }
+
+processCache = ProcessCache()
+
+def GetProcessName(pid):
+    """
+    Returns the executable name of a process, without its extension,
+    through the shared cache. The caller isn't assumed to know the process,
+    so a cached name is checked against pid reuse.
+    """
+    return processCache.GetName(pid, verify=True)
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -16,18 +16,72 @@
 # You should have received a copy of the GNU General Public License along
 # with EventGhost. If not, see <http://www.gnu.org/licenses/>.
 
-from os.path import splitext
-from eg.WinApi.Utils import GetProcessName
+from collections import namedtuple
+
+from .ProcessCache import GetProcessName
+from .WindowInfo import WindowInfo
+
+EVENT_KINDS = (
+    "Created", "Destroyed", "NewWindow", "ClosedWindow", "Activated",
+    "Deactivated", "Flashed", "TitleChanged", "HighCPU", "MemoryGrowth",
+)
+
+# The full event suffix ("Activated.notepad" etc.) for each kind of event
+EventNames = namedtuple("EventNames", EVENT_KINDS)
+
+_eventNames = {}
+
+def GetEventNames(name):
+    """
+    Returns the EventNames for an executable name. They are built once per
+    name and shared by all processes running that executable.
+    """
+    eventNames = _eventNames.get(name, None)
+    if eventNames is None:
+        eventNames = EventNames(*[kind + "." + name for kind in EVENT_KINDS])
+        _eventNames[name] = eventNames
+    return eventNames
 
 class ProcessInfo(object):
     """
     Class representing an individual process, and keeping a list of
     its open windows.
     """
-    def __init__(self, pid):
+    __slots__ = ("pid", "name", "events", "hwnds", "creationTime")
+
+    def __init__(self, pid, name=None, lookup=True):
+        """
+        With lookup=False and no name, name and events stay None until
+        SetName() is called (the plugin then looks the name up on a worker
+        thread).
+        """
         self.pid = pid
-        self.name = splitext(GetProcessName(pid))[0]
-        self.hwnds = dict()     # key=hwnd, val=WindowInfo(hwnd)
+        self.name = None
+        self.events = None
+        if name is None and lookup:
+            name = GetProcessName(pid)
+        if name is not None:
+            self.SetName(name)
+        # key=hwnd, val=WindowInfo(hwnd), or None until GetWindowInfo() is
+        # first called for that window
+        self.hwnds = dict()
+        # Set by the process monitor, if it's on
+        self.creationTime = None
+
+    def SetName(self, name):
+        self.name = name
+        self.events = GetEventNames(name)
+
+    def GetWindowInfo(self, hwnd):
+        """
+        Returns the WindowInfo for one of this process's windows, creating
+        it on first use.
+        """
+        windowInfo = self.hwnds[hwnd]
+        if windowInfo is None:
+            windowInfo = WindowInfo(hwnd, self.pid, self.name, tracked=True)
+            self.hwnds[hwnd] = windowInfo
+        return windowInfo
 
     def __str__(self):
         return self.name
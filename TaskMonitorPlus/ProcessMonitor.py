@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from timeit import default_timer
+
+from .Backend import GetBackend
+
+class ProcessMonitor(object):
+    """
+    Tells which processes started and exited since the last look at the
+    process table.
+
+    `source` returns the table as a dict, key=(pid, creation time),
+    val=executable name (the backend's GetProcessTable() by default; a
+    fake table for testing). Each Tick() takes the table and compares its
+    keys with the last one's as sets, so processes are told apart even
+    when a pid is reused, and the work done in Python grows with the
+    number of changes rather than the number of processes. Meanwhile:
+    - byPid: key=pid, val=creation time of the process running now
+    """
+
+    def __init__(self, source=None):
+        self.source = source
+        self.table = None
+        self.byPid = {}
+        self.ticks = 0
+        self.started = 0
+        self.exited = 0
+        self.lastDuration = 0.0
+
+    def Tick(self):
+        """
+        Returns (started, exited): lists of (pid, creation time, name) and
+        of (pid, creation time). The first tick returns every process as
+        started.
+        """
+        start = default_timer()
+        source = self.source or GetBackend().GetProcessTable
+        table = source()
+        keys = set(table)
+        if self.table is None:
+            startedKeys = keys
+            exitedKeys = ()
+        else:
+            startedKeys = keys.difference(self.table)
+            exitedKeys = self.table.difference(keys)
+        self.table = keys
+        byPid = self.byPid
+        for pid, creationTime in exitedKeys:
+            if byPid.get(pid, None) == creationTime:
+                del byPid[pid]
+        started = []
+        # Oldest first, so Created events come in the order of the starts
+        for key in sorted(startedKeys, key=lambda x: x[1]):
+            byPid[key[0]] = key[1]
+            started.append((key[0], key[1], table[key]))
+        self.ticks += 1
+        self.started += len(started)
+        self.exited += len(exitedKeys)
+        self.lastDuration = default_timer() - start
+        return started, list(exitedKeys)
+
+    def IsRunning(self, pid):
+        return pid in self.byPid
+
+    def Stats(self):
+        return {
+            "processes": len(self.byPid),
+            "ticks": self.ticks,
+            "started": self.started,
+            "exited": self.exited,
+            "lastDuration": self.lastDuration,
+        }
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
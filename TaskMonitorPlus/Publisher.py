@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import json
+import socket
+import struct
+import threading
+from collections import deque
+
+import eg
+
+# Events a subscriber may fall behind by before it's dropped
+MAX_QUEUE = 10000
+
+# The fields of each event, as published
+FIELDS = ("time", "kind", "hwnd", "pid", "exe", "class", "title")
+
+_LENGTH = struct.Struct("<I")
+
+def EncodeFrame(record):
+    """
+    Returns an event (a tuple of FIELDS) as a frame: the length of the body
+    as 4 bytes, little-endian, then the body, a JSON object in UTF-8.
+    """
+    body = json.dumps(dict(zip(FIELDS, record)), separators=(",", ":"))
+    if not isinstance(body, bytes):
+        body = body.encode("utf-8")
+    return _LENGTH.pack(len(body)) + body
+
+
+class Subscriber(object):
+    """
+    One connected program. Events are queued by Put() and sent by a thread
+    of the subscriber's own, as many at a time as have queued up, so that
+    a slow reader only ever holds up itself.
+    """
+
+    def __init__(self, connection, address, maxQueue):
+        self.connection = connection
+        self.address = address
+        self.maxQueue = maxQueue
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.overflowed = False
+        self.sent = 0
+        self.batches = 0
+        # Events that couldn't be encoded, and were left out
+        self.failed = 0
+        self.thread = threading.Thread(
+            target=self.Run, name="TaskMonitorPlus.Subscriber"
+        )
+        self.thread.daemon = True
+
+    def Start(self):
+        self.thread.start()
+
+    def Put(self, record):
+        """Queues an event. Returns False if the subscriber is gone."""
+        with self.condition:
+            if self.closed:
+                return False
+            if len(self.queue) >= self.maxQueue:
+                self.overflowed = True
+                self.Close()
+                return False
+            self.queue.append(record)
+            self.condition.notify()
+        return True
+
+    def Run(self):
+        queue = self.queue
+        condition = self.condition
+        while True:
+            with condition:
+                while not queue and not self.closed:
+                    condition.wait()
+                if self.closed:
+                    break
+                records = list(queue)
+                queue.clear()
+            frames = []
+            for record in records:
+                try:
+                    frames.append(EncodeFrame(record))
+                except (TypeError, ValueError):
+                    # One bad event (a title that isn't valid text, say)
+                    # doesn't disconnect the subscriber
+                    eg.PrintTraceback()
+                    self.failed += 1
+            try:
+                self.connection.sendall(b"".join(frames))
+            except (socket.error, OSError):
+                break
+            self.sent += len(frames)
+            self.batches += 1
+        with condition:
+            self.closed = True
+            queue.clear()
+        self.connection.close()
+
+    def Close(self):
+        """Disconnects; a send in progress is cut short."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        try:
+            self.connection.shutdown(socket.SHUT_RDWR)
+        except (socket.error, OSError):
+            pass
+
+
+class Publisher(object):
+    """
+    Mirrors the plugin's events to other programs on the same machine:
+    each program that connects to `port` on localhost receives every event
+    from then on, as frames (see EncodeFrame()). Publish() is called on the
+    message pump and only queues the event for each subscriber; a
+    subscriber more than maxQueue events behind is disconnected rather than
+    waited for. Port 0 picks a free port (see `port` afterwards).
+    """
+
+    def __init__(self, port, host="127.0.0.1", maxQueue=MAX_QUEUE):
+        self.maxQueue = maxQueue
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        try:
+            self.server.bind((host, port))
+            self.server.listen(5)
+        except (socket.error, OSError):
+            self.server.close()
+            raise
+        self.port = self.server.getsockname()[1]
+        # Replaced rather than changed, so that Publish() can go through it
+        # without the lock
+        self.subscribers = ()
+        self.lock = threading.Lock()
+        self.connected = 0
+        self.published = 0
+        self.dropped = 0
+        self.disconnected = 0
+        self.thread = threading.Thread(
+            target=self.Accept, name="TaskMonitorPlus.Publisher"
+        )
+        self.thread.daemon = True
+        self.thread.start()
+
+    def Accept(self):
+        server = self.server
+        while True:
+            try:
+                connection, address = server.accept()
+            except (socket.error, OSError):
+                # Closed
+                break
+            connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            subscriber = Subscriber(connection, address, self.maxQueue)
+            with self.lock:
+                if self.server is None:
+                    connection.close()
+                    break
+                self.subscribers = self.subscribers + (subscriber,)
+                self.connected += 1
+            subscriber.Start()
+
+    def Publish(self, record):
+        """Sends an event (a tuple of FIELDS) to every subscriber."""
+        subscribers = self.subscribers
+        if not subscribers:
+            return
+        self.published += 1
+        gone = [x for x in subscribers if not x.Put(record)]
+        if gone:
+            with self.lock:
+                self.subscribers = tuple(
+                    x for x in self.subscribers if x not in gone
+                )
+            for subscriber in gone:
+                if subscriber.overflowed:
+                    self.dropped += 1
+                else:
+                    self.disconnected += 1
+
+    def Close(self):
+        with self.lock:
+            server = self.server
+            self.server = None
+            subscribers = self.subscribers
+            self.subscribers = ()
+        try:
+            # Wakes up accept() (closing alone doesn't everywhere)
+            server.shutdown(socket.SHUT_RDWR)
+        except (socket.error, OSError):
+            pass
+        server.close()
+        for subscriber in subscribers:
+            subscriber.Close()
+        self.thread.join(1.0)
+
+    def Stats(self):
+        subscribers = self.subscribers
+        return {
+            "port": self.port,
+            "subscribers": len(subscribers),
+            "connected": self.connected,
+            "published": self.published,
+            "dropped": self.dropped,
+            "disconnected": self.disconnected,
+            "queued": sum(len(x.queue) for x in subscribers),
+            "failed": sum(x.failed for x in subscribers),
+        }
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
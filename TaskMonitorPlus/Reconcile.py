@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from timeit import default_timer
+
+from .Backend import GetBackend
+
+class Reconciler(object):
+    """
+    Brings the plugin's registries back in line with the desktop, for when
+    shell-hook notifications were missed.
+
+    Each Sweep() takes the list of visible top-level windows (one call) and
+    compares it with the registry and with the list from the sweep before:
+    - tracked windows that are no longer there are handled as if
+      HSHELL_WINDOWDESTROYED had arrived (ClosedWindow, Destroyed)
+    - windows that appeared since the last sweep are checked as if
+      HSHELL_WINDOWCREATED had arrived (NewWindow, Created)
+    - processes left without windows (unless the process monitor tells
+      when processes exit), and flashing/activated state for windows no
+      longer tracked, are dropped
+    Only the windows that changed cost any further Win32 calls. The
+    budget (in seconds) bounds the handling of those: once it's spent, the
+    rest is picked up by the next sweep. Comparing the lists is done in
+    full every time, as a few set operations. While the windows open at
+    start are still being registered, sweeps are skipped.
+    """
+
+    def __init__(self, plugin, budget=0.01):
+        self.plugin = plugin
+        self.budget = budget
+        # The registry was just built (or is being built) from the desktop
+        self.lastLive = set(plugin.hwnds).union(plugin.pendingHwnds)
+        self.sweeps = 0
+        self.closedWindows = 0
+        self.newWindows = 0
+        self.emptyProcesses = 0
+        self.staleFlashing = 0
+        self.overBudget = 0
+        self.lastDuration = 0.0
+
+    def Sweep(self):
+        """
+        Runs one sweep; must be called on the message pump thread. Returns
+        the number of stale entries reclaimed.
+        """
+        plugin = self.plugin
+        if plugin.pendingHwnds:
+            # BuildRegistryProc() isn't done yet, and the windows it hasn't
+            # registered would look new
+            return 0
+        start = default_timer()
+        deadline = start + self.budget
+        live = set(GetBackend().GetTopLevelWindowList(False))
+        hwnds = plugin.hwnds
+        reclaimed = 0
+        finished = True
+
+        for hwnd in set(hwnds).difference(live):
+            if default_timer() > deadline:
+                finished = False
+                break
+            plugin.WindowDestroyedProc(None, None, hwnd, None)
+            self.closedWindows += 1
+            reclaimed += 1
+
+        unchecked = set()
+        for hwnd in live.difference(self.lastLive):
+            if hwnd in hwnds:
+                continue
+            if not finished or default_timer() > deadline:
+                finished = False
+                unchecked.add(hwnd)
+                continue
+            if plugin.CheckWindow(hwnd):
+                self.newWindows += 1
+        # Windows not checked this time count as new again next time
+        self.lastLive = live.difference(unchecked) if unchecked else live
+
+        pids = plugin.pids
+        emptyPids = []
+        if plugin.processMonitor is None:
+            if finished and default_timer() <= deadline:
+                emptyPids = [x for x in pids if not pids[x].hwnds]
+            else:
+                finished = False
+        for pid in emptyPids:
+            with plugin.registryLock:
+                processInfo = pids.pop(pid)
+            plugin.Emit("Destroyed", processInfo)
+            self.emptyProcesses += 1
+            reclaimed += 1
+
+        flashing = plugin.flashing
+        if flashing:
+            stale = len(flashing)
+            flashing.intersection_update(hwnds)
+            stale -= len(flashing)
+            self.staleFlashing += stale
+            reclaimed += stale
+        if plugin.lastActivated is not None and plugin.lastActivated not in hwnds:
+            plugin.focusHistory.Closed(plugin.lastActivated, GetBackend().Now())
+            plugin.lastActivated = None
+
+        self.sweeps += 1
+        if not finished:
+            self.overBudget += 1
+        self.lastDuration = default_timer() - start
+        return reclaimed
+
+    def Stats(self):
+        return {
+            "sweeps": self.sweeps,
+            "closedWindows": self.closedWindows,
+            "newWindows": self.newWindows,
+            "emptyProcesses": self.emptyProcesses,
+            "staleFlashing": self.staleFlashing,
+            "overBudget": self.overBudget,
+            "lastDuration": self.lastDuration,
+        }
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
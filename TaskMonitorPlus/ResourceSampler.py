@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+from timeit import default_timer
+
+from .Backend import GetBackend
+
+# Samples kept per process
+RESOURCE_SAMPLES = 60
+
+# Samples the CPU use is averaged over before it's compared with the
+# threshold
+CPU_SAMPLES = 3
+
+# A process stays HighCPU (or in MemoryGrowth) until it drops below this
+# share of the threshold
+HYSTERESIS = 0.75
+
+HIGH_CPU = 1
+MEMORY_GROWTH = 2
+
+class ResourceSampler(object):
+    """
+    Samples the CPU use, working set and handle count of processes, all of
+    them with one call to the backend (GetProcessResources()), and keeps
+    the last `size` samples of each.
+
+    The samples are kept in one array per measure, `size` entries per
+    process, rather than in objects:
+    - slots: key=pid, val=slot; slot n's samples are entries n*size to
+      (n+1)*size-1 of cpu, workingSet and handles, written round-robin at
+      `position` (the same for every process)
+    - times: when each position was last written
+    Slots of processes no longer sampled, or whose pid has been reused,
+    are reused. CPU use is in percent of all processors since the sample
+    before.
+
+    A process becomes HighCPU when its CPU use over the last CPU_SAMPLES
+    samples reaches cpuThreshold, and MemoryGrowth when its working set has
+    grown by memoryGrowth bytes or more over the samples kept (only once it
+    has `size` of them). Either becomes so again only after dropping below
+    HYSTERESIS times the threshold. A threshold of 0 is never reached.
+    """
+
+    def __init__(self, cpuThreshold, memoryGrowth, size=RESOURCE_SAMPLES, processors=None):
+        if processors is None:
+            import multiprocessing
+            processors = multiprocessing.cpu_count()
+        self.cpuThreshold = cpuThreshold
+        self.memoryGrowth = memoryGrowth
+        self.size = size
+        self.processors = processors
+        self.position = 0
+        self.lastTime = None
+        self.times = array("d", [0.0]) * size
+        self.slots = {}
+        self.freeSlots = []
+        # Per sample
+        self.cpu = array("d")
+        self.workingSet = array("d")
+        self.handles = array("l")
+        # Per slot; counts are of the samples taken, kept or not
+        self.creationTimes = []
+        self.cpuTimes = array("d")
+        self.counts = array("l")
+        self.states = array("B")
+        self.samples = 0
+        self.crossings = 0
+        self.lastDuration = 0.0
+
+    def Sample(self, pids):
+        """
+        Takes a sample of each process in `pids` (any container of pids).
+        Returns a list of (pid, kind) for the processes that just became
+        "HighCPU" or "MemoryGrowth".
+        """
+        start = default_timer()
+        backend = GetBackend()
+        now = backend.Now()
+        resources = backend.GetProcessResources()
+        slots = self.slots
+        for pid in [x for x in slots if x not in pids]:
+            self.freeSlots.append(slots.pop(pid))
+        elapsed = now - self.lastTime if self.lastTime is not None else 0.0
+        scale = 100.0 / (elapsed * 1e7 * self.processors) if elapsed > 0 else 0.0
+        size = self.size
+        position = self.position
+        oldest = (position + 1) % size
+        cpu = self.cpu
+        workingSet = self.workingSet
+        cpuTimes = self.cpuTimes
+        counts = self.counts
+        states = self.states
+        cpuThreshold = self.cpuThreshold
+        memoryGrowth = self.memoryGrowth
+        crossed = []
+        for pid in pids:
+            entry = resources.get(pid, None)
+            if entry is None:
+                continue
+            creationTime, cpuTime, processWorkingSet, handles = entry
+            slot = slots.get(pid, None)
+            if slot is None or self.creationTimes[slot] != creationTime:
+                slot = self.Allocate(pid, creationTime, cpuTime)
+            base = slot * size
+            count = counts[slot] + 1
+            counts[slot] = count
+            cpu[base + position] = (
+                (cpuTime - cpuTimes[slot]) * scale if count > 1 else 0.0
+            )
+            cpuTimes[slot] = cpuTime
+            workingSet[base + position] = processWorkingSet
+            self.handles[base + position] = handles
+            state = states[slot]
+            if cpuThreshold and count > CPU_SAMPLES:
+                used = sum(
+                    cpu[base + (position - i) % size] for i in range(CPU_SAMPLES)
+                ) / CPU_SAMPLES
+                if not state & HIGH_CPU and used >= cpuThreshold:
+                    state |= HIGH_CPU
+                    crossed.append((pid, "HighCPU"))
+                elif state & HIGH_CPU and used < cpuThreshold * HYSTERESIS:
+                    state &= ~HIGH_CPU
+            if memoryGrowth and count >= size:
+                growth = processWorkingSet - workingSet[base + oldest]
+                if not state & MEMORY_GROWTH and growth >= memoryGrowth:
+                    state |= MEMORY_GROWTH
+                    crossed.append((pid, "MemoryGrowth"))
+                elif state & MEMORY_GROWTH and growth < memoryGrowth * HYSTERESIS:
+                    state &= ~MEMORY_GROWTH
+            states[slot] = state
+        self.times[position] = now
+        self.position = oldest
+        self.lastTime = now
+        self.samples += 1
+        self.crossings += len(crossed)
+        self.lastDuration = default_timer() - start
+        return crossed
+
+    def Allocate(self, pid, creationTime, cpuTime):
+        """Gives a process a slot of its own, with no samples yet."""
+        slot = self.slots.pop(pid, None)
+        if slot is None:
+            if self.freeSlots:
+                slot = self.freeSlots.pop()
+            else:
+                slot = len(self.creationTimes)
+                size = self.size
+                self.cpu.extend(array("d", [0.0]) * size)
+                self.workingSet.extend(array("d", [0.0]) * size)
+                self.handles.extend(array("l", [0]) * size)
+                self.creationTimes.append(None)
+                self.cpuTimes.append(0.0)
+                self.counts.append(0)
+                self.states.append(0)
+        self.slots[pid] = slot
+        self.creationTimes[slot] = creationTime
+        self.cpuTimes[slot] = cpuTime
+        self.counts[slot] = 0
+        self.states[slot] = 0
+        return slot
+
+    def History(self, pid):
+        """
+        Returns the samples of a process, oldest first, as a list of (time,
+        CPU percent, working set, handle count); the first sample of a
+        process has no CPU use (None).
+        """
+        slot = self.slots.get(pid, None)
+        if slot is None:
+            return []
+        size = self.size
+        base = slot * size
+        count = self.counts[slot]
+        history = []
+        # Samples of the slot's last process are older than `count`
+        for i in range(min(count, size), 0, -1):
+            index = (self.position - i) % size
+            history.append((
+                self.times[index],
+                self.cpu[base + index] if i < count else None,
+                int(self.workingSet[base + index]),
+                self.handles[base + index],
+            ))
+        return history
+
+    def State(self, pid):
+        """Returns (HighCPU, MemoryGrowth) for a process, as booleans."""
+        slot = self.slots.get(pid, None)
+        state = self.states[slot] if slot is not None else 0
+        return bool(state & HIGH_CPU), bool(state & MEMORY_GROWTH)
+
+    def Stats(self):
+        states = self.states
+        slots = self.slots.values()
+        return {
+            "processes": len(self.slots),
+            "slots": len(self.creationTimes),
+            "samples": self.samples,
+            "highCPU": sum(1 for x in slots if states[x] & HIGH_CPU),
+            "memoryGrowth": sum(1 for x in slots if states[x] & MEMORY_GROWTH),
+            "crossings": self.crossings,
+            "lastDuration": self.lastDuration,
+        }
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
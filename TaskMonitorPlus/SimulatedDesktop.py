@@ -0,0 +1,573 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import time
+from collections import deque
+
+from .Backend import Backend
+from .Constants import (
+    CHILDID_SELF, EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE,
+    EVENT_OBJECT_LOCATIONCHANGE, EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_SHOW,
+    EVENT_SYSTEM_FOREGROUND, EVENT_SYSTEM_MINIMIZEEND,
+    EVENT_SYSTEM_MINIMIZESTART, GA_PARENT, GA_ROOTOWNER, GW_CHILD,
+    GWL_HWNDPARENT, OBJID_WINDOW,
+    HSHELL_FLASH, HSHELL_REDRAW, HSHELL_WINDOWACTIVATED,
+    HSHELL_WINDOWCREATED, HSHELL_WINDOWDESTROYED, SW_FORCEMINIMIZE, SW_HIDE,
+    SW_MAXIMIZE, SW_MINIMIZE, SW_RESTORE, SW_SHOWMAXIMIZED, SW_SHOWMINIMIZED,
+    SW_SHOWMINNOACTIVE, SW_SHOWNORMAL, SWP_NOMOVE, SWP_NOSIZE, WM_CLOSE,
+    WM_DESTROY,
+)
+
+class SimulatedWindow(object):
+    """
+    One window on a SimulatedDesktop.
+    """
+    __slots__ = (
+        "hwnd", "pid", "title", "window_class", "visible", "enabled",
+        "owner", "parent", "rect", "minimized", "maximized", "hung",
+    )
+
+    def __init__(self, hwnd, pid, title, window_class, visible, owner, parent):
+        self.hwnd = hwnd
+        self.pid = pid
+        self.title = title
+        self.window_class = window_class
+        self.visible = visible
+        self.enabled = True
+        self.owner = owner
+        self.parent = parent
+        self.rect = (0, 0, 640, 480)
+        self.minimized = False
+        self.maximized = False
+        self.hung = False
+
+
+class SimulatedDesktop(Backend):
+    """
+    A pure-Python desktop implementing the Backend interface, for profiling
+    and load-testing the plugin off a live Windows session.
+
+    Windows and processes are created and changed through the methods
+    below. Time only moves when Advance() is called. If messageSink is set
+    to a callable taking (hwnd, mesg, wParam, lParam), the desktop delivers
+    shell-hook messages to every window registered with
+    RegisterShellHookWindow(), the way Windows does. WinEvent hooks
+    (StartWinEventHooks()) are called as windows are created, shown,
+    hidden, destroyed, renamed, moved, minimized and restored or brought to
+    the foreground; NotifyWinEvent() raises any other. Messages posted to a
+    hwnd that isn't a simulated window (such as eg.messageReceiver's) are
+    queued until PumpMessages(). Reading the title of a hung window (see
+    SetWindowHung()) really blocks the caller, for hangTime seconds of
+    wall-clock time.
+    """
+
+    FIRST_HWND = 0x10010
+    FIRST_PID = 1000
+
+    def __init__(self, withShell=True):
+        self.windows = {}       # key=hwnd, val=SimulatedWindow
+        self.processes = {}     # key=pid, val=executable name
+        self.creationTimes = {} # key=pid, val=creation "time" (a counter)
+        # key=pid, val=[CPU time (100 ns units), working set, handles]
+        self.resources = {}
+        self.processesCreated = 0
+        self.activeWindow = 0
+        self.focusWindow = 0
+        self.messageSink = None
+        self.postedMessages = deque()
+        self.shellHookWindows = set()
+        self.windowMessages = {}
+        self.winEventHooks = {} # key=handle, val=(ranges, callback)
+        self.nextHook = 1
+        self.nextHwnd = self.FIRST_HWND
+        self.nextPid = self.FIRST_PID
+        self.ourPid = self.CreateProcess("EventGhost.exe")
+        self.clock = 0.0
+        self.hangTime = 0.05
+        self.shellWindow = 0
+        # Batches started with BeginDeferWindowPos(); key=handle, val=moves
+        self.deferred = {}
+        self.nextHdwp = 1
+        # Times windows were moved or resized on screen (each SetWindowPos(),
+        # each EndDeferWindowPos())
+        self.layoutPasses = 0
+        if withShell:
+            explorer = self.CreateProcess("explorer.exe")
+            self.shellWindow = self.CreateWindow(
+                explorer, "Program Manager", "Progman", notify=False
+            )
+            self.CreateWindow(explorer, "", "Shell_TrayWnd", notify=False)
+
+    # Driving the simulation
+
+    def Advance(self, seconds):
+        self.clock += seconds
+
+    def CreateProcess(self, name, pid=None):
+        """
+        Starts a process. Pass the pid of a process that has exited to
+        simulate pid reuse.
+        """
+        if pid is None:
+            pid = self.nextPid
+            self.nextPid += 4
+        elif pid in self.processes:
+            raise ValueError("pid %d is in use" % pid)
+        self.processesCreated += 1
+        self.processes[pid] = name
+        self.creationTimes[pid] = self.processesCreated
+        return pid
+
+    def ExitProcess(self, pid):
+        for hwnd in [x for x in self.windows if self.windows[x].pid == pid]:
+            self.DestroyWindow(hwnd)
+        self.processes.pop(pid, None)
+        self.creationTimes.pop(pid, None)
+        self.resources.pop(pid, None)
+
+    def SetProcessResources(self, pid, cpuTime=None, workingSet=None, handles=None):
+        """
+        Sets what a process uses so far: its CPU time in seconds, its working
+        set in bytes and its handle count. What isn't given stays as it was.
+        """
+        resources = self.resources.setdefault(pid, [0, 0, 0])
+        if cpuTime is not None:
+            resources[0] = int(cpuTime * 10000000)
+        if workingSet is not None:
+            resources[1] = workingSet
+        if handles is not None:
+            resources[2] = handles
+
+    def CreateWindow(
+        self,
+        pid,
+        title="",
+        window_class="Window",
+        visible=True,
+        owner=0,
+        parent=0,
+        notify=True
+    ):
+        hwnd = self.nextHwnd
+        self.nextHwnd += 2
+        self.windows[hwnd] = SimulatedWindow(
+            hwnd, pid, title, window_class, visible, owner, parent
+        )
+        if notify and visible:
+            self.NotifyWinEvent(EVENT_OBJECT_SHOW, hwnd)
+        if notify and visible and not owner and not parent:
+            self.NotifyShellHook(HSHELL_WINDOWCREATED, hwnd)
+        return hwnd
+
+    def DestroyWindow(self, hwnd):
+        window = self.windows.pop(hwnd, None)
+        if window is None:
+            return
+        for child in [x for x in self.windows if self.windows[x].parent == hwnd]:
+            self.DestroyWindow(child)
+        if hwnd == self.activeWindow:
+            self.activeWindow = 0
+        if hwnd == self.focusWindow:
+            self.focusWindow = 0
+        if window.visible:
+            self.NotifyWinEvent(EVENT_OBJECT_HIDE, hwnd)
+        self.NotifyWinEvent(EVENT_OBJECT_DESTROY, hwnd)
+        if not window.parent:
+            self.NotifyShellHook(HSHELL_WINDOWDESTROYED, hwnd)
+
+    def SetWindowText(self, hwnd, title):
+        window = self.windows.get(hwnd)
+        if window is not None:
+            window.title = title
+            self.NotifyWinEvent(EVENT_OBJECT_NAMECHANGE, hwnd)
+            if not window.parent:
+                self.NotifyShellHook(HSHELL_REDRAW, hwnd)
+
+    def SetWindowHung(self, hwnd, hung=True):
+        self.windows[hwnd].hung = hung
+
+    def SetForegroundWindow(self, hwnd):
+        if hwnd in self.windows:
+            self.activeWindow = self.focusWindow = hwnd
+            self.NotifyWinEvent(EVENT_SYSTEM_FOREGROUND, hwnd)
+            self.NotifyShellHook(HSHELL_WINDOWACTIVATED, hwnd)
+
+    def PutWindow(
+        self, hwnd, pid, exe, title, window_class, visible=True, owner=0,
+        parent=0
+    ):
+        """
+        Makes the window `hwnd` exist with the given attributes, without
+        sending any notification; for rebuilding a recorded desktop. If pid
+        isn't running `exe`, it's (re)started.
+        """
+        if self.processes.get(pid, None) != exe:
+            self.processes.pop(pid, None)
+            self.CreateProcess(exe, pid)
+        if parent and parent not in self.windows:
+            # Stand-in for a top-level window nothing was recorded about
+            self.windows[parent] = SimulatedWindow(
+                parent, pid, "", "", False, 0, 0
+            )
+        window = self.windows.get(hwnd, None)
+        if window is None or window.pid != pid:
+            window = self.windows[hwnd] = SimulatedWindow(
+                hwnd, pid, title, window_class, visible, owner, parent
+            )
+        else:
+            window.title = title
+            window.window_class = window_class
+            window.visible = visible
+            window.owner = owner
+            window.parent = parent
+        self.nextHwnd = max(self.nextHwnd, hwnd + 2)
+        self.nextPid = max(self.nextPid, pid + 4)
+
+    def RemoveWindow(self, hwnd):
+        """Like DestroyWindow(), without sending any notification."""
+        self.windows.pop(hwnd, None)
+        if hwnd == self.activeWindow:
+            self.activeWindow = 0
+        if hwnd == self.focusWindow:
+            self.focusWindow = 0
+
+    def NotifyShellHook(self, wParam, lParam):
+        if self.messageSink is None:
+            return
+        for hwnd in list(self.shellHookWindows):
+            mesg = self.RegisterWindowMessage("SHELLHOOK")
+            self.messageSink(hwnd, mesg, wParam, lParam)
+
+    def NotifyWinEvent(
+        self, event, hwnd, idObject=OBJID_WINDOW, idChild=CHILDID_SELF
+    ):
+        for ranges, callback in list(self.winEventHooks.values()):
+            for eventMin, eventMax in ranges:
+                if eventMin <= event <= eventMax:
+                    callback(event, hwnd, idObject, idChild)
+                    break
+
+    def PumpMessages(self):
+        """
+        Delivers the queued posted messages to messageSink. Returns how
+        many were delivered.
+        """
+        count = 0
+        postedMessages = self.postedMessages
+        while postedMessages:
+            message = postedMessages.popleft()
+            if self.messageSink is not None:
+                self.messageSink(*message)
+            count += 1
+        return count
+
+    # Backend interface
+
+    def Now(self):
+        return self.clock
+
+    def GetTopLevelWindowList(self, includeInvisible):
+        return [
+            hwnd for hwnd, window in self.windows.items()
+            if not window.parent and (includeInvisible or window.visible)
+        ]
+
+    def GetShellWindow(self):
+        return self.shellWindow
+
+    def FindWindow(self, className, windowName=None):
+        for hwnd, window in self.windows.items():
+            if window.parent:
+                continue
+            if className is not None and window.window_class != className:
+                continue
+            if windowName is not None and window.title != windowName:
+                continue
+            return hwnd
+        return 0
+
+    def IsWindow(self, hwnd):
+        return hwnd in self.windows
+
+    def IsWindowVisible(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window is not None and window.visible
+
+    def IsWindowEnabled(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window is not None and window.enabled
+
+    def GetAncestor(self, hwnd, flags):
+        window = self.windows.get(hwnd)
+        if window is None:
+            return 0
+        if flags == GA_PARENT:
+            return window.parent
+        while window.parent and window.parent in self.windows:
+            window = self.windows[window.parent]
+        if flags == GA_ROOTOWNER:
+            while window.owner and window.owner in self.windows:
+                window = self.windows[window.owner]
+        return window.hwnd
+
+    def GetParent(self, hwnd):
+        window = self.windows.get(hwnd)
+        if window is None:
+            return 0
+        return window.parent or window.owner
+
+    def GetWindow(self, hwnd, cmd):
+        if cmd == GW_CHILD:
+            for child, window in self.windows.items():
+                if window.parent == hwnd:
+                    return child
+        return 0
+
+    def GetWindowLong(self, hwnd, index):
+        window = self.windows.get(hwnd)
+        if window is None or index != GWL_HWNDPARENT:
+            return 0
+        return window.owner
+
+    def GetWindowPid(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window.pid if window is not None else 0
+
+    def GetWindowText(self, hwnd):
+        window = self.windows.get(hwnd)
+        if window is None:
+            return ""
+        if window.hung:
+            time.sleep(self.hangTime)
+        return window.title
+
+    def GetWindowTextTimeout(self, hwnd, timeout):
+        window = self.windows.get(hwnd)
+        if window is None:
+            return ""
+        if window.hung:
+            return None
+        return window.title
+
+    def IsHungAppWindow(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window is not None and window.hung
+
+    def GetClassName(self, hwnd):
+        window = self.windows.get(hwnd)
+        return window.window_class if window is not None else ""
+
+    def GetActiveWindow(self):
+        return self.activeWindow
+
+    def GetFocus(self):
+        return self.focusWindow
+
+    def GetWindowRect(self, hwnd):
+        return self.windows[hwnd].rect
+
+    def GetClientRect(self, hwnd):
+        left, top, right, bottom = self.windows[hwnd].rect
+        return 0, 0, right - left, bottom - top
+
+    def GetWindowPlacement(self, hwnd):
+        window = self.windows[hwnd]
+        if window.minimized:
+            showCmd = SW_SHOWMINIMIZED
+        elif window.maximized:
+            showCmd = SW_SHOWMAXIMIZED
+        else:
+            showCmd = SW_SHOWNORMAL
+        return 0, showCmd, (-1, -1), (-1, -1), window.rect
+
+    def GetProcessName(self, pid):
+        return self.processes.get(pid, "")
+
+    def GetProcessCreationTime(self, pid):
+        return self.creationTimes.get(pid, 0)
+
+    def GetCurrentProcessId(self):
+        return self.ourPid
+
+    def GetProcessTable(self):
+        creationTimes = self.creationTimes
+        return dict(
+            ((pid, creationTimes[pid]), name)
+            for pid, name in self.processes.items()
+        )
+
+    def GetProcessResources(self):
+        creationTimes = self.creationTimes
+        resources = self.resources
+        unused = (0, 0, 0)
+        return dict(
+            (pid, (creationTimes[pid],) + tuple(resources.get(pid, unused)))
+            for pid in self.processes
+        )
+
+    def WaitForInputIdle(self, pid, timeout):
+        for window in self.windows.values():
+            if window.pid == pid and window.hung:
+                time.sleep(min(timeout, self.hangTime))
+                return False
+        return True
+
+    def AnimateWindow(self, hwnd, duration, flags):
+        return True
+
+    def FlashWindowEx(self, hwnd, flags, count, timeout):
+        if hwnd in self.windows and flags:
+            self.NotifyShellHook(HSHELL_FLASH, hwnd)
+        return True
+
+    def BringWindowToTop(self, hwnd):
+        pass
+
+    def EnableWindow(self, hwnd, enable):
+        window = self.windows.get(hwnd)
+        if window is not None:
+            window.enabled = bool(enable)
+
+    def ShowWindow(self, hwnd, cmdShow):
+        window = self.windows.get(hwnd)
+        if window is None:
+            return False
+        wasVisible = window.visible
+        wasMinimized = window.minimized
+        wasMaximized = window.maximized
+        window.visible = cmdShow != SW_HIDE
+        window.minimized = cmdShow in (
+            SW_MINIMIZE, SW_SHOWMINIMIZED, SW_SHOWMINNOACTIVE, SW_FORCEMINIMIZE
+        )
+        window.maximized = cmdShow == SW_MAXIMIZE
+        if cmdShow == SW_RESTORE:
+            window.minimized = window.maximized = False
+        if window.visible != wasVisible:
+            self.NotifyWinEvent(
+                EVENT_OBJECT_SHOW if window.visible else EVENT_OBJECT_HIDE, hwnd
+            )
+        if window.minimized != wasMinimized:
+            self.NotifyWinEvent(
+                EVENT_SYSTEM_MINIMIZESTART if window.minimized
+                else EVENT_SYSTEM_MINIMIZEEND,
+                hwnd
+            )
+        if window.maximized != wasMaximized:
+            self.NotifyWinEvent(EVENT_OBJECT_LOCATIONCHANGE, hwnd)
+        return wasVisible
+
+    def SetWindowPos(self, hwnd, hwndInsertAfter, x, y, cx, cy, flags):
+        window = self.windows.get(hwnd)
+        if window is None:
+            return False
+        self.layoutPasses += 1
+        self.PlaceWindow(window, x, y, cx, cy, flags)
+        self.NotifyWinEvent(EVENT_OBJECT_LOCATIONCHANGE, hwnd)
+        return True
+
+    def BeginDeferWindowPos(self, numWindows):
+        hdwp = self.nextHdwp
+        self.nextHdwp += 1
+        self.deferred[hdwp] = []
+        return hdwp
+
+    def DeferWindowPos(self, hdwp, hwnd, hwndInsertAfter, x, y, cx, cy, flags):
+        moves = self.deferred.get(hdwp)
+        if moves is None:
+            return 0
+        if hwnd not in self.windows:
+            del self.deferred[hdwp]
+            return 0
+        moves.append((hwnd, x, y, cx, cy, flags))
+        return hdwp
+
+    def EndDeferWindowPos(self, hdwp):
+        moves = self.deferred.pop(hdwp, None)
+        if moves is None:
+            return False
+        windows = self.windows
+        for hwnd, x, y, cx, cy, flags in moves:
+            window = windows.get(hwnd)
+            if window is not None:
+                self.PlaceWindow(window, x, y, cx, cy, flags)
+        self.layoutPasses += 1
+        for move in moves:
+            self.NotifyWinEvent(EVENT_OBJECT_LOCATIONCHANGE, move[0])
+        return True
+
+    @staticmethod
+    def PlaceWindow(window, x, y, cx, cy, flags):
+        left, top, right, bottom = window.rect
+        if flags & SWP_NOMOVE:
+            x, y = left, top
+        if flags & SWP_NOSIZE:
+            cx, cy = right - left, bottom - top
+        window.rect = (x, y, x + cx, y + cy)
+
+    def SetFocus(self, hwnd):
+        previous = self.focusWindow
+        if hwnd in self.windows:
+            self.focusWindow = hwnd
+        return previous
+
+    def SendMessage(self, hwnd, message, wparam, lparam):
+        if message in (WM_CLOSE, WM_DESTROY):
+            self.DestroyWindow(hwnd)
+        return 0
+
+    def PostMessage(self, hwnd, message, wparam, lparam):
+        if hwnd not in self.windows:
+            self.postedMessages.append((hwnd, message, wparam, lparam))
+            return True
+        self.SendMessage(hwnd, message, wparam, lparam)
+        return True
+
+    def RegisterWindowMessage(self, name):
+        return self.windowMessages.setdefault(
+            name, 0xC000 + len(self.windowMessages)
+        )
+
+    def RegisterShellHookWindow(self, hwnd):
+        self.shellHookWindows.add(hwnd)
+        return True
+
+    def DeregisterShellHookWindow(self, hwnd):
+        self.shellHookWindows.discard(hwnd)
+        return True
+
+    def StartWinEventHooks(self, ranges, callback):
+        hooks = self.nextHook
+        self.nextHook += 1
+        self.winEventHooks[hooks] = (tuple(ranges), callback)
+        return hooks
+
+    def StopWinEventHooks(self, hooks):
+        self.winEventHooks.pop(hooks, None)
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
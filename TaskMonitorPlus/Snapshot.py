@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+from array import array
+
+from .Backend import GetBackend
+from .Constants import GWL_HWNDPARENT
+
+class DesktopSnapshot(object):
+    """
+    The top-level windows of the desktop at one point in time, gathered in
+    a single pass into parallel arrays:
+    - hwnds: window handles
+    - pids: PID of the process owning each window
+    - visible: 1 if the window is visible, else 0
+    - owners: handle of the owner window, or 0
+
+    Nothing else (title, class, process name) is looked up. Unless
+    includeInvisible is given to Take(), only visible windows are gathered,
+    which saves an IsWindowVisible() call per window.
+
+    Take() can also be given the windows to gather (hwnds), for the plugin
+    to register the windows open at start a few at a time; they're taken
+    as visible, as when they were listed, unless includeInvisible is given.
+    """
+    __slots__ = ("hwnds", "pids", "visible", "owners")
+
+    def __init__(self):
+        self.hwnds = array("L")
+        self.pids = array("L")
+        self.visible = array("B")
+        self.owners = array("L")
+
+    @classmethod
+    def Take(cls, backend=None, includeInvisible=False, hwnds=None):
+        if backend is None:
+            backend = GetBackend()
+        if hwnds is None:
+            hwnds = backend.GetTopLevelWindowList(includeInvisible)
+        snapshot = cls()
+        appendHwnd = snapshot.hwnds.append
+        appendPid = snapshot.pids.append
+        appendVisible = snapshot.visible.append
+        appendOwner = snapshot.owners.append
+        GetWindowPid = backend.GetWindowPid
+        IsWindowVisible = backend.IsWindowVisible
+        GetWindowLong = backend.GetWindowLong
+        for hwnd in hwnds:
+            appendHwnd(hwnd)
+            appendPid(GetWindowPid(hwnd))
+            if includeInvisible:
+                appendVisible(1 if IsWindowVisible(hwnd) else 0)
+            else:
+                appendVisible(1)
+            appendOwner(GetWindowLong(hwnd, GWL_HWNDPARENT))
+        return snapshot
+
+    def __len__(self):
+        return len(self.hwnds)
+
+    def __iter__(self):
+        """Yields (hwnd, pid, visible, owner) for every window."""
+        return zip(self.hwnds, self.pids, self.visible, self.owners)
+
+    def TaskWindows(self):
+        """
+        Yields (hwnd, pid) for the visible, unowned windows: the same ones
+        TaskMonitorPlus.CheckWindow() accepts.
+        """
+        for hwnd, pid, visible, owner in zip(
+            self.hwnds, self.pids, self.visible, self.owners
+        ):
+            if visible and not owner:
+                yield hwnd, pid
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,184 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import threading
+from os.path import splitext
+
+import eg
+
+# What can be waited for: a window's title matching, a window closing (or
+# the last window of an executable), a window being activated
+WAIT_KINDS = ("title", "close", "activation")
+
+def ExeKey(exe):
+    """Executable names are compared lowercase and without extension."""
+    if exe is None:
+        return None
+    return splitext(exe)[0].lower()
+
+
+class Waiter(object):
+    """
+    One wait, as returned by the plugin's WaitFor...() methods when they
+    don't block. Like a future: Wait() blocks until it's resolved (or for
+    `timeout` seconds), `done` tells whether it is, `result` is the
+    WindowInfo of the window that satisfied it (None if there's none to
+    give), `timedOut` whether it gave up instead. Cancel() stops waiting.
+    """
+
+    def __init__(self, kind, hwnd=None, exe=None, predicate=None, callback=None):
+        self.kind = kind
+        self.hwnd = hwnd
+        self.exe = ExeKey(exe)
+        self.predicate = predicate
+        self.callback = callback
+        self.result = None
+        self.timedOut = False
+        self.registry = None
+        self.timeoutTask = None
+        self.event = threading.Event()
+
+    @property
+    def done(self):
+        return self.event.is_set()
+
+    def Wait(self, timeout=None):
+        """Returns whether the waiter was resolved (timed out included)."""
+        return self.event.wait(timeout)
+
+    def Cancel(self):
+        if self.registry is not None:
+            self.registry.Expire(self)
+
+
+class WaiterRegistry(object):
+    """
+    The waits in progress, for the plugin's handlers to resolve as they
+    see the changes waited for:
+    - byHwnd: key=(kind, hwnd), val=list of Waiters
+    - byExe: key=(kind, executable name as by ExeKey()), val=list of Waiters
+    Waiters are added from any thread and resolved on the message pump,
+    so both are under a lock. With nothing waiting, Notify() is one
+    attribute test.
+    """
+
+    def __init__(self, cancelCall):
+        self.cancelCall = cancelCall
+        self.lock = threading.Lock()
+        self.byHwnd = {}
+        self.byExe = {}
+        self.count = 0
+        self.added = 0
+        self.resolved = 0
+        self.timedOut = 0
+
+    def Add(self, waiter):
+        with self.lock:
+            if waiter.hwnd is not None:
+                index, key = self.byHwnd, (waiter.kind, waiter.hwnd)
+            else:
+                index, key = self.byExe, (waiter.kind, waiter.exe)
+            index.setdefault(key, []).append(waiter)
+            waiter.registry = self
+            self.count += 1
+            self.added += 1
+
+    def Wants(self, kind, hwnd=None, exe=None):
+        """Whether any waiter is waiting for this kind of change to hwnd or exe."""
+        return self.count and (
+            (kind, hwnd) in self.byHwnd or (kind, ExeKey(exe)) in self.byExe
+        )
+
+    def Notify(self, kind, hwnd, exe, windowInfo):
+        """
+        Resolves the waiters of this kind for hwnd or exe whose predicate
+        (if any) is true of windowInfo.
+        """
+        if not self.count:
+            return
+        with self.lock:
+            waiters = self.byHwnd.get((kind, hwnd), [])
+            if exe is not None:
+                waiters = waiters + self.byExe.get((kind, ExeKey(exe)), [])
+        for waiter in waiters:
+            if waiter.predicate is None or waiter.predicate(windowInfo):
+                self.Resolve(waiter, windowInfo)
+
+    def Resolve(self, waiter, result, timedOut=False):
+        """Returns False if the waiter had already been resolved."""
+        with self.lock:
+            if waiter.registry is not self:
+                return False
+            waiter.registry = None
+            if waiter.hwnd is not None:
+                index, key = self.byHwnd, (waiter.kind, waiter.hwnd)
+            else:
+                index, key = self.byExe, (waiter.kind, waiter.exe)
+            waiters = index[key]
+            waiters.remove(waiter)
+            if not waiters:
+                del index[key]
+            self.count -= 1
+            if timedOut:
+                self.timedOut += 1
+            else:
+                self.resolved += 1
+        waiter.result = result
+        waiter.timedOut = timedOut
+        if waiter.timeoutTask is not None:
+            self.cancelCall(waiter.timeoutTask)
+            waiter.timeoutTask = None
+        waiter.event.set()
+        if waiter.callback is not None:
+            try:
+                waiter.callback(waiter)
+            except Exception:
+                eg.PrintTraceback()
+        return True
+
+    def Expire(self, waiter):
+        return self.Resolve(waiter, None, timedOut=True)
+
+    def Clear(self):
+        """Gives up on every waiter."""
+        with self.lock:
+            waiters = [x for y in self.byHwnd.values() for x in y]
+            waiters.extend(x for y in self.byExe.values() for x in y)
+        for waiter in waiters:
+            self.Expire(waiter)
+
+    def Stats(self):
+        return {
+            "waiting": self.count,
+            "added": self.added,
+            "resolved": self.resolved,
+            "timedOut": self.timedOut,
+        }
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
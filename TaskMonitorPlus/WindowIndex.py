@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+import re
+from fnmatch import fnmatchcase, translate
+
+_words = re.compile(r"\w+", re.UNICODE)
+
+def TitleWords(title):
+    """Returns the set of (lowercase) words in a title."""
+    return frozenset(_words.findall(title.lower())) if title else frozenset()
+
+
+def _IsGlob(pattern):
+    return any(x in pattern for x in "*?[")
+
+
+class WindowIndex(object):
+    """
+    Secondary indexes over the windows the plugin tracks, so that questions
+    like "is there an Outlook window of class rctrl_renwnd32 with 'Message'
+    in its title" are answered from memory:
+    - byExe: key=executable name (lowercase), val=set of hwnds
+    - byClass: key=window class (lowercase), val=set of hwnds
+    - byWord: key=word in the title (lowercase), val=set of hwnds
+    The plugin keeps them up to date as windows come and go, processes get
+    their names and titles change. Titles are as the plugin last saw them.
+
+    The index is only given what's already known about a window, so that
+    keeping it up to date never waits on the window. A window whose class
+    or title hasn't been read yet (None) is listed in `unknown` until it's
+    added again with both; whoever queries the index reads those first.
+    """
+
+    def __init__(self):
+        self.byExe = {}
+        self.byClass = {}
+        self.byWord = {}
+        self.entries = {}   # key=hwnd, val=(exe, class, words)
+        self.unknown = set()
+        self.queries = 0
+
+    def Add(self, hwnd, exe, windowClass, title):
+        if hwnd in self.entries:
+            self.Remove(hwnd)
+        if windowClass is None or title is None:
+            self.unknown.add(hwnd)
+        exe = (exe or "").lower()
+        windowClass = (windowClass or "").lower()
+        words = TitleWords(title)
+        self.entries[hwnd] = (exe, windowClass, words)
+        self.byExe.setdefault(exe, set()).add(hwnd)
+        self.byClass.setdefault(windowClass, set()).add(hwnd)
+        byWord = self.byWord
+        for word in words:
+            byWord.setdefault(word, set()).add(hwnd)
+
+    def Remove(self, hwnd):
+        entry = self.entries.pop(hwnd, None)
+        if entry is None:
+            return
+        self.unknown.discard(hwnd)
+        exe, windowClass, words = entry
+        _Discard(self.byExe, exe, hwnd)
+        _Discard(self.byClass, windowClass, hwnd)
+        for word in words:
+            _Discard(self.byWord, word, hwnd)
+
+    def Retitle(self, hwnd, title):
+        entry = self.entries.get(hwnd, None)
+        if entry is None:
+            return
+        exe, windowClass, words = entry
+        newWords = TitleWords(title)
+        if newWords == words:
+            return
+        byWord = self.byWord
+        for word in words.difference(newWords):
+            _Discard(byWord, word, hwnd)
+        for word in newWords.difference(words):
+            byWord.setdefault(word, set()).add(hwnd)
+        self.entries[hwnd] = (exe, windowClass, newWords)
+
+    def Rename(self, hwnd, exe):
+        entry = self.entries.get(hwnd, None)
+        if entry is None:
+            return
+        exe = (exe or "").lower()
+        _Discard(self.byExe, entry[0], hwnd)
+        self.byExe.setdefault(exe, set()).add(hwnd)
+        self.entries[hwnd] = (exe,) + entry[1:]
+
+    def Find(self, exe=None, windowClass=None, words=None):
+        """
+        Returns the set of hwnds matching all of the criteria given: exe
+        and windowClass are names or glob patterns (case-insensitive, as
+        in event filter rules), words a string whose every word must
+        appear in the title. With no criteria, every window matches.
+        """
+        self.queries += 1
+        candidates = None
+        if exe is not None:
+            candidates = _Lookup(self.byExe, exe.lower())
+        if windowClass is not None and (candidates is None or candidates):
+            found = _Lookup(self.byClass, windowClass.lower())
+            candidates = found if candidates is None else candidates & found
+        if words is not None:
+            for word in TitleWords(words):
+                if candidates is not None and not candidates:
+                    break
+                found = self.byWord.get(word, ())
+                candidates = (
+                    set(found) if candidates is None else candidates.intersection(found)
+                )
+        if candidates is None:
+            candidates = set(self.entries)
+        return candidates
+
+    def Stats(self):
+        return {
+            "windows": len(self.entries),
+            "exes": len(self.byExe),
+            "classes": len(self.byClass),
+            "words": len(self.byWord),
+            "unknown": len(self.unknown),
+            "queries": self.queries,
+        }
+
+
+def _Discard(index, key, hwnd):
+    hwnds = index.get(key, None)
+    if hwnds is not None:
+        hwnds.discard(hwnd)
+        if not hwnds:
+            del index[key]
+
+
+def _Lookup(index, pattern):
+    if not _IsGlob(pattern):
+        return set(index.get(pattern, ()))
+    found = set()
+    for key, hwnds in index.items():
+        if fnmatchcase(key, pattern):
+            found.update(hwnds)
+    return found
+
+
+def TitleMatcher(title, match="glob"):
+    """
+    Returns a function telling whether a window title matches `title`:
+    - exact: the same string
+    - glob: a glob pattern, case-insensitive
+    - regex: a regular expression found anywhere in the title
+    """
+    if match == "exact":
+        return lambda x: x == title
+    if match == "glob":
+        return re.compile(translate(title), re.IGNORECASE | re.DOTALL).match
+    if match == "regex":
+        return re.compile(title).search
+    raise ValueError("unknown match mode: %r" % (match,))
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
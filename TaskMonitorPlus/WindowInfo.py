@@ -16,23 +16,112 @@
 # You should have received a copy of the GNU General Public License along
 # with EventGhost. If not, see <http://www.gnu.org/licenses/>.
 
-from os.path import splitext
-import win32gui
-import win32con
-from wx import GetProcessId
+import sys
+import threading
+from collections import namedtuple
+from itertools import count
 
 import eg
-from eg.WinApi import GetClassName, GetWindowText
-from eg.WinApi.Utils import GetProcessName
-from eg.WinApi.Dynamic import (
-    byref, DWORD, GetWindowThreadProcessId, IsWindowVisible,
-)
+
+from . import Constants as win32con
+from .Backend import GetBackend
+from .Keystrokes import keystrokeQueue
+from .ProcessCache import GetProcessName, InternName
 
 # used for getting our own window name, since some people experience a freeze
 # otherwise:
 # http://www.eventghost.net/forum/viewtopic.php?f=9&t=9804&p=48065#p48062
 ourName = '['+eg.APP_NAME+']'
 
+# Numbers title reads, so that when several are in flight for a window the
+# result of the latest one is kept, whichever finishes last
+_fetches = count(1)
+
+class AttributeCacheStats(object):
+    """
+    Counters for the WindowInfo title/class cache. Without the cache every
+    read of title or window_class cost two Win32 calls (IsWindow() and then
+    GetWindowText() or GetClassName()).
+
+    Titles are also read on worker threads, so the counters are only
+    changed with `lock` held.
+    """
+    __slots__ = (
+        "titleHits", "titleMisses", "classHits", "classMisses", "win32Calls",
+        "timeouts", "lock",
+    )
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.Reset()
+
+    def Reset(self):
+        with self.lock:
+            self.titleHits = 0
+            self.titleMisses = 0
+            self.classHits = 0
+            self.classMisses = 0
+            self.win32Calls = 0
+            self.timeouts = 0
+
+    def Stats(self):
+        with self.lock:
+            lookups = (
+                self.titleHits + self.titleMisses + self.classHits +
+                self.classMisses
+            )
+            return {
+                "titleHits": self.titleHits,
+                "titleMisses": self.titleMisses,
+                "classHits": self.classHits,
+                "classMisses": self.classMisses,
+                "win32Calls": self.win32Calls,
+                "win32CallsAvoided": 2 * lookups - self.win32Calls,
+                "timeouts": self.timeouts,
+            }
+
+# What WindowInfo.GetGeometry() returns: the window rect as x, y, width
+# and height, the size of the client area, and the window's state
+Geometry = namedtuple("Geometry", (
+    "x", "y", "width", "height", "client_width", "client_height",
+    "minimized", "maximized", "visible",
+))
+
+
+def _Wx():
+    """
+    Returns the wx module if it has been imported, else None. wx is only
+    imported when a method returning a wx object is called; an argument
+    can only be a wx object if the caller imported it.
+    """
+    return sys.modules.get("wx", None)
+
+
+def RectTuple(args):
+    """
+    Returns the (x, y, width, height) described by the arguments of
+    WindowInfo.SetRect().
+    """
+    wx = _Wx()
+    if len(args) == 1:
+        args = args[0]
+
+    if wx and isinstance(args, wx.Rect):
+        args = args.Get()
+
+    elif len(args) == 2:
+        pos = args[0]
+        size = args[1]
+        if wx and isinstance(pos, wx.Point):
+            pos = pos.Get()
+        if wx and isinstance(size, wx.Size):
+            size = size.Get()
+
+        args = tuple(pos) + tuple(size)
+
+    return tuple(args)
+
+
 class WindowInfo(object):
     """
     Class representing an individual window. Interesting attributes:
@@ -41,36 +130,211 @@ class WindowInfo(object):
     - name: executable name of process that owns this window
     - title: window's title (updated dynamically if possible)
     - window_class: window's class name (updated dynamically if possible)
+    - dwell_time: how many seconds the window had the focus for, the last
+      time it lost it (as reported in Deactivated events); None until then
+
+    The class name never changes, so it's only fetched once. For windows
+    tracked by the plugin, the title is cached until the plugin sees it
+    change (InvalidateTitle()), the window is destroyed, or titleMaxAge
+    seconds have passed (if set). Other windows fetch the title on every
+    read. Refresh() re-reads both.
     """
 
+    __slots__ = (
+        "hwnd", "pid", "name", "cached_title", "cached_class",
+        "titleTime", "tracked", "dead", "dwell_time", "cached_geometry",
+        "geometryTime", "titleFetch",
+    )
+
+    # Seconds a cached title stays valid without a change notification;
+    # None means until the next notification
+    titleMaxAge = None
+    # Seconds to wait for a window to return its title; None waits as long
+    # as it takes
+    titleTimeout = None
+    # Seconds GetGeometry() results are cached for; None means not at all
+    geometryMaxAge = None
+    # Seconds SendKeystrokes() waits for the window's process to be ready
+    # for input
+    keystrokeTimeout = 1.0
+    cacheStats = AttributeCacheStats()
+
     class DeadWindow(AssertionError): pass
     class NoParent(ValueError): pass
 
-    def __init__(self, hwnd):
+    def __init__(self, hwnd, pid=None, name=None, tracked=False):
+        """
+        pid and name can be given when the caller already knows them, to
+        save looking them up again. The title and class are only fetched
+        when first asked for. tracked is set by the plugin for windows it
+        sends title change and destroy notifications for.
+        """
         if not hwnd:
             raise ValueError("Invalid hwnd")
         self.hwnd = hwnd
-        dwProcessId = DWORD()
-        GetWindowThreadProcessId(hwnd, byref(dwProcessId))
-        self.pid = dwProcessId.value
-        self.name = splitext(GetProcessName(self.pid))[0]
-        # The following may change during a window's lifetime
-        self.cached_title = ourName if self.pid == GetProcessId() else GetWindowText(hwnd)
-        self.cached_class = GetClassName(hwnd)
+        if pid is None:
+            pid = GetBackend().GetWindowPid(hwnd)
+        self.pid = pid
+        if name is None:
+            name = GetProcessName(pid)
+        self.name = name
+        self.tracked = tracked
+        self.dead = False
+        # The following may change during a window's lifetime.
+        # None means they haven't been fetched yet.
+        self.cached_title = None
+        self.cached_class = None
+        self.titleTime = None
+        # The number (see StartFetch()) of the read the cached title is from
+        self.titleFetch = 0
+        self.dwell_time = None
+        self.cached_geometry = None
+        self.geometryTime = None
 
     # If the window is closed, GetWindowText() and GetClassName() will return
     # the empty string. Return the cached values we have instead.
     @property
     def title(self):
-        if self.IsAlive():
-            self.cached_title = ourName if self.pid == GetProcessId() else GetWindowText(self.hwnd)
-        return self.cached_title
+        stats = WindowInfo.cacheStats
+        if self.dead or self.titleTime is not None and (
+            not WindowInfo.titleMaxAge or
+            GetBackend().Now() - self.titleTime < WindowInfo.titleMaxAge
+        ):
+            with stats.lock:
+                stats.titleHits += 1
+        else:
+            with stats.lock:
+                stats.titleMisses += 1
+            self.FetchTitle()
+        return self.cached_title or ""
 
     @property
     def window_class(self):
-        if self.IsAlive():
-            self.cached_class = GetClassName(self.hwnd)
-        return self.cached_class
+        stats = WindowInfo.cacheStats
+        if self.cached_class is not None or self.dead:
+            with stats.lock:
+                stats.classHits += 1
+        else:
+            with stats.lock:
+                stats.classMisses += 1
+                stats.win32Calls += 1
+            windowClass = GetBackend().GetClassName(self.hwnd)
+            if windowClass:
+                self.cached_class = InternName(windowClass)
+        return self.cached_class or ""
+
+    def FetchTitle(self):
+        """
+        Reads the title from the window, keeping the cached one if the
+        window turns out to be gone or doesn't answer.
+        """
+        fetch = self.StartFetch()
+        self.StoreTitle(self.ReadTitle(), fetch)
+
+    @staticmethod
+    def StartFetch():
+        """
+        Returns the number to pass to StoreTitle() along with the result of
+        a ReadTitle() or ReadAttributes() about to be started.
+        """
+        return next(_fetches)
+
+    def ReadTitle(self):
+        """
+        Reads the title from the window without caching it, so it can be
+        called from a worker thread. If titleTimeout is set, hung windows
+        are given up on instead of blocking the caller. Returns None if the
+        window is gone (dead is set) or didn't answer in time.
+        """
+        backend = GetBackend()
+        stats = WindowInfo.cacheStats
+        with stats.lock:
+            stats.win32Calls += 2
+        if self.pid == backend.GetCurrentProcessId():
+            return ourName
+        if WindowInfo.titleTimeout:
+            title = backend.GetWindowTextTimeout(self.hwnd, WindowInfo.titleTimeout)
+            if title is None:
+                with stats.lock:
+                    stats.timeouts += 1
+                return None
+        else:
+            title = backend.GetWindowText(self.hwnd)
+        if not title:
+            # Either the title really is empty or the window is gone
+            with stats.lock:
+                stats.win32Calls += 1
+            if not backend.IsWindow(self.hwnd):
+                self.dead = True
+                return None
+        return title
+
+    def StoreTitle(self, title, fetch):
+        """
+        Caches a title returned by the ReadTitle() numbered `fetch` (see
+        StartFetch()). None, or the result of a read started before the one
+        the cached title is from, leaves the cache as it was. Returns True
+        if the title was cached.
+        """
+        if title is None or fetch < self.titleFetch:
+            return False
+        self.titleFetch = fetch
+        self.cached_title = title
+        if self.tracked:
+            self.titleTime = GetBackend().Now() if WindowInfo.titleMaxAge else 0
+        return True
+
+    def ReadAttributes(self):
+        """
+        Reads the title and class without caching them (see ReadTitle()).
+        Returns (title, window_class), either of which may be None.
+        """
+        title = self.ReadTitle()
+        windowClass = self.cached_class
+        if windowClass is None and not self.dead:
+            stats = WindowInfo.cacheStats
+            with stats.lock:
+                stats.win32Calls += 1
+            windowClass = GetBackend().GetClassName(self.hwnd) or None
+        return title, windowClass
+
+    def StoreAttributes(self, attributes, fetch):
+        """
+        Caches what the ReadAttributes() numbered `fetch` returned. Returns
+        True, so that it can be used where a callback decides whether an
+        event goes ahead.
+        """
+        if attributes is not None:
+            title, windowClass = attributes
+            self.StoreTitle(title, fetch)
+            if windowClass is not None and self.cached_class is None:
+                self.cached_class = InternName(windowClass)
+        return True
+
+    def InvalidateTitle(self):
+        """
+        Called by the plugin when the window's title has (probably) changed.
+        """
+        self.titleTime = None
+
+    def MarkDestroyed(self):
+        """
+        Called by the plugin when the window is destroyed; the cached
+        values are kept and no more lookups are made.
+        """
+        self.dead = True
+
+    def Refresh(self):
+        """
+        Forces the title and class to be read again from the window.
+        :return: this object
+        :rtype: WindowInfo
+        """
+        if not self.dead:
+            self.titleTime = None
+            self.cached_class = None
+            self.FetchTitle()
+        return self
 
     def __repr__(self):
         """EventGhost uses this to show the event's payload in the log."""
@@ -96,7 +360,7 @@ class WindowInfo(object):
         :return: True if window is still open else False
         :rtype: bool
         """
-        return bool(win32gui.IsWindow(self.hwnd))
+        return bool(GetBackend().IsWindow(self.hwnd))
 
     def IsActive(self):
         """
@@ -104,7 +368,7 @@ class WindowInfo(object):
         :return: True if window is active else False
         :rtype: bool
         """
-        return self.hwnd == win32gui.GetActiveWindow()
+        return self.hwnd == GetBackend().GetActiveWindow()
 
     def Animate(
         self,
@@ -166,9 +430,9 @@ class WindowInfo(object):
         elif blend:
             style |= win32con.AW_BLEND
 
-        win32gui.AnimateWindow(self.hwnd, duration, style)
+        GetBackend().AnimateWindow(self.hwnd, duration, style)
 
-    def SendKeystrokes(self, text, useAlternateMethod=False, mode=2):
+    def SendKeystrokes(self, text, useAlternateMethod=False, mode=2, timeout=None):
         """
         Send keystrokes to the window
 
@@ -179,15 +443,46 @@ class WindowInfo(object):
         :type useAlternateMethod: bool
         :param mode: see eg.SendKeys()
         :type mode: int
+        :param timeout: seconds to wait for the window to be ready for
+            input; keystrokeTimeout if None
+        :type timeout: float
         :return: None
         :rtype: None
         """
-        self.AssertAlive()
-        import time
-        time.sleep(0.1)
-        eg.SendKeys(win32gui.GetWindow(self.hwnd, win32con.GW_CHILD), text,
+        self.WaitUntilReady(timeout)
+        eg.SendKeys(GetBackend().GetWindow(self.hwnd, win32con.GW_CHILD), text,
             useAlternateMethod, mode)
 
+    def QueueKeystrokes(self, text, useAlternateMethod=False, mode=2):
+        """
+        Like SendKeystrokes(), but returns at once; the keystrokes are sent
+        on a thread of their own, together with any others still waiting
+        for the same window.
+
+        :return: None
+        :rtype: None
+        """
+        keystrokeQueue.Put(self, text, useAlternateMethod, mode)
+
+    def WaitUntilReady(self, timeout=None):
+        """
+        Wait for the window's process to be ready for input (to have
+        finished starting up and be waiting for a message), for at most
+        `timeout` seconds (keystrokeTimeout if None).
+
+        :return: False if the wait timed out, True otherwise
+        :rtype: bool
+        """
+        self.AssertAlive()
+        backend = GetBackend()
+        pid = self.pid
+        if pid == backend.GetCurrentProcessId():
+            # Our own thread would be the one waited for
+            return True
+        if timeout is None:
+            timeout = self.keystrokeTimeout
+        return backend.WaitForInputIdle(pid, timeout)
+
     def Flash(
         self,
         caption=True,
@@ -234,7 +529,7 @@ class WindowInfo(object):
         else:
             flag = win32con.FLASHW_STOP
 
-        win32gui.FlashWindowEx(self.hwnd, flag, times, speed)
+        GetBackend().FlashWindowEx(self.hwnd, flag, times, speed)
 
     def BringToTop(self):
         """
@@ -243,7 +538,7 @@ class WindowInfo(object):
         :rtype: None
         """
         self.AssertAlive()
-        win32gui.BringWindowToTop(self.hwnd)
+        GetBackend().BringWindowToTop(self.hwnd)
 
     def IsVisible(self):
         """
@@ -251,7 +546,7 @@ class WindowInfo(object):
         :return: True if visible else False
         :rtype: bool
         """
-        return bool(win32gui.IsWindowVisible(self.hwnd))
+        return bool(GetBackend().IsWindowVisible(self.hwnd))
 
     def EnableKeyboardMouse(self, enable=True):
         """
@@ -262,7 +557,7 @@ class WindowInfo(object):
         :rtype: None
         """
         self.AssertAlive()
-        win32gui.EnableWindow(self.hwnd, enable)
+        GetBackend().EnableWindow(self.hwnd, enable)
 
     def IsKeyboardMouseEnabled(self):
         """
@@ -270,7 +565,7 @@ class WindowInfo(object):
         :return: True if enabled else False
         :rtype: bool
         """
-        return bool(win32gui.IsWindowEnabled(self.hwnd))
+        return bool(GetBackend().IsWindowEnabled(self.hwnd))
 
     def Restore(self, default=False):
         """
@@ -289,7 +584,8 @@ class WindowInfo(object):
         else:
             activate = win32con.SW_SHOWNORMAL
 
-        win32gui.ShowWindow(self.hwnd, activate)
+        GetBackend().ShowWindow(self.hwnd, activate)
+        self.cached_geometry = None
 
     def Minimize(self, activate=True, force=False):
         """
@@ -316,7 +612,8 @@ class WindowInfo(object):
         if force:
             activate = win32con.SW_FORCEMINIMIZE
 
-        win32gui.ShowWindow(self.hwnd, activate)
+        GetBackend().ShowWindow(self.hwnd, activate)
+        self.cached_geometry = None
 
     def Maximize(self):
         """
@@ -329,7 +626,8 @@ class WindowInfo(object):
             activate = win32con.SW_MAXIMIZE
         else:
             activate = win32con.SW_SHOWMAXIMIZED
-        win32gui.ShowWindow(self.hwnd, activate)
+        GetBackend().ShowWindow(self.hwnd, activate)
+        self.cached_geometry = None
 
     def SetPosition(self, *args):
         """
@@ -344,15 +642,16 @@ class WindowInfo(object):
         :rtype: None
         """
         self.AssertAlive()
+        wx = _Wx()
         if len(args) == 1:
             args = args[0]
 
-        if isinstance(args, wx.Point):
+        if wx and isinstance(args, wx.Point):
             args = args.Get()
-        elif isinstance(args, wx.Rect):
+        elif wx and isinstance(args, wx.Rect):
             args = args.Get()[:2]
 
-        win32gui.SetWindowPos(
+        GetBackend().SetWindowPos(
             self.hwnd,
             self.hwnd,
             args[0],
@@ -365,6 +664,7 @@ class WindowInfo(object):
                 win32con.SWP_NOOWNERZORDER
             )
         )
+        self.cached_geometry = None
 
     def SetSize(self, *args):
         """
@@ -379,15 +679,16 @@ class WindowInfo(object):
         :rtype: None
         """
         self.AssertAlive()
+        wx = _Wx()
         if len(args) == 1:
             args = args[0]
 
-        if isinstance(args, wx.Size):
+        if wx and isinstance(args, wx.Size):
             args = args.Get()
-        elif isinstance(args, wx.Rect):
+        elif wx and isinstance(args, wx.Rect):
             args = args.Get()[2:]
 
-        win32gui.SetWindowPos(
+        GetBackend().SetWindowPos(
             self.hwnd,
             self.hwnd,
             0,
@@ -400,6 +701,7 @@ class WindowInfo(object):
                 win32con.SWP_NOOWNERZORDER
             )
         )
+        self.cached_geometry = None
 
     def SetRect(self, *args):
         """
@@ -414,24 +716,121 @@ class WindowInfo(object):
         :rtype: None
         """
         self.AssertAlive()
-        if len(args) == 1:
-            args = args[0]
-
-        elif len(args) == 2:
-            size = args[0]
-            pos = args[1]
-            if isinstance(size, wx.Size):
-                size = size.Get()
-            if isinstance(pos, wx.Point):
-                pos = pos.Get()
-
-            args = size + pos
+        x, y, width, height = RectTuple(args)
+        GetBackend().SetWindowPos(
+            self.hwnd,
+            self.hwnd,
+            x,
+            y,
+            width,
+            height,
+            win32con.SWP_NOZORDER | win32con.SWP_NOOWNERZORDER
+        )
+        self.cached_geometry = None
+
+    @staticmethod
+    def SetRects(layout):
+        """
+        Sets the position and size of several windows at once, so that
+        they're redrawn once rather than one after the other. Windows
+        aren't checked first: it's one Win32 call per window plus two for
+        the batch, and a window found closed abandons the batch for a
+        SetWindowPos() per window.
+        :param layout: (WindowInfo, rect) pairs, rect being anything
+            SetRect() accepts
+        :type layout: iterable
+        :return: the WindowInfos of the windows that were already closed
+            (and were left out)
+        :rtype: list
+        """
+        backend = GetBackend()
+        moves = []
+        closed = []
+        for windowInfo, rect in layout:
+            windowInfo.cached_geometry = None
+            if windowInfo.dead:
+                closed.append(windowInfo)
+            else:
+                moves.append((windowInfo, RectTuple((rect,))))
+        if not moves:
+            return closed
+
+        flags = (
+            win32con.SWP_NOZORDER |
+            win32con.SWP_NOOWNERZORDER |
+            win32con.SWP_NOACTIVATE
+        )
+        hdwp = backend.BeginDeferWindowPos(len(moves))
+        for windowInfo, (x, y, width, height) in moves:
+            if not hdwp:
+                break
+            hdwp = backend.DeferWindowPos(
+                hdwp, windowInfo.hwnd, 0, x, y, width, height, flags
+            )
+        if hdwp:
+            backend.EndDeferWindowPos(hdwp)
+            return closed
+
+        # DeferWindowPos() fails for a window that's been closed, which
+        # abandons the batch: move them one at a time instead, and only ask
+        # a window whether it still exists when it couldn't be moved
+        for windowInfo, (x, y, width, height) in moves:
+            if not backend.SetWindowPos(
+                windowInfo.hwnd, 0, x, y, width, height, flags
+            ) and not backend.IsWindow(windowInfo.hwnd):
+                closed.append(windowInfo)
+        return closed
+
+    def GetGeometry(self, refresh=False):
+        """
+        Gets the window's position, size and state in one go. For windows
+        the plugin tracks, the result is cached for geometryMaxAge seconds
+        (if set), or until the plugin sees the window move or change size.
+        :param refresh: Read it from the window even if it's cached
+        :type refresh: bool
+        :return: (x, y, width, height, client_width, client_height,
+            minimized, maximized, visible)
+        :rtype: Geometry
+        """
+        if self.dead:
+            raise WindowInfo.DeadWindow("window no longer exists")
+        geometry = self.cached_geometry
+        maxAge = WindowInfo.geometryMaxAge
+        if geometry is not None and maxAge and not refresh and (
+            GetBackend().Now() - self.geometryTime < maxAge
+        ):
+            return geometry
 
-        if isinstance(args, wx.Rect):
-            args = args.Get()
+        self.AssertAlive()
+        backend = GetBackend()
+        hwnd = self.hwnd
+        left, top, right, bottom = backend.GetWindowRect(hwnd)
+        clientLeft, clientTop, clientRight, clientBottom = (
+            backend.GetClientRect(hwnd)
+        )
+        showCmd = backend.GetWindowPlacement(hwnd)[1]
+        geometry = Geometry(
+            left,
+            top,
+            right - left,
+            bottom - top,
+            clientRight - clientLeft,
+            clientBottom - clientTop,
+            showCmd == win32con.SW_SHOWMINIMIZED,
+            showCmd == win32con.SW_SHOWMAXIMIZED,
+            bool(backend.IsWindowVisible(hwnd)),
+        )
+        if self.tracked and WindowInfo.geometryMaxAge:
+            self.cached_geometry = geometry
+            self.geometryTime = backend.Now()
+        return geometry
 
-        self.SetSize(args[2:])
-        self.SetPosition(args[:2])
+    def InvalidateGeometry(self):
+        """
+        Called when the window has (probably) moved, changed size or been
+        minimized, maximized, shown or hidden.
+        """
+        self.cached_geometry = None
 
     def GetRect(self):
         """
@@ -439,7 +838,7 @@ class WindowInfo(object):
         :return: a `wx.Rect <https://wxpython.org/Phoenix/docs/html/wx.Rect.html/>`_ object
         :rtype: wx.Rect
         """
-        self.AssertAlive()
+        import wx
         return wx.Rect(*self.GetRectTuple())
 
     def GetRectTuple(self):
@@ -448,9 +847,7 @@ class WindowInfo(object):
         :return: (x, y, width, height)
         :rtype: tuple
         """
-        self.AssertAlive()
-        x, y, b_x, b_y = win32gui.GetWindowRect(self.hwnd)
-        return x, y, x + b_x, y + b_y
+        return self.GetGeometry()[:4]
 
     def GetSize(self):
         """
@@ -458,7 +855,7 @@ class WindowInfo(object):
         :return: a `wx.Size <https://wxpython.org/Phoenix/docs/html/wx.Size.html/>`_ object
         :rtype: wx.Size
         """
-        self.AssertAlive()
+        import wx
         return wx.Size(*self.GetSizeTuple())
 
     def GetSizeTuple(self):
@@ -467,9 +864,8 @@ class WindowInfo(object):
         :return: (width, height)
         :rtype: tuple
         """
-        self.AssertAlive()
-        rect = self.GetRect()
-        return rect.Width, rect.Height
+        geometry = self.GetGeometry()
+        return geometry.width, geometry.height
 
     def GetPosition(self):
         """
@@ -477,7 +873,7 @@ class WindowInfo(object):
         :return: a `wx.Point <https://wxpython.org/Phoenix/docs/html/wx.Point.html/>`_ object
         :rtype: wx.Point
         """
-        self.AssertAlive()
+        import wx
         return wx.Point(*self.GetPositionTuple())
 
     def GetPositionTuple(self):
@@ -486,9 +882,8 @@ class WindowInfo(object):
         :return: (x, y)
         :rtype: tuple
         """
-        self.AssertAlive()
-        rect = self.GetRect()
-        return rect.X, rect.Y
+        geometry = self.GetGeometry()
+        return geometry.x, geometry.y
 
     def Show(self, flag=True, activate=True, default=False):
         """
@@ -518,7 +913,8 @@ class WindowInfo(object):
         if not flag:
             activate = win32con.SW_HIDE
 
-        win32gui.ShowWindow(self.hwnd, activate)
+        GetBackend().ShowWindow(self.hwnd, activate)
+        self.cached_geometry = None
 
     def Hide(self):
         """
@@ -554,7 +950,7 @@ class WindowInfo(object):
         `Microsoft KnowledgeBase <https://msdn.microsoft.com/en-us/library/windows/desktop/ms644950(v=vs.85).aspx/>`_
         """
         self.AssertAlive()
-        win32gui.SendMessage(self.hwnd, message, wparam, lparam)
+        GetBackend().SendMessage(self.hwnd, message, wparam, lparam)
 
     def PostMessage(self, message, wparam=0, lparam=0):
         """
@@ -563,7 +959,7 @@ class WindowInfo(object):
         `Microsoft KnowledgeBase <https://msdn.microsoft.com/en-us/library/windows/desktop/ms644944(v=vs.85).aspx/>`_
         """
         self.AssertAlive()
-        win32gui.PostMessage(self.hwnd, message, wparam, lparam)
+        GetBackend().PostMessage(self.hwnd, message, wparam, lparam)
 
     def GetParent(self):
         """
@@ -572,7 +968,7 @@ class WindowInfo(object):
         :rtype: task.WindowInfo
         """
         self.AssertAlive()
-        parent_hwnd = win32gui.GetParent(self.hwnd)
+        parent_hwnd = GetBackend().GetParent(self.hwnd)
         if not parent_hwnd:
             raise WindowInfo.NoParent("current window has no parent")
         return WindowInfo(parent_hwnd)
@@ -584,7 +980,7 @@ class WindowInfo(object):
         :rtype: None
         """
         self.AssertAlive()
-        win32gui.SetFocus(self.hwnd)
+        GetBackend().SetFocus(self.hwnd)
 
     def HasFocus(self):
         """
@@ -592,7 +988,7 @@ class WindowInfo(object):
         :return: True if in focus else False
         :rtype: bool
         """
-        return self.hwnd == win32gui.GetFocus()
+        return self.hwnd == GetBackend().GetFocus()
 
 #
 # Editor modelines  -  https://www.wireshark.org/tools/modelines.html
@@ -44,10 +44,18 @@ information about the window that generated them.</p>
 <li>TaskMonitorPlus.Deactivated.<i>ExeName</i> : window deactivated</li>
 <li>TaskMonitorPlus.Flashed.<i>ExeName</i> : window flashed</li>
 <li>TaskMonitorPlus.TitleChanged.<i>ExeName</i> : window title changed</li>
+<li>TaskMonitorPlus.HighCPU.<i>ExeName</i> : process using a lot of CPU
+(with "Sample the CPU and memory use of processes" set)</li>
+<li>TaskMonitorPlus.MemoryGrowth.<i>ExeName</i> : process whose memory keeps
+growing (likewise)</li>
 </ul>
 
-<p>All events except Created and Destroyed carry a payload with information
-about the window affected. <tt>eg.result.payload</tt> has the following
+<p>By default a process is Created when its first window opens and Destroyed
+when its last one closes. With "Watch processes start and exit" set, they
+follow the process itself, whether or not it has windows.</p>
+
+<p>All events except Created, Destroyed, HighCPU and MemoryGrowth carry a
+payload with information about the window affected. <tt>eg.result.payload</tt> has the following
 attributes:</p>
 <ul>
 <li>title</li>
@@ -72,166 +80,1517 @@ attributes:</p>
     ),
 )
 
+import threading
+from collections import deque
+from functools import partial
 from os.path import splitext
+from time import time
+from timeit import default_timer
 
 # Local imports
-from eg.WinApi import GetClassName, GetTopLevelWindowList
-from eg.WinApi.Dynamic import (
-    BOOL, byref, DeregisterShellHookWindow, DWORD, EnumWindows,
-    GA_ROOT, GetAncestor, GetShellWindow, GetWindowLong,
-    GetWindowThreadProcessId, GWL_HWNDPARENT, HSHELL_WINDOWACTIVATED,
-    HSHELL_WINDOWCREATED, HSHELL_WINDOWDESTROYED, HWND,
-    IsWindowVisible, LPARAM, RegisterShellHookWindow, RegisterWindowMessage,
-    WINFUNCTYPE, WM_APP,
+from .Backend import CountingBackend, GetBackend, SetBackend
+from .Coalesce import (
+    CoalescePolicy, FocusSettler, MODES, ParseOverrides, TitleCoalescer,
 )
-from eg.WinApi.Utils import GetProcessName
-
+from .Constants import (
+    EVENT_OBJECT_DESTROY, EVENT_OBJECT_HIDE, EVENT_OBJECT_LOCATIONCHANGE,
+    EVENT_OBJECT_NAMECHANGE, EVENT_OBJECT_SHOW, EVENT_SYSTEM_FOREGROUND,
+    EVENT_SYSTEM_MINIMIZEEND, EVENT_SYSTEM_MINIMIZESTART, GA_ROOT, GWL_HWNDPARENT, HSHELL_FLASH, HSHELL_REDRAW,
+    HSHELL_RUDEAPPACTIVATED, HSHELL_WINDOWACTIVATED, HSHELL_WINDOWCREATED,
+    HSHELL_WINDOWDESTROYED, WM_APP,
+)
+from .Enrichment import EventSequencer, WorkerPool
+from .EventSource import EVENT_SOURCES, WinEventSource
+from .FocusHistory import FocusHistory
+from .Keystrokes import keystrokeQueue
+from .ProcessCache import processCache
 from .ProcessInfo import ProcessInfo
+from .Snapshot import DesktopSnapshot
 from .WindowInfo import WindowInfo
 
-ENUM_WINDOWS_PROC_TYPE = WINFUNCTYPE(BOOL, HWND, LPARAM)
-EnumWindows.argtypes = [ENUM_WINDOWS_PROC_TYPE, LPARAM]
+# Events whose payload has its title and class read by a worker (if there
+# are worker threads) before they are triggered
+PREFETCH_KINDS = frozenset(["NewWindow", "Activated", "Flashed"])
 
-WM_SHELLHOOKMESSAGE = RegisterWindowMessage("SHELLHOOK")
+# Seconds of each step of registering the windows open at start, and how
+# many windows each snapshot taken meanwhile covers
+REGISTRY_BUDGET = 0.005
+REGISTRY_CHUNK = 32
 
-# https://msdn.microsoft.com/en-us/library/windows/desktop/ms644991(v=vs.85).aspx
-HSHELL_REDRAW = 6 # "The title of a window in the task bar has been redrawn."
+class Text:
+    titleMaxAge = "Re-read cached window titles after (seconds, 0 = only when they change):"
+    geometryMaxAge = "Cache window positions and sizes for (seconds, 0 = don't):"
+    titleCoalesceBox = "TitleChanged flood control"
+    titleCoalesceMode = "Coalescing mode:"
+    titleCoalesceInterval = "Coalescing interval (ms):"
+    titleMaxRate = "Max. TitleChanged checks per second per window (0 = no limit):"
+    titleCoalesceOverrides = "Per-executable overrides (exe=mode,interval ms,max per second):"
+    workerThreads = "Look up window titles on worker threads (0 = on the message thread):"
+    lookupTimeout = "Give up on windows that don't answer after (ms, 0 = wait):"
+    sweepInterval = "Check for missed window changes every (seconds, 0 = never):"
+    sweepBudget = "Time limit per check (ms):"
+    sweepReclaimed = "TaskMonitorPlus: cleaned up %d stale entries"
+    metrics = "Collect performance metrics"
+    metricsFile = "Write metrics to this file (blank = don't):"
+    metricsInterval = "Write metrics every (seconds):"
+    journalFile = "Journal window events to this file (blank = don't):"
+    journalSize = "Journal size (thousands of events):"
+    journalError = "TaskMonitorPlus: can't open the journal: %s"
+    captureFile = "Capture window messages to this file, for replaying (blank = don't):"
+    captureError = "TaskMonitorPlus: can't open the capture file: %s"
+    eventSource = "Learn about window changes from:"
+    eventSources = ("the shell hook", "WinEvent hooks")
+    processInterval = "Watch processes start and exit, checking every (seconds, 0 = go by their windows):"
+    resourceInterval = "Sample the CPU and memory use of processes every (seconds, 0 = don't):"
+    cpuThreshold = "Trigger HighCPU when a process uses at least (% of all processors):"
+    memoryGrowth = "Trigger MemoryGrowth when a process's memory grows over %d samples by (MB):"
+    publishPort = "Publish events to other programs on local TCP port (0 = don't):"
+    publishError = "TaskMonitorPlus: can't publish events: %s"
+    overrideError = "TaskMonitorPlus: ignoring TitleChanged override %r: %s"
+    filterError = "TaskMonitorPlus: ignoring a filter rule: %s"
+    focusSettle = "Only count a window as activated once it has kept the focus for (ms, 0 = right away):"
+    eventFilterBox = "Event filter"
+    eventFilter = (
+        "One rule per line, first match wins: "
+        "allow|deny [exe=<glob>] [class=<glob>] [kind=<kind>,...]"
+    )
 
 class TaskMonitorPlus(eg.PluginBase):
+    text = Text
+
     def __init__(self):
         self.AddEvents()
+        self.AddAction(GetMetrics)
+        # Shared process name cache; processCache.Stats() has its counters
+        self.processCache = processCache
+        # Title/class cache counters; see WindowInfo.cacheStats.Stats()
+        self.attributeCacheStats = WindowInfo.cacheStats
 
-    def __start__(self, *dummyArgs):
-        self.pids, self.hwnds = EnumProcesses()
-        self.flashing = set()
-        self.lastActivated = None
-        eg.messageReceiver.AddHandler(WM_APP + 1, self.WindowGotFocusProc)
-        eg.messageReceiver.AddHandler(WM_APP + 2, self.WindowCreatedProc)
-        eg.messageReceiver.AddHandler(WM_APP + 3, self.WindowDestroyedProc)
-        eg.messageReceiver.AddHandler(WM_SHELLHOOKMESSAGE, self.MyWndProc)
-        RegisterShellHookWindow(eg.messageReceiver.hwnd)
-        trayWindow = 0
-        for explorerPid in [x for x in self.pids if self.pids[x].name == "explorer"]:
-            for hwnd in self.pids[explorerPid].hwnds:
-                if GetClassName(hwnd) == "Shell_TrayWnd":
-                    trayWindow = hwnd
-                    break
-            if trayWindow != 0:
-                break
-        self.desktopHwnds = (GetShellWindow(), trayWindow)
+    def __start__(
+        self,
+        titleMaxAge=0.0,
+        titleCoalesceMode="off",
+        titleCoalesceInterval=500,
+        titleMaxRate=0.0,
+        titleCoalesceOverrides="",
+        eventFilter="",
+        workerThreads=0,
+        lookupTimeout=500,
+        sweepInterval=0,
+        sweepBudget=10,
+        metrics=False,
+        metricsFile="",
+        metricsInterval=60,
+        journalFile="",
+        journalSize=64,
+        captureFile="",
+        geometryMaxAge=0.0,
+        eventSource="shellhook",
+        processInterval=0.0,
+        resourceInterval=0.0,
+        cpuThreshold=50.0,
+        memoryGrowth=200.0,
+        publishPort=0,
+        focusSettle=0,
+    ):
+        # The settings as given, for the capture file
+        settings = dict(locals())
+        del settings["self"]
+        self.metrics = None
+        self.metricsTask = None
+        if metrics:
+            self.StartMetrics()
+        try:
+            WindowInfo.titleMaxAge = titleMaxAge or None
+            WindowInfo.geometryMaxAge = geometryMaxAge or None
+            WindowInfo.titleTimeout = lookupTimeout / 1000.0 or None
+            backend = GetBackend()
+            self.shellHookMessage = backend.RegisterWindowMessage("SHELLHOOK")
+            self.callMessage = backend.RegisterWindowMessage("TaskMonitorPlus.Call")
+            self.pendingCalls = deque()
+            self.journal = None
+            if journalFile:
+                from .Journal import Journal
+                try:
+                    self.journal = Journal(journalFile, journalSize * 1024)
+                except (IOError, OSError, ValueError) as exc:
+                    eg.PrintError(self.text.journalError % exc)
+            self.eventFilter = None
+            if eventFilter.strip():
+                from .EventFilter import EventFilter, ParseRules
+                rules = []
+                for line in eventFilter.splitlines():
+                    try:
+                        rules.extend(ParseRules(line))
+                    except ValueError as exc:
+                        eg.PrintError(self.text.filterError % exc)
+                if rules:
+                    self.eventFilter = EventFilter(rules)
+            self.shellHookProcs = {
+                HSHELL_WINDOWDESTROYED: self.WindowDestroyedProc,
+                HSHELL_WINDOWACTIVATED: self.WindowGotFocusProc,
+                HSHELL_WINDOWCREATED: self.WindowGotFocusProc,
+                HSHELL_RUDEAPPACTIVATED: self.WindowGotFocusProc,
+                HSHELL_REDRAW: self.WindowTitleChangedProc,
+                HSHELL_FLASH: self.WindowFlashedProc,
+            }
+            # Notifications whose only event kind is filtered out altogether
+            # aren't handled at all; key=wParam, val=the FilterRule responsible
+            self.droppedShellHook = {}
+            if self.eventFilter:
+                disabled = self.eventFilter.DisabledKinds()
+                for wParam, kind in (
+                    (HSHELL_REDRAW, "TitleChanged"), (HSHELL_FLASH, "Flashed")
+                ):
+                    if kind in disabled:
+                        del self.shellHookProcs[wParam]
+                        self.droppedShellHook[wParam] = disabled[kind]
+            overrides = {}
+            for line in titleCoalesceOverrides.splitlines():
+                try:
+                    overrides.update(ParseOverrides(line))
+                except ValueError as exc:
+                    eg.PrintError(self.text.overrideError % (line.strip(), exc))
+            policy = CoalescePolicy(
+                titleCoalesceMode, titleCoalesceInterval / 1000.0, titleMaxRate
+            )
+            self.titleCoalescer = None
+            if (policy.active or overrides) and (
+                HSHELL_REDRAW in self.shellHookProcs
+            ):
+                self.titleCoalescer = TitleCoalescer(
+                    self.CheckTitle, self.CallLater, self.CancelCall, policy,
+                    overrides
+                )
+            self.focusSettler = None
+            if focusSettle:
+                self.focusSettler = FocusSettler(
+                    self.FocusSettledProc, self.CallLater, self.CancelCall,
+                    focusSettle / 1000.0
+                )
+            self.winEventSource = None
+            self.winEventProcs = {}
+            # Shell-hook notifications that the WinEvents stand in for
+            self.shellHookIgnored = frozenset()
+            if eventSource == "winevent":
+                self.winEventMessage = backend.RegisterWindowMessage(
+                    "TaskMonitorPlus.WinEvent"
+                )
+                self.winEventProcs = {
+                    EVENT_SYSTEM_FOREGROUND: self.WinEventForegroundProc,
+                    EVENT_OBJECT_SHOW: self.WinEventShowProc,
+                    EVENT_OBJECT_HIDE: self.WindowDestroyedProc,
+                    EVENT_OBJECT_DESTROY: self.WindowDestroyedProc,
+                    EVENT_OBJECT_NAMECHANGE: self.WindowTitleChangedProc,
+                    EVENT_OBJECT_LOCATIONCHANGE: self.WindowMovedProc,
+                    EVENT_SYSTEM_MINIMIZESTART: self.WindowMovedProc,
+                    EVENT_SYSTEM_MINIMIZEEND: self.WindowMovedProc,
+                }
+                if HSHELL_REDRAW in self.droppedShellHook:
+                    del self.winEventProcs[EVENT_OBJECT_NAMECHANGE]
+                # The shell hook stays, for Flashed: there's no WinEvent for it
+                self.shellHookIgnored = frozenset(
+                    wParam for wParam in self.shellHookProcs
+                    if wParam != HSHELL_FLASH
+                )
+                for wParam in self.shellHookIgnored:
+                    del self.shellHookProcs[wParam]
+            self.workerPool = None
+            self.sequencer = None
+            if workerThreads:
+                self.workerPool = WorkerPool(workerThreads)
+                # The lookups themselves give up after lookupTimeout; this is
+                # for when the workers fall behind
+                self.sequencer = EventSequencer(
+                    self.Trigger, self.workerPool, self.PostCall, self.CallLater,
+                    self.CancelCall, 2 * (lookupTimeout / 1000.0) or 1.0
+                )
+            self.capture = None
+            if captureFile:
+                # Only imported when capturing (it brings in json)
+                from .Capture import Recorder
+                try:
+                    self.capture = Recorder(captureFile, settings)
+                except (IOError, OSError) as exc:
+                    eg.PrintError(self.text.captureError % exc)
+            self.publisher = None
+            if publishPort:
+                # Only imported when publishing (it brings in json and socket)
+                from .Publisher import Publisher
+                try:
+                    self.publisher = Publisher(publishPort)
+                except (IOError, OSError) as exc:
+                    eg.PrintError(self.text.publishError % exc)
+            self.pids = {}
+            self.hwnds = {}
+            # The windows open at start that aren't registered yet, in the
+            # order BuildRegistryProc() registers them
+            self.pendingHwnds = set()
+            self.pendingOrder = deque()
+            # Held for every change to pids and hwnds, since FindWindows() and
+            # the waiters may finish the registry on the caller's thread
+            self.registryLock = threading.RLock()
+            # Built on the first FindWindows() call
+            self.windowIndex = None
+            self.flashing = set()
+            # key=hwnd, val=dwell times of its Deactivated events not yet
+            # triggered, oldest first
+            self.dwellTimes = {}
+            self.lastActivated = None
+            self.focusHistory = FocusHistory()
+            # Created by the first wait
+            self.waiters = None
+            self.messageHandlers = {
+                self.callMessage: self.PendingCallsProc,
+                WM_APP + 1: self.WindowGotFocusProc,
+                WM_APP + 2: self.WindowCreatedProc,
+                WM_APP + 3: self.WindowDestroyedProc,
+                self.shellHookMessage: self.MyWndProc,
+            }
+            if self.winEventProcs:
+                self.messageHandlers[self.winEventMessage] = self.WinEventProc
+            handlers = self.messageHandlers
+            if self.capture is not None:
+                from .Capture import SHELLHOOK, WINEVENT
+                # Only when the plugin's own calls ran is captured: a replay
+                # makes the calls itself
+                handlers[self.callMessage] = self.capture.RecordedCalls(
+                    self.PendingCallsProc
+                )
+                for n in (1, 2, 3):
+                    handlers[WM_APP + n] = self.capture.Recorded(n, handlers[WM_APP + n])
+                handlers[self.shellHookMessage] = self.capture.Recorded(
+                    SHELLHOOK, self.MyWndProc
+                )
+                if self.winEventProcs:
+                    handlers[self.winEventMessage] = self.capture.Recorded(
+                        WINEVENT, self.WinEventProc
+                    )
+            if self.metrics is not None:
+                for mesg, handler in list(handlers.items()):
+                    if mesg == self.shellHookMessage:
+                        handlers[mesg] = self.metrics.TimedShellHook(handler)
+                    else:
+                        handlers[mesg] = self.metrics.Timed(handler.__name__, handler)
+            self.desktopHwnds = (
+                backend.GetShellWindow(), backend.FindWindow("Shell_TrayWnd")
+            )
+            for mesg, handler in self.messageHandlers.items():
+                eg.messageReceiver.AddHandler(mesg, handler)
+            backend.RegisterShellHookWindow(eg.messageReceiver.hwnd)
+            if self.winEventProcs:
+                self.winEventSource = WinEventSource(
+                    eg.messageReceiver.hwnd, self.winEventMessage, self.hwnds,
+                    self.pendingHwnds
+                )
+                self.winEventSource.Start()
+            # Listed once the hooks are in place, so that no window is missed;
+            # they're registered on the message pump, after __start__ returns
+            hwnds = backend.GetTopLevelWindowList(False)
+            self.pendingOrder.extend(hwnds)
+            self.pendingHwnds.update(hwnds)
+            if hwnds:
+                self.PostCall(self.BuildRegistryProc, ())
+            self.processMonitor = None
+            self.processTask = None
+            # Processes first seen through a window since the last look at the
+            # process table
+            self.unconfirmedPids = set()
+            if processInterval:
+                from .ProcessMonitor import ProcessMonitor
+                self.processInterval = processInterval
+                self.processMonitor = ProcessMonitor()
+                self.PostCall(self.ProcessMonitorProc, ())
+            self.resourceSampler = None
+            self.resourceTask = None
+            if resourceInterval:
+                from .ResourceSampler import ResourceSampler
+                self.resourceInterval = resourceInterval
+                self.resourceSampler = ResourceSampler(
+                    cpuThreshold, memoryGrowth * 1024 * 1024
+                )
+                self.resourceTask = self.CallLater(
+                    resourceInterval, self.SampleResourcesProc
+                )
+            self.reconciler = None
+            self.sweepTask = None
+            if sweepInterval:
+                from .Reconcile import Reconciler
+                self.sweepInterval = sweepInterval
+                self.reconciler = Reconciler(self, sweepBudget / 1000.0)
+                self.sweepTask = self.CallLater(sweepInterval, self.SweepProc)
+            if metrics and metricsFile:
+                self.metricsFile = metricsFile
+                self.metricsInterval = metricsInterval
+                self.metricsTask = self.CallLater(metricsInterval, self.DumpMetricsProc)
+        except Exception:
+            # The plugin isn't started, so __stop__() won't be called
+            if self.metrics is not None:
+                self.StopMetrics()
+            raise
 
     def __stop__(self):
-        DeregisterShellHookWindow(eg.messageReceiver.hwnd)
-        eg.messageReceiver.RemoveHandler(WM_SHELLHOOKMESSAGE, self.MyWndProc)
-        eg.messageReceiver.RemoveHandler(WM_APP + 1, self.WindowGotFocusProc)
-        eg.messageReceiver.RemoveHandler(WM_APP + 2, self.WindowCreatedProc)
-        eg.messageReceiver.RemoveHandler(WM_APP + 3, self.WindowDestroyedProc)
-
-    def CheckWindow(self, hwnd):
-        hwnd2 = GetAncestor(hwnd, GA_ROOT)
+        if self.resourceTask is not None:
+            self.CancelCall(self.resourceTask)
+            self.resourceTask = None
+        self.resourceSampler = None
+        if self.processTask is not None:
+            self.CancelCall(self.processTask)
+            self.processTask = None
+        self.processMonitor = None
+        if self.sweepTask is not None:
+            self.CancelCall(self.sweepTask)
+            self.sweepTask = None
+        if self.metricsTask is not None:
+            self.CancelCall(self.metricsTask)
+            self.metricsTask = None
+        if self.titleCoalescer:
+            self.titleCoalescer.Clear()
+        if self.focusSettler:
+            self.focusSettler.Clear()
+        if self.sequencer:
+            self.sequencer.Clear()
+            self.workerPool.Stop()
+        self.pendingCalls.clear()
+        self.pendingHwnds.clear()
+        self.pendingOrder.clear()
+        if self.winEventSource is not None:
+            self.winEventSource.Stop()
+            self.winEventSource = None
+        GetBackend().DeregisterShellHookWindow(eg.messageReceiver.hwnd)
+        for mesg, handler in self.messageHandlers.items():
+            eg.messageReceiver.RemoveHandler(mesg, handler)
+        if self.metrics is not None:
+            self.StopMetrics()
+        if self.journal is not None:
+            self.journal.Close()
+            self.journal = None
+        if self.capture is not None:
+            self.capture.Close()
+            self.capture = None
+        if self.publisher is not None:
+            self.publisher.Close()
+            self.publisher = None
+        self.windowIndex = None
+        if self.waiters is not None:
+            # Nothing will resolve them now
+            self.waiters.Clear()
+        # Nothing marks cached geometry out of date once the plugin stops
+        WindowInfo.geometryMaxAge = None
+
+    def Configure(
+        self,
+        titleMaxAge=0.0,
+        titleCoalesceMode="off",
+        titleCoalesceInterval=500,
+        titleMaxRate=0.0,
+        titleCoalesceOverrides="",
+        eventFilter="",
+        workerThreads=0,
+        lookupTimeout=500,
+        sweepInterval=0,
+        sweepBudget=10,
+        metrics=False,
+        metricsFile="",
+        metricsInterval=60,
+        journalFile="",
+        journalSize=64,
+        captureFile="",
+        geometryMaxAge=0.0,
+        eventSource="shellhook",
+        processInterval=0.0,
+        resourceInterval=0.0,
+        cpuThreshold=50.0,
+        memoryGrowth=200.0,
+        publishPort=0,
+        focusSettle=0,
+    ):
+        import wx
+        text = self.text
+        panel = eg.ConfigPanel()
+        titleMaxAgeCtrl = panel.SpinNumCtrl(
+            titleMaxAge, min=0, max=86400, fractionWidth=1, integerWidth=5
+        )
+        panel.AddLine(text.titleMaxAge, titleMaxAgeCtrl)
+        geometryMaxAgeCtrl = panel.SpinNumCtrl(
+            geometryMaxAge, min=0, max=86400, fractionWidth=1, integerWidth=5
+        )
+        panel.AddLine(text.geometryMaxAge, geometryMaxAgeCtrl)
+        workerThreadsCtrl = panel.SpinIntCtrl(workerThreads, min=0, max=16)
+        panel.AddLine(text.workerThreads, workerThreadsCtrl)
+        lookupTimeoutCtrl = panel.SpinIntCtrl(lookupTimeout, min=0, max=60000)
+        panel.AddLine(text.lookupTimeout, lookupTimeoutCtrl)
+        sweepIntervalCtrl = panel.SpinIntCtrl(sweepInterval, min=0, max=86400)
+        panel.AddLine(text.sweepInterval, sweepIntervalCtrl)
+        sweepBudgetCtrl = panel.SpinIntCtrl(sweepBudget, min=1, max=10000)
+        panel.AddLine(text.sweepBudget, sweepBudgetCtrl)
+        metricsCtrl = panel.CheckBox(metrics, text.metrics)
+        panel.AddLine(metricsCtrl)
+        metricsFileCtrl = panel.FileBrowseButton(
+            metricsFile, fileMask="*.json", saveMode=True
+        )
+        panel.AddLine(text.metricsFile, metricsFileCtrl)
+        metricsIntervalCtrl = panel.SpinIntCtrl(metricsInterval, min=1, max=86400)
+        panel.AddLine(text.metricsInterval, metricsIntervalCtrl)
+        journalFileCtrl = panel.FileBrowseButton(journalFile, saveMode=True)
+        panel.AddLine(text.journalFile, journalFileCtrl)
+        journalSizeCtrl = panel.SpinIntCtrl(journalSize, min=1, max=4096)
+        panel.AddLine(text.journalSize, journalSizeCtrl)
+        captureFileCtrl = panel.FileBrowseButton(
+            captureFile, fileMask="*.jsonl", saveMode=True
+        )
+        panel.AddLine(text.captureFile, captureFileCtrl)
+        eventSourceCtrl = panel.Choice(
+            EVENT_SOURCES.index(eventSource), choices=text.eventSources
+        )
+        panel.AddLine(text.eventSource, eventSourceCtrl)
+        processIntervalCtrl = panel.SpinNumCtrl(
+            processInterval, min=0, max=86400, fractionWidth=1, integerWidth=5
+        )
+        panel.AddLine(text.processInterval, processIntervalCtrl)
+        resourceIntervalCtrl = panel.SpinNumCtrl(
+            resourceInterval, min=0, max=3600, fractionWidth=1, integerWidth=4
+        )
+        panel.AddLine(text.resourceInterval, resourceIntervalCtrl)
+        cpuThresholdCtrl = panel.SpinNumCtrl(
+            cpuThreshold, min=0, max=100, fractionWidth=1, integerWidth=3
+        )
+        panel.AddLine(text.cpuThreshold, cpuThresholdCtrl)
+        memoryGrowthCtrl = panel.SpinNumCtrl(
+            memoryGrowth, min=0, max=65536, fractionWidth=0, integerWidth=5
+        )
+        from .ResourceSampler import RESOURCE_SAMPLES
+        panel.AddLine(text.memoryGrowth % RESOURCE_SAMPLES, memoryGrowthCtrl)
+        publishPortCtrl = panel.SpinIntCtrl(publishPort, min=0, max=65535)
+        panel.AddLine(text.publishPort, publishPortCtrl)
+        focusSettleCtrl = panel.SpinIntCtrl(focusSettle, min=0, max=5000)
+        panel.AddLine(text.focusSettle, focusSettleCtrl)
+
+        titleCoalesceModeCtrl = panel.Choice(
+            MODES.index(titleCoalesceMode), choices=MODES
+        )
+        titleCoalesceIntervalCtrl = panel.SpinIntCtrl(
+            titleCoalesceInterval, min=0, max=600000
+        )
+        titleMaxRateCtrl = panel.SpinNumCtrl(
+            titleMaxRate, min=0, max=1000, fractionWidth=2, integerWidth=4
+        )
+        titleCoalesceOverridesCtrl = panel.TextCtrl(
+            titleCoalesceOverrides, style=wx.TE_MULTILINE
+        )
+        panel.sizer.Add(
+            panel.BoxedGroup(
+                text.titleCoalesceBox,
+                (text.titleCoalesceMode, titleCoalesceModeCtrl),
+                (text.titleCoalesceInterval, titleCoalesceIntervalCtrl),
+                (text.titleMaxRate, titleMaxRateCtrl),
+                text.titleCoalesceOverrides,
+                titleCoalesceOverridesCtrl,
+            ),
+            0, wx.EXPAND | wx.TOP, 10
+        )
+
+        eventFilterCtrl = panel.TextCtrl(eventFilter, style=wx.TE_MULTILINE)
+        panel.sizer.Add(
+            panel.BoxedGroup(text.eventFilterBox, text.eventFilter, eventFilterCtrl),
+            1, wx.EXPAND | wx.TOP, 10
+        )
+
+        while panel.Affirmed():
+            panel.SetResult(
+                titleMaxAgeCtrl.GetValue(),
+                MODES[titleCoalesceModeCtrl.GetValue()],
+                titleCoalesceIntervalCtrl.GetValue(),
+                titleMaxRateCtrl.GetValue(),
+                titleCoalesceOverridesCtrl.GetValue(),
+                eventFilterCtrl.GetValue(),
+                workerThreadsCtrl.GetValue(),
+                lookupTimeoutCtrl.GetValue(),
+                sweepIntervalCtrl.GetValue(),
+                sweepBudgetCtrl.GetValue(),
+                metricsCtrl.GetValue(),
+                metricsFileCtrl.GetValue(),
+                metricsIntervalCtrl.GetValue(),
+                journalFileCtrl.GetValue(),
+                journalSizeCtrl.GetValue(),
+                captureFileCtrl.GetValue(),
+                geometryMaxAgeCtrl.GetValue(),
+                EVENT_SOURCES[eventSourceCtrl.GetValue()],
+                processIntervalCtrl.GetValue(),
+                resourceIntervalCtrl.GetValue(),
+                cpuThresholdCtrl.GetValue(),
+                memoryGrowthCtrl.GetValue(),
+                publishPortCtrl.GetValue(),
+                focusSettleCtrl.GetValue(),
+            )
+
+    def CallLater(self, delay, func, *args):
+        """
+        Runs func(*args) on the message pump thread (where all the
+        handlers run) after `delay` seconds. Returns a task for
+        CancelCall().
+        """
+        return eg.scheduler.AddTask(delay, self.PostCall, func, args)
+
+    def CancelCall(self, task):
+        try:
+            eg.scheduler.CancelTask(task)
+        except ValueError:
+            # Already run
+            pass
+
+    def PostCall(self, func, args):
+        self.pendingCalls.append((func, args))
+        GetBackend().PostMessage(eg.messageReceiver.hwnd, self.callMessage, 0, 0)
+
+    def PendingCallsProc(self, dummyHwnd, dummyMesg, dummyWParam, dummyLParam):
+        pendingCalls = self.pendingCalls
+        while pendingCalls:
+            func, args = pendingCalls.popleft()
+            func(*args)
+        return 0
+
+    def Emit(self, kind, processInfo, hwnd=None):
+        """
+        Triggers an event of the given kind (see ProcessInfo.EVENT_KINDS)
+        unless the event filter suppresses it. The WindowInfo payload for
+        hwnd is only built for events that do get triggered.
+
+        With worker threads, the event is queued behind any event still
+        waiting for a lookup, and a payload whose title hasn't been read
+        yet has it read (with its class) by a worker first.
+        """
+        sequencer = self.sequencer
+        if sequencer is None:
+            self.Trigger(kind, processInfo, hwnd)
+            return
+        if hwnd is None or processInfo.name is None:
+            # The payload is built (and the filter run) once the process
+            # name is known
+            sequencer.Add(kind, processInfo, hwnd)
+            return
+        eventFilter = self.eventFilter
+        if eventFilter is not None and not eventFilter.Allowed(
+            kind, processInfo, hwnd, count=False
+        ):
+            # Not worth a lookup (or a payload); it's counted as suppressed
+            # when released
+            sequencer.Add(kind, processInfo, hwnd)
+            return
+        windowInfo = processInfo.GetWindowInfo(hwnd)
+        if kind in PREFETCH_KINDS and windowInfo.titleTime is None and not windowInfo.dead:
+            sequencer.Add(
+                kind, processInfo, hwnd, windowInfo, windowInfo.ReadAttributes,
+                (), partial(
+                    self.AttributesFetched, windowInfo, windowInfo.StartFetch()
+                )
+            )
+        else:
+            sequencer.Add(kind, processInfo, hwnd, windowInfo)
+
+    def AttributesFetched(self, windowInfo, fetch, attributes):
+        """
+        Called on the message pump with the class and title a worker read
+        for an event's payload, which the window index gets too.
+        """
+        windowInfo.StoreAttributes(attributes, fetch)
+        windowIndex = self.windowIndex
+        if windowIndex is not None and windowInfo.hwnd in windowIndex.unknown:
+            with self.registryLock:
+                processInfo = self.hwnds.get(windowInfo.hwnd, None)
+                if processInfo is not None:
+                    self.IndexWindow(windowIndex, windowInfo.hwnd, processInfo)
+        return True
+
+    def Trigger(self, kind, processInfo, hwnd=None, windowInfo=None):
+        if kind == "Deactivated":
+            dwells = self.dwellTimes[hwnd]
+            dwell = dwells.popleft()
+            if not dwells:
+                del self.dwellTimes[hwnd]
+        if windowInfo is None and hwnd is not None and hwnd not in processInfo.hwnds:
+            # Closed while the event waited in the sequencer
+            windowInfo = WindowInfo(hwnd, processInfo.pid, processInfo.name)
+            windowInfo.MarkDestroyed()
+        eventFilter = self.eventFilter
+        if eventFilter is not None and not eventFilter.Allowed(
+            kind, processInfo, hwnd, windowInfo
+        ):
+            return
+        if self.metrics is not None:
+            self.metrics.CountEvent(kind)
+        if self.capture is not None:
+            self.capture.Event(kind, processInfo.name, hwnd)
+        journal = self.journal
+        publisher = self.publisher
+        if hwnd is None:
+            if journal is not None or publisher is not None:
+                record = (time(), kind, 0, processInfo.pid, processInfo.name, "", "")
+                if journal is not None:
+                    journal.Append(*record)
+                if publisher is not None:
+                    publisher.Publish(record)
+            self.TriggerEvent(getattr(processInfo.events, kind))
+        else:
+            if windowInfo is None:
+                windowInfo = processInfo.GetWindowInfo(hwnd)
+            if kind == "Deactivated":
+                windowInfo.dwell_time = dwell
+            if journal is not None or publisher is not None:
+                record = (
+                    time(), kind, hwnd, processInfo.pid, processInfo.name,
+                    windowInfo.window_class, windowInfo.title
+                )
+                if journal is not None:
+                    journal.Append(*record)
+                if publisher is not None:
+                    publisher.Publish(record)
+            self.TriggerEvent(getattr(processInfo.events, kind), windowInfo)
+
+    def ProcessNameFetched(self, processInfo, name):
+        if name is None:
+            # The worker didn't answer in time; looking up a process name
+            # doesn't involve the process itself, so do it here
+            name = processCache.GetName(processInfo.pid, verify=True)
+        processInfo.SetName(name)
+        if self.windowIndex is not None:
+            with self.registryLock:
+                for hwnd in processInfo.hwnds:
+                    self.windowIndex.Rename(hwnd, name)
+        waiters = self.waiters
+        if waiters is not None and waiters.count:
+            # Waits by executable couldn't see this process's windows yet
+            for hwnd in list(processInfo.hwnds):
+                self.NotifyWaiters("title", processInfo, hwnd)
+                if hwnd == self.lastActivated:
+                    self.NotifyWaiters("activation", processInfo, hwnd)
+        return True
+
+    def TitleFetched(self, windowInfo, fetch, title):
+        oldTitle = windowInfo.cached_title
+        if not windowInfo.StoreTitle(title, fetch):
+            # Window gone or not answering, or a later read finished first
+            return False
+        if title == oldTitle:
+            return False
+        if self.windowIndex is not None:
+            with self.registryLock:
+                self.windowIndex.Retitle(windowInfo.hwnd, title)
+        processInfo = self.hwnds.get(windowInfo.hwnd, None)
+        if processInfo is not None:
+            self.NotifyWaiters("title", processInfo, windowInfo.hwnd, windowInfo)
+        return True
+
+    def ArrangeWindows(self, layout):
+        """
+        Moves and resizes several windows in one go (see
+        WindowInfo.SetRects()). layout is a list of (WindowInfo, rect)
+        pairs, rect being (x, y, width, height). Returns the WindowInfos of
+        the windows that were already closed.
+        """
+        return WindowInfo.SetRects(layout)
+
+    def RecentWindows(self, count=10):
+        """
+        Returns the WindowInfo of up to `count` open windows, the most
+        recently focused first (starting with the one focused now).
+        """
+        hwnds = self.hwnds
+        return [
+            hwnds[hwnd].GetWindowInfo(hwnd)
+            for hwnd in self.focusHistory.Recent(count)
+            if hwnd in hwnds
+        ]
+
+    def PreviousWindow(self):
+        """
+        Returns the WindowInfo of the window that had the focus before the
+        current one, or None.
+        """
+        for hwnd in self.focusHistory.Recent(2):
+            if hwnd != self.lastActivated and hwnd in self.hwnds:
+                return self.hwnds[hwnd].GetWindowInfo(hwnd)
+        return None
+
+    def FocusTimes(self):
+        """
+        Returns {executable name: seconds its windows have had the focus}
+        since the plugin started or ResetFocusTimes() was called.
+        """
+        return self.focusHistory.ExeTimes(GetBackend().Now())
+
+    def ResetFocusTimes(self):
+        self.focusHistory.Reset(GetBackend().Now())
+
+    def GetWindowIndex(self):
+        """
+        Returns the WindowIndex of the tracked windows, building it if
+        needed. From then on it's kept up to date.
+        """
+        if self.windowIndex is None:
+            from .WindowIndex import WindowIndex
+            self.FinishRegistry()
+            windowIndex = WindowIndex()
+            with self.registryLock:
+                for hwnd, processInfo in self.hwnds.items():
+                    self.IndexWindow(windowIndex, hwnd, processInfo)
+                self.windowIndex = windowIndex
+        return self.windowIndex
+
+    def IndexWindow(self, windowIndex, hwnd, processInfo):
+        """
+        Adds a window to the index with what's known about it, without
+        asking the window anything (it's called with registryLock held).
+        """
+        windowInfo = processInfo.hwnds.get(hwnd, None)
+        if windowInfo is None:
+            windowIndex.Add(hwnd, processInfo.name, None, None)
+        else:
+            windowIndex.Add(
+                hwnd, processInfo.name, windowInfo.cached_class,
+                windowInfo.cached_title
+            )
+
+    def ResolveIndex(self, windowIndex):
+        """
+        Reads the class and title of the indexed windows that haven't had
+        them read yet, on the calling thread, and indexes them again.
+        """
+        hwnds = self.hwnds
+        with self.registryLock:
+            windows = [
+                hwnds[hwnd].GetWindowInfo(hwnd)
+                for hwnd in windowIndex.unknown if hwnd in hwnds
+            ]
+        for windowInfo in windows:
+            # Cached by the reads
+            windowInfo.window_class
+            windowInfo.title
+        with self.registryLock:
+            for windowInfo in windows:
+                processInfo = hwnds.get(windowInfo.hwnd, None)
+                if processInfo is not None:
+                    self.IndexWindow(windowIndex, windowInfo.hwnd, processInfo)
+
+    def FindWindows(
+        self, exe=None, windowClass=None, title=None, match="glob", words=None
+    ):
+        """
+        Returns the WindowInfo of every tracked window matching all of the
+        criteria given, from the plugin's own records (no Win32 calls, but
+        for windows whose class or title the plugin hasn't read yet):
+        - exe: executable name without extension, or a glob pattern
+          (case-insensitive)
+        - windowClass: window class, or a glob pattern (case-insensitive)
+        - title: compared with the title according to match: "exact",
+          "glob" (case-insensitive) or "regex" (found anywhere in it)
+        - words: a string whose every word must appear in the title
+        """
+        from .WindowIndex import TitleMatcher
+        matcher = TitleMatcher(title, match) if title is not None else None
+        windowIndex = self.GetWindowIndex()
+        if windowIndex.unknown and (
+            windowClass is not None or words is not None
+        ):
+            self.ResolveIndex(windowIndex)
+        hwnds = self.hwnds
+        windows = []
+        # Called from other threads, while the message pump changes the
+        # registry and the index
+        with self.registryLock:
+            for hwnd in windowIndex.Find(exe, windowClass, words):
+                processInfo = hwnds.get(hwnd, None)
+                if processInfo is not None:
+                    windows.append(processInfo.GetWindowInfo(hwnd))
+        if matcher is None:
+            return windows
+        return [x for x in windows if matcher(x.title)]
+
+    def WaitForTitle(
+        self, title, hwnd=None, exe=None, match="glob", timeout=None,
+        callback=None, wait=True
+    ):
+        """
+        Waits until the title of a tracked window (hwnd, a window handle or
+        WindowInfo) or of any window of an executable (exe, without
+        extension) matches `title` (see FindWindows() for match), and
+        returns that window's WindowInfo, or None if `timeout` seconds
+        passed first. A window that matches already returns at once.
+
+        Nothing is polled: the plugin's handlers resolve the wait when they
+        see the change. So don't block on the thread the plugin's messages
+        are handled on; pass a callback, or wait=False, to get a Waiter
+        back at once instead. callback(waiter) is called when the waiter is
+        resolved or times out.
+        """
+        from .Waiters import Waiter
+        from .WindowIndex import TitleMatcher
+        matcher = TitleMatcher(title, match)
+        return self.StartWaiter(
+            Waiter("title", hwnd, exe, lambda x: matcher(x.title), callback),
+            timeout, wait
+        )
+
+    def WaitForClose(self, hwnd=None, exe=None, timeout=None, callback=None, wait=True):
+        """
+        Waits until a window (hwnd) is closed, or an executable (exe) has
+        no windows left. Returns True, or False if `timeout` seconds passed
+        first. See WaitForTitle() for callback and wait.
+        """
+        from .Waiters import Waiter
+        result = self.StartWaiter(
+            Waiter("close", hwnd, exe, None, callback), timeout, wait
+        )
+        return result if isinstance(result, Waiter) else result is not None
+
+    def WaitForActivation(
+        self, hwnd=None, exe=None, timeout=None, callback=None, wait=True
+    ):
+        """
+        Waits until a tracked window (hwnd) or any window of an executable
+        (exe) is activated, and returns its WindowInfo, or None if
+        `timeout` seconds passed first. See WaitForTitle() for callback and
+        wait.
+        """
+        from .Waiters import Waiter
+        return self.StartWaiter(
+            Waiter("activation", hwnd, exe, None, callback), timeout, wait
+        )
+
+    def StartWaiter(self, waiter, timeout, wait):
+        waiter.hwnd = getattr(waiter.hwnd, "hwnd", waiter.hwnd)
+        hwnd = waiter.hwnd
+        if (hwnd is None) == (waiter.exe is None):
+            raise ValueError("give either hwnd or exe")
+        if hwnd is not None and hwnd not in self.hwnds and (
+            waiter.kind != "close" or GetBackend().IsWindow(hwnd)
+        ):
+            raise ValueError("window 0x%X isn't tracked" % hwnd)
+        self.FinishRegistry()
+        with self.registryLock:
+            waiters = self.waiters
+            if waiters is None:
+                from .Waiters import WaiterRegistry
+                waiters = self.waiters = WaiterRegistry(self.CancelCall)
+        waiters.Add(waiter)
+        # Registered first, so a change from now on isn't missed
+        self.CheckWaiter(waiter)
+        if timeout is not None and not waiter.done:
+            waiter.timeoutTask = self.CallLater(timeout, waiters.Expire, waiter)
+        if not wait or waiter.callback is not None:
+            return waiter
+        # The timeout task wakes it otherwise: on Python 2, a wait with a
+        # timeout polls
+        waiter.Wait()
+        if waiter.timedOut:
+            return None
+        return waiter.result if waiter.kind != "close" else True
+
+    def CheckWaiter(self, waiter):
+        """Resolves the waiter if what it waits for is already the case."""
+        from .Waiters import ExeKey
+        # Called from other threads, while the message pump changes the
+        # registry: a window closed meanwhile doesn't match
+        with self.registryLock:
+            if waiter.hwnd is not None:
+                processInfo = self.hwnds.get(waiter.hwnd, None)
+                windows = [(waiter.hwnd, processInfo)] if processInfo else []
+            else:
+                windows = [
+                    (hwnd, processInfo)
+                    for processInfo in self.pids.values()
+                    if processInfo.name is not None and ExeKey(processInfo.name) == waiter.exe
+                    for hwnd in processInfo.hwnds
+                ]
+            windowInfos = []
+            if waiter.kind != "close":
+                lastActivated = self.lastActivated
+                windowInfos = [
+                    processInfo.GetWindowInfo(hwnd)
+                    for hwnd, processInfo in windows
+                    if waiter.kind != "activation" or hwnd == lastActivated
+                ]
+        if waiter.kind == "close":
+            if not windows:
+                self.waiters.Resolve(waiter, None)
+            return
+        for windowInfo in windowInfos:
+            if waiter.predicate is None or waiter.predicate(windowInfo):
+                self.waiters.Resolve(waiter, windowInfo)
+                return
+
+    def StartMetrics(self):
+        """
+        Starts counting Win32 calls (by wrapping the backend) and timing
+        CheckWindow(). The message handlers are timed as they're registered.
+        """
+        from .Metrics import Metrics
+        self.metrics = Metrics()
+        self.win32Counter = CountingBackend(GetBackend())
+        SetBackend(self.win32Counter)
+        self.CheckWindow = self.metrics.Timed("CheckWindow", self.CheckWindow)
+
+    def StopMetrics(self):
+        del self.CheckWindow
+        if GetBackend() is self.win32Counter:
+            SetBackend(self.win32Counter.backend)
+
+    def GetMetrics(self):
+        """
+        Returns the plugin's metrics as a dict (also available through the
+        Get Metrics action), or None if metrics are off.
+        """
+        if self.metrics is None:
+            return None
+        stats = self.metrics.Stats(self.shellHookProcs)
+        stats["win32Calls"] = dict(self.win32Counter.calls)
+        stats["registry"] = {
+            "pids": len(self.pids),
+            "hwnds": len(self.hwnds),
+            "flashing": len(self.flashing),
+            "pending": len(self.pendingHwnds),
+        }
+        stats["processCache"] = self.processCache.Stats()
+        stats["attributeCache"] = self.attributeCacheStats.Stats()
+        if self.titleCoalescer:
+            stats["titleCoalescer"] = self.titleCoalescer.Stats()
+        if self.focusSettler:
+            stats["focusSettle"] = self.focusSettler.Stats()
+        if self.eventFilter:
+            stats["eventFilter"] = dict(self.eventFilter.Stats())
+        if self.sequencer:
+            stats["sequencer"] = self.sequencer.Stats()
+        if self.reconciler:
+            stats["reconciler"] = self.reconciler.Stats()
+        if self.journal:
+            stats["journal"] = self.journal.Stats()
+        if self.capture:
+            stats["capture"] = self.capture.Stats()
+        if self.windowIndex:
+            stats["windowIndex"] = self.windowIndex.Stats()
+        if self.winEventSource:
+            stats["winEvents"] = self.winEventSource.Stats()
+        if self.processMonitor:
+            stats["processMonitor"] = self.processMonitor.Stats()
+        if self.resourceSampler:
+            stats["resources"] = self.resourceSampler.Stats()
+        if self.publisher:
+            stats["publisher"] = self.publisher.Stats()
+        stats["focusHistory"] = self.focusHistory.Stats()
+        if self.waiters:
+            stats["waiters"] = self.waiters.Stats()
+        if keystrokeQueue.thread is not None:
+            stats["keystrokes"] = keystrokeQueue.Stats()
+        return stats
+
+    def ReadJournal(self, start=None, end=None):
+        """
+        Yields the journal's records (JournalRecord tuples) with
+        start <= timestamp < end, oldest first. Timestamps are as returned
+        by time.time().
+        """
+        if self.journal is None:
+            return
+        from .Journal import JournalReader
+        reader = JournalReader(self.journal.path)
+        try:
+            for record in reader.Records(start, end):
+                yield record
+        finally:
+            reader.Close()
+
+    def ResourceHistory(self, pid):
+        """
+        Returns the samples taken of a process's resource use, oldest first,
+        as a list of (time, CPU percent, working set in bytes, handle count)
+        tuples; empty if sampling is off or the process isn't tracked. The
+        times are by a monotonic clock (GetBackend().Now()), in seconds,
+        not time.time() timestamps.
+        """
+        if self.resourceSampler is None:
+            return []
+        return self.resourceSampler.History(pid)
+
+    def DumpMetricsProc(self):
+        from .Metrics import Dump
+        try:
+            Dump(self.GetMetrics(), self.metricsFile)
+        except (IOError, OSError) as exc:
+            eg.PrintError("TaskMonitorPlus: can't write metrics: %s" % exc)
+        self.metricsTask = self.CallLater(self.metricsInterval, self.DumpMetricsProc)
+
+    def BuildRegistryProc(self):
+        """
+        Registers the windows that were open at start, a few milliseconds'
+        worth at a time so that messages aren't held up.
+        """
+        deadline = default_timer() + REGISTRY_BUDGET
+        pendingOrder = self.pendingOrder
+        pendingHwnds = self.pendingHwnds
+        while pendingOrder:
+            chunk = []
+            while pendingOrder and len(chunk) < REGISTRY_CHUNK:
+                hwnd = pendingOrder.popleft()
+                if hwnd in pendingHwnds:
+                    chunk.append(hwnd)
+            self.Register(chunk)
+            if default_timer() > deadline:
+                break
+        if pendingOrder:
+            self.PostCall(self.BuildRegistryProc, ())
+
+    def RegisterPending(self, hwnd):
+        """
+        Registers a window that was open at start, without triggering any
+        event: as far as the plugin's events go, it was always there.
+        """
+        self.Register((hwnd,))
+
+    def Register(self, hwnds):
+        """
+        Registers windows that were open at start, from a DesktopSnapshot
+        of them. Their title and class are read now, while they're still
+        there to be asked, so that one closing before anything reads them
+        still has them in ClosedWindow.
+
+        The windows are read without registryLock held, and only those
+        still pending then are registered: another thread finishing the
+        registry meanwhile may have registered them already.
+        """
+        snapshot = DesktopSnapshot.Take(GetBackend(), hwnds=hwnds)
+        pids = self.pids
+        found = []
+        for hwnd, pid in snapshot.TaskWindows():
+            if not pid:
+                # Closed since
+                continue
+            # The cache outlives the plugin's stops and starts, so a pid
+            # it doesn't track yet is checked for reuse
+            windowInfo = WindowInfo(
+                hwnd, pid, processCache.GetName(pid, pid not in pids),
+                tracked=True
+            )
+            windowInfo.StoreAttributes(
+                windowInfo.ReadAttributes(), windowInfo.StartFetch()
+            )
+            if not windowInfo.dead:
+                found.append(windowInfo)
+        pendingHwnds = self.pendingHwnds
+        with self.registryLock:
+            for windowInfo in found:
+                hwnd = windowInfo.hwnd
+                if hwnd not in pendingHwnds or hwnd in self.hwnds:
+                    continue
+                pid = windowInfo.pid
+                processInfo = self.pids.get(pid, None)
+                if processInfo is None:
+                    processInfo = ProcessInfo(pid, windowInfo.name)
+                    self.pids[pid] = processInfo
+                    if self.processMonitor is not None:
+                        self.unconfirmedPids.add(pid)
+                processInfo.hwnds[hwnd] = windowInfo
+                self.hwnds[hwnd] = processInfo
+            # Owned or closed ones are done with too
+            pendingHwnds.difference_update(hwnds)
+
+    def FinishRegistry(self):
+        """
+        Registers every window still waiting for BuildRegistryProc(), for
+        when the answer depends on knowing all of them.
+        """
+        if self.pendingHwnds:
+            # Including any another thread is registering right now, so
+            # that all of them are known on return
+            self.Register(list(self.pendingHwnds))
+
+    def ProcessMonitorProc(self):
+        """
+        Triggers Created and Destroyed for the processes that started and
+        exited since the last look at the process table. The first look
+        only registers the processes running at start.
+        """
+        monitor = self.processMonitor
+        first = monitor.table is None
+        started, exited = monitor.Tick()
+        pids = self.pids
+        for pid, creationTime in exited:
+            processCache.Forget(pid)
+            processInfo = pids.get(pid, None)
+            if processInfo is not None and processInfo.creationTime in (
+                None, creationTime
+            ):
+                self.ProcessExited(processInfo)
+        for pid, creationTime, name in started:
+            processInfo = pids.get(pid, None)
+            if processInfo is None:
+                processInfo = ProcessInfo(
+                    pid, processCache.Store(pid, creationTime, name)
+                )
+                processInfo.creationTime = creationTime
+                with self.registryLock:
+                    pids[pid] = processInfo
+                if not first:
+                    self.Emit("Created", processInfo)
+            elif processInfo.creationTime is None:
+                # Already known by its windows
+                processInfo.creationTime = creationTime
+        unconfirmed = self.unconfirmedPids
+        if first:
+            unconfirmed.update(pids)
+        for pid in unconfirmed:
+            processInfo = pids.get(pid, None)
+            if processInfo is not None and processInfo.creationTime is None:
+                if monitor.IsRunning(pid):
+                    processInfo.creationTime = monitor.byPid[pid]
+                else:
+                    # Came and went between two looks
+                    self.ProcessExited(processInfo)
+        unconfirmed.clear()
+        self.processTask = self.CallLater(
+            self.processInterval, self.ProcessMonitorProc
+        )
+
+    def SampleResourcesProc(self):
+        """
+        Samples the processes the plugin tracks, and triggers HighCPU and
+        MemoryGrowth for those that just crossed a threshold.
+        """
+        pids = self.pids
+        for pid, kind in self.resourceSampler.Sample(pids):
+            self.Emit(kind, pids[pid])
+        self.resourceTask = self.CallLater(
+            self.resourceInterval, self.SampleResourcesProc
+        )
+
+    def ProcessExited(self, processInfo):
+        """The windows of a process that exited are closed along with it."""
+        for hwnd in list(processInfo.hwnds):
+            self.WindowDestroyedProc(None, None, hwnd, None)
+        with self.registryLock:
+            if self.pids.get(processInfo.pid, None) is processInfo:
+                del self.pids[processInfo.pid]
+        processCache.Forget(processInfo.pid)
+        self.Emit("Destroyed", processInfo)
+
+    def SweepProc(self):
+        reclaimed = self.reconciler.Sweep()
+        if reclaimed:
+            eg.PrintNotice(self.text.sweepReclaimed % reclaimed)
+        self.sweepTask = self.CallLater(self.sweepInterval, self.SweepProc)
+
+    def CheckWindow(self, hwnd, topLevel=False):
+        """
+        Starts tracking hwnd if it's a visible, unowned top-level window,
+        and returns its ProcessInfo (or None if it isn't tracked).
+        topLevel=True is for windows WinEventSource reported: those are
+        top-level, and if tracked still visible (hiding them untracks
+        them), so they aren't asked again.
+        """
+        backend = GetBackend()
+        if topLevel:
+            processInfo = self.hwnds.get(hwnd, None)
+            if processInfo is not None:
+                return self.pids.get(processInfo.pid, None)
+            hwnd2 = hwnd
+        else:
+            hwnd2 = backend.GetAncestor(hwnd, GA_ROOT)
         if hwnd == 0 or hwnd2 in self.desktopHwnds:
             return
         if hwnd != hwnd2:
             return
-        if GetWindowLong(hwnd, GWL_HWNDPARENT):
+        if backend.GetWindowLong(hwnd, GWL_HWNDPARENT):
             return
-        if not IsWindowVisible(hwnd):
+        if not backend.IsWindowVisible(hwnd):
             return
 
+        if hwnd in self.pendingHwnds:
+            self.RegisterPending(hwnd)
         if hwnd in self.hwnds:
             processInfo = self.pids.get(self.hwnds[hwnd].pid, None)
             return processInfo
 
-        pid = GetWindowPid(hwnd)
+        pid = backend.GetWindowPid(hwnd)
         processInfo = self.pids.get(pid, None)
+        if not processInfo and self.pendingHwnds:
+            # Not new if it has windows that aren't registered yet
+            self.FinishRegistry()
+            processInfo = self.pids.get(pid, None)
+        created = None
         if not processInfo:
-            processInfo = ProcessInfo(pid)
-            self.pids[pid] = processInfo
-            self.TriggerEvent("Created." + processInfo.name)
-
-        processInfo.hwnds[hwnd] = WindowInfo(hwnd)
-        self.hwnds[hwnd] = processInfo
-        self.TriggerEvent("NewWindow." + processInfo.name, processInfo.hwnds[hwnd])
+            # Looked up before taking the lock, which only covers the inserts
+            created = ProcessInfo(pid, lookup=self.sequencer is None)
+        with self.registryLock:
+            processInfo = self.pids.get(pid, None)
+            if not processInfo:
+                processInfo = self.pids[pid] = created
+                if self.processMonitor is not None:
+                    self.unconfirmedPids.add(pid)
+            else:
+                created = None
+            processInfo.hwnds[hwnd] = None
+            self.hwnds[hwnd] = processInfo
+            if self.windowIndex is not None:
+                self.IndexWindow(self.windowIndex, hwnd, processInfo)
+        if created is not None:
+            sequencer = self.sequencer
+            if sequencer is None:
+                self.Emit("Created", processInfo)
+            else:
+                sequencer.Add(
+                    "Created", processInfo, None, None,
+                    processCache.GetName, (pid, True),
+                    partial(self.ProcessNameFetched, processInfo)
+                )
+        self.Emit("NewWindow", processInfo, hwnd)
+        if processInfo.name is not None:
+            # A new window of an executable may be the one waited for
+            self.NotifyWaiters("title", processInfo, hwnd)
         return processInfo
 
     def MyWndProc(self, dummyHwnd, dummyMesg, wParam, lParam):
-        if wParam == HSHELL_WINDOWDESTROYED:
-            self.WindowDestroyedProc(None, None, lParam, None)
-        elif wParam in (HSHELL_WINDOWACTIVATED, HSHELL_WINDOWCREATED, 0x8004):
-            self.WindowGotFocusProc(None, None, lParam, None)
-        elif wParam == HSHELL_REDRAW:
-            self.WindowTitleChangedProc(None, None, lParam, None)
-        elif wParam == 0x8006:
-            self.WindowFlashedProc(None, None, lParam, None)
+        proc = self.shellHookProcs.get(wParam, None)
+        if proc is not None:
+            proc(None, None, lParam, None)
+        elif wParam in self.droppedShellHook:
+            self.droppedShellHook[wParam].suppressed += 1
+        elif wParam in self.shellHookIgnored:
+            pass
         else:
             eg.PrintDebugNotice("MyWndProc unknown wParam:: 0x{:04X}".format(wParam))
         return 1
 
+    def WinEventProc(self, dummyHwnd, dummyMesg, wParam, lParam):
+        proc = self.winEventProcs.get(wParam, None)
+        if proc is not None:
+            proc(None, None, lParam, None)
+        return 1
+
     def WindowCreatedProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
         self.CheckWindow(hwnd)
 
     def WindowDestroyedProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
-        processInfo = self.hwnds.get(hwnd, None)
+        if hwnd in self.pendingHwnds:
+            # Only hidden, or closed before it was registered; if closed,
+            # its process can't be told any more, and nothing is triggered
+            self.RegisterPending(hwnd)
+        with self.registryLock:
+            processInfo = self.hwnds.pop(hwnd, None)
+            if processInfo and self.windowIndex is not None:
+                self.windowIndex.Remove(hwnd)
         if processInfo:
-            winDetails = processInfo.hwnds[hwnd]
-            del processInfo.hwnds[hwnd]
-            del self.hwnds[hwnd]
-            pid = processInfo.pid
+            self.flashing.discard(hwnd)
+            if self.titleCoalescer:
+                self.titleCoalescer.Forget(hwnd)
+            if self.focusSettler:
+                self.focusSettler.Forget(hwnd)
             if hwnd == self.lastActivated:
-                self.TriggerEvent("Deactivated." + processInfo.name, winDetails)
+                self.Deactivate(processInfo, hwnd)
                 self.lastActivated = None
-            self.TriggerEvent("ClosedWindow." + processInfo.name, winDetails)
-            if len(processInfo.hwnds) == 0:
-                self.TriggerEvent("Destroyed." + processInfo.name)
-                self.pids.pop(pid, None)
+            self.focusHistory.Closed(hwnd, GetBackend().Now())
+            self.Emit("ClosedWindow", processInfo, hwnd)
+            with self.registryLock:
+                winDetails = processInfo.hwnds.pop(hwnd)
+            if winDetails is not None:
+                winDetails.MarkDestroyed()
+            # With the process monitor on, a process isn't gone with its
+            # last window: ProcessMonitorProc() tells when it exits
+            if len(processInfo.hwnds) == 0 and self.processMonitor is None:
+                if self.pendingHwnds:
+                    # Not the last one if others aren't registered yet
+                    self.FinishRegistry()
+                with self.registryLock:
+                    destroyed = len(processInfo.hwnds) == 0
+                    if destroyed:
+                        self.pids.pop(processInfo.pid, None)
+                if destroyed:
+                    self.Emit("Destroyed", processInfo)
+            waiters = self.waiters
+            if waiters is not None and waiters.count:
+                self.NotifyClosedWaiters(processInfo, hwnd, winDetails)
 
     def WindowTitleChangedProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
+        if hwnd in self.pendingHwnds:
+            self.RegisterPending(hwnd)
         processInfo = self.hwnds.get(hwnd, None)
-        if processInfo:
-            windowInfo = processInfo.hwnds[hwnd]
-            if windowInfo and windowInfo.cached_title != windowInfo.title:
-                self.TriggerEvent("TitleChanged." + processInfo.name, windowInfo)
+        if processInfo and processInfo.name is not None:
+            if self.titleCoalescer and self.titleCoalescer.Defer(hwnd, processInfo.name):
+                return
+            self.CheckTitle(hwnd, processInfo)
+
+    def CheckTitle(self, hwnd, processInfo=None):
+        """
+        Triggers TitleChanged if the window's title differs from the last
+        one seen.
+        """
+        if processInfo is None:
+            processInfo = self.hwnds.get(hwnd, None)
+        if processInfo and processInfo.name is not None:
+            windowInfo = processInfo.GetWindowInfo(hwnd)
+            if self.sequencer is not None:
+                self.sequencer.Add(
+                    "TitleChanged", processInfo, hwnd, windowInfo,
+                    windowInfo.ReadTitle, (),
+                    partial(self.TitleFetched, windowInfo, windowInfo.StartFetch())
+                )
+                return
+            oldTitle = windowInfo.cached_title
+            windowInfo.InvalidateTitle()
+            title = windowInfo.title
+            if title != oldTitle:
+                if self.windowIndex is not None:
+                    with self.registryLock:
+                        self.windowIndex.Retitle(hwnd, title)
+                self.Emit("TitleChanged", processInfo, hwnd)
+                self.NotifyWaiters("title", processInfo, hwnd, windowInfo)
+
+    def WindowMovedProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
+        self.InvalidateGeometry(hwnd)
 
     def WindowFlashedProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
+        if hwnd in self.pendingHwnds:
+            self.RegisterPending(hwnd)
         processInfo = self.hwnds.get(hwnd, None)
         if processInfo and hwnd not in self.flashing:
             self.flashing.add(hwnd)
-            self.TriggerEvent("Flashed." + processInfo.name, processInfo.hwnds[hwnd])
+            self.Emit("Flashed", processInfo, hwnd)
+
+    def WinEventShowProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
+        self.CheckWindow(hwnd, True)
+
+    def WinEventForegroundProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
+        self.GotFocus(self.CheckWindow(hwnd, True), hwnd)
 
     def WindowGotFocusProc(self, dummyHwnd, dummyMesg, hwnd, dummyLParam):
-        thisProcessInfo = self.CheckWindow(hwnd)
+        self.GotFocus(self.CheckWindow(hwnd), hwnd)
+
+    def GotFocus(self, thisProcessInfo, hwnd):
+        if self.focusSettler is not None:
+            # A new window is still reported right away, its activation
+            # once the focus settles
+            if thisProcessInfo:
+                self.focusSettler.Put(hwnd)
+            return
+        self.Activate(thisProcessInfo, hwnd)
+
+    def FocusSettledProc(self, hwnd, since, left):
+        thisProcessInfo = self.hwnds.get(hwnd, None)
+        if thisProcessInfo is not None:
+            self.Activate(thisProcessInfo, hwnd, since, left)
+
+    def Activate(self, thisProcessInfo, hwnd, since=None, left=None):
+        """
+        Triggers Deactivated for the window that had the focus, and
+        Activated for hwnd. With the focus-settle filter, `since` is when
+        hwnd got the focus, and `left` when the other window lost it.
+        """
         if thisProcessInfo and hwnd != self.lastActivated:
             if hwnd in self.flashing:
                 self.flashing.remove(hwnd)
             if self.lastActivated:
                 lastProcessInfo = self.hwnds.get(self.lastActivated, None)
-                payload = None
                 if lastProcessInfo:
-                    payload = lastProcessInfo.hwnds[self.lastActivated]
-                    self.TriggerEvent("Deactivated." + lastProcessInfo.name, payload)
-            self.TriggerEvent("Activated." + thisProcessInfo.name, thisProcessInfo.hwnds[hwnd])
+                    self.Deactivate(lastProcessInfo, self.lastActivated, left)
+            self.focusHistory.Activated(
+                hwnd, thisProcessInfo,
+                GetBackend().Now() if since is None else since
+            )
+            # Windows being switched to are often restored or brought back
+            # on screen first
+            self.InvalidateGeometry(hwnd)
+            self.Emit("Activated", thisProcessInfo, hwnd)
             self.lastActivated = hwnd
+            self.NotifyWaiters("activation", thisProcessInfo, hwnd)
 
-def EnumProcesses():
+    def InvalidateGeometry(self, hwnd):
+        """
+        Called when a tracked window has (probably) moved, changed size or
+        changed state, so that its cached geometry is read again.
+        """
+        processInfo = self.hwnds.get(hwnd, None)
+        if processInfo is not None:
+            windowInfo = processInfo.hwnds.get(hwnd, None)
+            if windowInfo is not None:
+                windowInfo.cached_geometry = None
+
+    def NotifyWaiters(self, kind, processInfo, hwnd, windowInfo=None):
+        """
+        Resolves the waiters (see WaitForTitle()) waiting for this kind of
+        change to a window; the WindowInfo is only made if one is.
+        """
+        waiters = self.waiters
+        if waiters is not None and waiters.Wants(kind, hwnd, processInfo.name):
+            if windowInfo is None:
+                windowInfo = processInfo.GetWindowInfo(hwnd)
+            waiters.Notify(kind, hwnd, processInfo.name, windowInfo)
+
+    def NotifyClosedWaiters(self, processInfo, hwnd, windowInfo):
+        from .Waiters import ExeKey
+        waiters = self.waiters
+        exe = processInfo.name
+        if exe is not None and waiters.Wants("close", exe=exe):
+            # Waits by executable are for its last window
+            key = ExeKey(exe)
+            for otherProcessInfo in self.pids.values():
+                if (
+                    otherProcessInfo.hwnds and otherProcessInfo.name is not None and
+                    ExeKey(otherProcessInfo.name) == key
+                ):
+                    exe = None
+                    break
+        if waiters.Wants("close", hwnd, exe):
+            if windowInfo is None:
+                windowInfo = WindowInfo(hwnd, processInfo.pid, processInfo.name)
+                windowInfo.MarkDestroyed()
+            waiters.Notify("close", hwnd, exe, windowInfo)
+
+    def Deactivate(self, processInfo, hwnd, now=None):
+        """
+        Triggers Deactivated, with the dwell time in the payload. The
+        payload isn't built here: the event may be filtered out, or wait
+        for the process name.
+        """
+        dwell = self.focusHistory.Deactivated(
+            hwnd, GetBackend().Now() if now is None else now
+        )
+        dwellTimes = self.dwellTimes
+        if hwnd in dwellTimes:
+            dwellTimes[hwnd].append(dwell)
+        else:
+            dwellTimes[hwnd] = deque((dwell,))
+        self.Emit("Deactivated", processInfo, hwnd)
+
+class GetMetrics(eg.ActionBase):
+    name = "Get Metrics"
+    description = (
+        "Returns the plugin's performance metrics (message counts, handler "
+        "latencies, Win32 call counts, events by kind, registry sizes) as a "
+        "dictionary in eg.result."
+    )
+
+    def __call__(self):
+        return self.plugin.GetMetrics()
+
+def EnumProcesses(snapshot=None):
+    """
+    Builds the pid and hwnd registries from a DesktopSnapshot (taking one
+    if none is given). Each process's name is looked up once; WindowInfo
+    objects are only created when an event needs them.
+    """
+    if snapshot is None:
+        snapshot = DesktopSnapshot.Take()
     pids = {}
     hwnds = {}
-    dwProcessId = DWORD()
-    for hwnd in GetTopLevelWindowList(False):
-        GetWindowThreadProcessId(hwnd, byref(dwProcessId))
-        pid = dwProcessId.value
-        if pid not in pids:
+    for hwnd, pid in snapshot.TaskWindows():
+        processInfo = pids.get(pid, None)
+        if processInfo is None:
             processInfo = ProcessInfo(pid)
             pids[pid] = processInfo
-        else:
-            processInfo = pids[pid]
-        processInfo.hwnds[hwnd] = WindowInfo(hwnd)
+        processInfo.hwnds[hwnd] = None
         hwnds[hwnd] = processInfo
     return pids, hwnds
 
 def GetWindowPid(hwnd):
-    dwProcessId = DWORD()
-    GetWindowThreadProcessId(hwnd, byref(dwProcessId))
-    return dwProcessId.value
+    return GetBackend().GetWindowPid(hwnd)
 
 #
 # Editor modelines  -  https://www.wireshark.org/tools/modelines.html
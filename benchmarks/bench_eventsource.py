@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Event source benchmark: the shell hook against WinEvent hooks.
+
+Performs the same user actions (opening, switching to, renaming, moving,
+minimizing and restoring, and closing windows) on a simulated desktop with
+the plugin listening through each event source, and reports per action the
+Win32 calls the plugin made (WinEvent posts included), the messages it
+handled, the events it triggered, and how often a cached GetGeometry()
+(with the cache on) was out of date afterwards. Each window has a few child
+controls, which also get renamed, and moves come with mouse cursor events,
+as on a real desktop.
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+
+import harness
+harness.InstallEg()
+
+import results
+from TaskMonitorPlus.Backend import CountingBackend
+from TaskMonitorPlus.Constants import (
+    EVENT_OBJECT_LOCATIONCHANGE, OBJID_CURSOR, SW_MINIMIZE, SW_RESTORE,
+)
+from TaskMonitorPlus.EventSource import EVENT_SOURCES
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+
+METRICS = {
+    "win32_calls_per_action": ("lower", True),
+    "stale_geometry": ("lower", True),
+}
+
+CHILDREN = 3
+
+def Open(desktop, pid, i):
+    hwnd = desktop.CreateWindow(pid, "Window %d" % i, "Class%d" % (i % 7))
+    for n in range(CHILDREN):
+        desktop.CreateWindow(pid, "", "Edit", parent=hwnd)
+    return hwnd
+
+def Children(desktop, hwnd):
+    return [x for x, w in desktop.windows.items() if w.parent == hwnd]
+
+def Switch(desktop, hwnd, i):
+    desktop.SetForegroundWindow(hwnd)
+
+def Retitle(desktop, hwnd, i):
+    desktop.SetWindowText(hwnd, "Window %d - edited %d" % (hwnd, i))
+    for child in Children(desktop, hwnd):
+        desktop.SetWindowText(child, "%d" % i)
+
+def Move(desktop, hwnd, i):
+    for n in range(10):
+        desktop.NotifyWinEvent(EVENT_OBJECT_LOCATIONCHANGE, 0, OBJID_CURSOR)
+    desktop.SetWindowPos(hwnd, 0, i % 500, i % 300, 400 + i % 7, 300, 0)
+
+def MinimizeRestore(desktop, hwnd, i):
+    if desktop.windows[hwnd].minimized:
+        desktop.ShowWindow(hwnd, SW_RESTORE)
+    else:
+        desktop.ShowWindow(hwnd, SW_MINIMIZE)
+
+ACTIONS = (
+    ("switch", Switch),
+    ("retitle", Retitle),
+    ("move", Move),
+    ("minimize_restore", MinimizeRestore),
+)
+
+def Measure(source, windows, actions):
+    desktop = SimulatedDesktop()
+    counter = CountingBackend(desktop)
+    plugin, eg = harness.LoadPlugin(
+        counter, eventSource=source, geometryMaxAge=3600.0, metrics=False
+    )
+    pid = desktop.CreateProcess("app.exe")
+    scenarios = {}
+    # Shell-hook messages are delivered as they're sent, WinEvents are
+    # posted; count both as they reach the plugin
+    delivered = [0]
+    sink = desktop.messageSink
+    def CountingSink(*message):
+        delivered[0] += 1
+        sink(*message)
+    desktop.messageSink = CountingSink
+
+    def Pump():
+        desktop.PumpMessages()
+        messages = delivered[0]
+        delivered[0] = 0
+        return messages
+
+    def Run(name, action, hwnds):
+        plugin.events = []
+        counter.Reset()
+        messages = stale = 0
+        for i in range(actions):
+            hwnd = hwnds[i % len(hwnds)]
+            action(desktop, hwnd, i)
+            messages += Pump()
+            calls = counter.Total()
+            if hwnd in plugin.hwnds:
+                windowInfo = plugin.hwnds[hwnd].GetWindowInfo(hwnd)
+                cached = windowInfo.GetGeometry()
+                if cached != windowInfo.GetGeometry(refresh=True):
+                    stale += 1
+            # The geometry reads aren't the action's
+            counter.Reset()
+            counter.calls["_action"] = calls
+        scenarios["%s_%s" % (name, source)] = {
+            "win32_calls_per_action": float(counter.Total()) / actions,
+            "messages_per_action": float(messages) / actions,
+            "events_per_action": float(len(plugin.events)) / actions,
+            "stale_geometry": stale,
+        }
+
+    # Opening and closing are measured on windows of their own
+    plugin.events = []
+    counter.Reset()
+    Pump()
+    opened = [Open(desktop, pid, i) for i in range(actions)]
+    messages = Pump()
+    scenarios["open_%s" % source] = {
+        "win32_calls_per_action": float(counter.Total()) / actions,
+        "messages_per_action": float(messages) / actions,
+        "events_per_action": float(len(plugin.events)) / actions,
+        "stale_geometry": 0,
+    }
+    hwnds = opened[:windows]
+    for hwnd in hwnds:
+        plugin.hwnds[hwnd].GetWindowInfo(hwnd).GetGeometry()
+    for name, action in ACTIONS:
+        Run(name, action, hwnds)
+    plugin.events = []
+    counter.Reset()
+    for hwnd in opened:
+        desktop.DestroyWindow(hwnd)
+    messages = Pump()
+    scenarios["close_%s" % source] = {
+        "win32_calls_per_action": float(counter.Total()) / actions,
+        "messages_per_action": float(messages) / actions,
+        "events_per_action": float(len(plugin.events)) / actions,
+        "stale_geometry": 0,
+    }
+    plugin.__stop__()
+    return scenarios
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--windows", type=int, default=20, help="windows the actions cycle over",
+    )
+    parser.add_argument(
+        "--actions", "-n", type=int, default=200, help="actions of each kind",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    for source in EVENT_SOURCES:
+        scenarios.update(
+            Measure(source, args.windows, max(args.windows, args.actions))
+        )
+    report = results.MakeResults("eventsource", scenarios)
+    results.PrintTable(report, (
+        "win32_calls_per_action", "messages_per_action", "events_per_action",
+        "stale_geometry",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
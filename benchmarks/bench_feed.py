@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Event feed benchmark: publishing events to other programs.
+
+Publishes events through a TaskMonitorPlus.Publisher on a free localhost
+port to 1 and 4 subscribers (tools/feed_client.py, on threads of this
+process), in bursts with a millisecond's pause in between as the message
+pump would, and reports the microseconds Publish() takes per event (mean
+and 99th percentile), the events per second every subscriber received,
+and the events sent per write. The slow_consumer scenario adds a
+subscriber that never reads: it is dropped once maxQueue events behind,
+and the others must not be held up meanwhile.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import threading
+import time
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "tools"))
+
+import results
+from feed_client import FeedClient
+from TaskMonitorPlus.Publisher import Publisher
+
+METRICS = {
+    "publish_us": ("lower", False),
+    "p99_publish_us": ("lower", False),
+    "events_per_sec": ("higher", False),
+}
+
+RECORD = (
+    0.0, "Activated", 0x10010, 4242, "notepad", "Notepad",
+    "Untitled - Notepad",
+)
+
+def Connect(publisher, count):
+    """Connects `count` clients and waits until the publisher has them all."""
+    clients = [FeedClient(publisher.port, timeout=30) for i in range(count)]
+    while len(publisher.subscribers) < count:
+        time.sleep(0.001)
+    return clients
+
+def Read(client, events, done):
+    received = 0
+    for body in client.Frames():
+        received += 1
+        if received == events:
+            break
+    done.append(default_timer())
+
+def Measure(subscribers, events, burst, slow=False, maxQueue=10000):
+    publisher = Publisher(0, maxQueue=maxQueue)
+    clients = Connect(publisher, subscribers)
+    if slow:
+        # Connected, but never reads
+        stalled = Connect(publisher, subscribers + 1)[-1]
+    connected = publisher.subscribers
+    done = []
+    readers = [
+        threading.Thread(target=Read, args=(client, events, done))
+        for client in clients
+    ]
+    for reader in readers:
+        reader.start()
+    times = []
+    start = default_timer()
+    for i in range(events):
+        before = default_timer()
+        publisher.Publish(RECORD)
+        times.append(default_timer() - before)
+        if i % burst == burst - 1:
+            time.sleep(0.001)
+    for reader in readers:
+        reader.join(60)
+    finished = max(done) if len(done) == len(readers) else None
+    sent = sum(x.sent for x in connected)
+    batches = sum(x.batches for x in connected)
+    stats = publisher.Stats()
+    publisher.Close()
+    for client in clients:
+        client.Close()
+    if slow:
+        stalled.Close()
+    times.sort()
+    return {
+        "publish_us": sum(times) * 1e6 / events,
+        "p99_publish_us": times[int(events * 0.99)] * 1e6,
+        "events_per_sec": events / (finished - start) if finished else 0.0,
+        "events_per_write": float(sent) / batches if batches else 0.0,
+        "dropped": stats["dropped"],
+    }
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--events", "-n", type=int, default=50000, help="events to publish",
+    )
+    parser.add_argument(
+        "--burst", type=int, default=100, help="events published without a pause",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    events = max(1, args.events)
+    burst = max(1, args.burst)
+    scenarios = {
+        "subscribers_1": Measure(1, events, burst),
+        "subscribers_4": Measure(4, events, burst),
+        "slow_consumer": Measure(1, events, burst, slow=True, maxQueue=1000),
+    }
+    report = results.MakeResults("feed", scenarios)
+    results.PrintTable(report, (
+        "publish_us", "p99_publish_us", "events_per_sec", "events_per_write",
+        "dropped",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
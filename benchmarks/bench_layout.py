@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Window layout benchmark: SetRect() per window against ArrangeWindows().
+
+Tiles 5, 20 and 100 windows of a simulated desktop into a grid, once with
+a SetRect() call per window and once with a single ArrangeWindows() batch,
+and reports microseconds, Win32 calls and layout passes (the times the
+screen would be redrawn) per arrangement.
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+import results
+import traces
+from TaskMonitorPlus.Backend import CountingBackend
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+from TaskMonitorPlus.WindowInfo import WindowInfo
+
+METRICS = {
+    "batch_win32_calls": ("lower", True),
+    "batch_layout_passes": ("lower", True),
+    "batch_us": ("lower", False),
+}
+
+def Grid(windows, width=1920, height=1080):
+    """Returns a (WindowInfo, rect) layout tiling windows into a grid."""
+    columns = 1
+    while columns * columns < len(windows):
+        columns += 1
+    rows = (len(windows) + columns - 1) // columns
+    cx, cy = width // columns, height // rows
+    return [
+        (windowInfo, ((i % columns) * cx, (i // columns) * cy, cx, cy))
+        for i, windowInfo in enumerate(windows)
+    ]
+
+def Measure(desktop, counter, arrange, repeat):
+    """Returns (seconds, Win32 calls, layout passes) for one arrangement."""
+    best = None
+    for i in range(repeat):
+        counter.Reset()
+        passes = desktop.layoutPasses
+        start = default_timer()
+        arrange()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best[0]:
+            best = (elapsed, counter.Total(), desktop.layoutPasses - passes)
+    return best
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default="5,20,100", help="comma-separated window counts",
+    )
+    parser.add_argument(
+        "--repeat", "-r", type=int, default=20,
+        help="arrange the windows this many times and keep the fastest",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    for size in [int(x) for x in args.sizes.split(",")]:
+        desktop = SimulatedDesktop()
+        hwnds = traces.Populate(desktop, size)
+        counter = CountingBackend(desktop)
+        plugin, eg = harness.LoadPlugin(counter, metrics=False)
+        layout = Grid([WindowInfo(hwnd) for hwnd in hwnds])
+
+        def OneByOne():
+            for windowInfo, rect in layout:
+                windowInfo.SetRect(rect)
+        oneTime, oneCalls, onePasses = Measure(
+            desktop, counter, OneByOne, max(1, args.repeat)
+        )
+        batchTime, batchCalls, batchPasses = Measure(
+            desktop, counter, lambda: plugin.ArrangeWindows(layout),
+            max(1, args.repeat)
+        )
+        plugin.__stop__()
+        scenarios["tile_%d" % size] = {
+            "setrect_us": oneTime * 1e6,
+            "setrect_win32_calls": oneCalls,
+            "setrect_layout_passes": onePasses,
+            "batch_us": batchTime * 1e6,
+            "batch_win32_calls": batchCalls,
+            "batch_layout_passes": batchPasses,
+        }
+    report = results.MakeResults("layout", scenarios)
+    results.PrintTable(report, (
+        "setrect_us", "setrect_win32_calls", "setrect_layout_passes",
+        "batch_us", "batch_win32_calls", "batch_layout_passes",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Memory benchmark: bytes per tracked window.
+
+Starts the plugin on simulated desktops of 1k, 10k and 100k windows and
+measures, with tracemalloc (Python 3 only), the memory held by the
+plugin's registries:
+- registry: right after start, when no WindowInfo has been built yet
+- materialized: after a WindowInfo (with title and class) has been built
+  for every window, as if each had been the subject of an event
+
+The simulated desktop hands out the same title strings it stores, so the
+cost of the title text itself isn't included.
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import sys
+
+import harness
+harness.InstallEg()
+
+import results
+import traces
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+METRICS = {
+    "registry_bytes_per_window": ("lower", False),
+    "materialized_bytes_per_window": ("lower", False),
+}
+
+def Measure(windows, processes):
+    desktop = SimulatedDesktop()
+    traces.Populate(desktop, windows, processes=processes)
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    plugin, eg = harness.LoadPlugin(desktop)
+    gc.collect()
+    registry = tracemalloc.get_traced_memory()[0] - base
+    for hwnd, processInfo in plugin.hwnds.items():
+        windowInfo = processInfo.GetWindowInfo(hwnd)
+        windowInfo.title
+        windowInfo.window_class
+    gc.collect()
+    materialized = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    tracked = len(plugin.hwnds) or 1
+    plugin.__stop__()
+    return {
+        "windows": tracked,
+        "processes": len(plugin.pids),
+        "registry_bytes_per_window": registry / float(tracked),
+        "materialized_bytes_per_window": materialized / float(tracked),
+    }
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default="1000,10000,100000",
+        help="comma-separated window counts",
+    )
+    parser.add_argument(
+        "--windows-per-process", type=int, default=10,
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+    if tracemalloc is None:
+        print("tracemalloc is needed (Python 3.4 or later)", file=sys.stderr)
+        return 2
+
+    scenarios = {}
+    for size in [int(x) for x in args.sizes.split(",")]:
+        processes = max(1, size // args.windows_per_process)
+        scenarios["windows_%d" % size] = Measure(size, processes)
+    report = results.MakeResults("memory", scenarios)
+    results.PrintTable(report, (
+        "windows", "processes", "registry_bytes_per_window",
+        "materialized_bytes_per_window",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Window query benchmark: FindWindows() against scanning the desktop.
+
+On simulated desktops of 100 and 1000 windows, answers the same questions
+with TaskMonitorPlus.FindWindows() and the way a macro would without it
+(list the top-level windows, then read each one's process name, class and
+title), and reports microseconds and Win32 calls per query. The index is
+built before timing starts; building it costs what one scan does.
+"""
+
+from __future__ import print_function
+
+import argparse
+import re
+import sys
+from fnmatch import fnmatch
+from os.path import splitext
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+import results
+import traces
+from TaskMonitorPlus.Backend import CountingBackend
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+
+METRICS = {
+    "index_us": ("lower", False),
+    "index_win32_calls": ("lower", True),
+}
+
+# name, FindWindows() arguments
+QUERIES = (
+    ("exe_and_class", {"exe": "outlook", "windowClass": "Class3"}),
+    ("exe_and_title_glob", {"exe": "outlook", "title": "*window 42*"}),
+    ("title_regex", {"title": r"Window 4\d$", "match": "regex"}),
+    ("title_words", {"words": "Window 42"}),
+)
+
+def Scan(backend, exe=None, windowClass=None, title=None, match="glob", words=None):
+    """What a macro does without the index. Returns a list of hwnds."""
+    if title is not None:
+        if match == "regex":
+            matcher = re.compile(title).search
+        else:
+            matcher = lambda x: fnmatch(x.lower(), title.lower())
+    found = []
+    for hwnd in backend.GetTopLevelWindowList(False):
+        name = splitext(backend.GetProcessName(backend.GetWindowPid(hwnd)))[0]
+        if exe is not None and name.lower() != exe:
+            continue
+        if windowClass is not None and backend.GetClassName(hwnd) != windowClass:
+            continue
+        text = backend.GetWindowText(hwnd)
+        if title is not None and not matcher(text):
+            continue
+        if words is not None and not set(words.lower().split()).issubset(
+            text.lower().split()
+        ):
+            continue
+        found.append(hwnd)
+    return found
+
+def Time(func, repeat):
+    best = None
+    for i in range(repeat):
+        start = default_timer()
+        result = func()
+        elapsed = default_timer() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best, result
+
+def Measure(windows, repeat):
+    desktop = SimulatedDesktop()
+    traces.Populate(desktop, windows, processes=max(1, windows // 10))
+    counter = CountingBackend(desktop)
+    plugin, eg = harness.LoadPlugin(counter, metrics=False)
+    plugin.GetWindowIndex()
+    scenarios = {}
+    for name, query in QUERIES:
+        counter.Reset()
+        indexTime, found = Time(lambda: plugin.FindWindows(**query), repeat)
+        indexCalls = counter.Total() // repeat
+        counter.Reset()
+        scanTime, scanned = Time(lambda: Scan(counter, **query), repeat)
+        scanCalls = counter.Total() // repeat
+        if sorted(x.hwnd for x in found) != sorted(scanned):
+            print("%s: FindWindows() and the scan disagree" % name, file=sys.stderr)
+        scenarios["%s_%d" % (name, windows)] = {
+            "matches": len(found),
+            "index_us": indexTime * 1e6,
+            "index_win32_calls": indexCalls,
+            "scan_us": scanTime * 1e6,
+            "scan_win32_calls": scanCalls,
+        }
+    plugin.__stop__()
+    return scenarios
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default="100,1000", help="comma-separated window counts",
+    )
+    parser.add_argument(
+        "--repeat", "-r", type=int, default=20,
+        help="run each query this many times and keep the fastest",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    for size in [int(x) for x in args.sizes.split(",")]:
+        scenarios.update(Measure(size, max(1, args.repeat)))
+    report = results.MakeResults("query", scenarios)
+    results.PrintTable(report, (
+        "matches", "index_us", "index_win32_calls", "scan_us",
+        "scan_win32_calls",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
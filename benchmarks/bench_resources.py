@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Resource sampling benchmark: the cost of one sample as processes add up.
+
+On simulated desktops with 100, 1000 and 10000 tracked processes (one
+window each), each using a little more CPU time and memory before every
+sample, reports the microseconds and Win32 calls per
+ResourceSampler.Sample() of them all, the microseconds per process, and the
+memory the samples take per process (RESOURCE_SAMPLES of each measure).
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+import results
+import traces
+from TaskMonitorPlus.Backend import CountingBackend
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+
+METRICS = {
+    "us_per_process": ("lower", False),
+    "win32_calls_per_sample": ("lower", True),
+}
+
+def SampleBytes(sampler):
+    """Bytes of sample arrays, per slot."""
+    total = sum(
+        x.itemsize * len(x) for x in (
+            sampler.cpu, sampler.workingSet, sampler.handles,
+            sampler.cpuTimes, sampler.counts, sampler.states,
+        )
+    )
+    return float(total) / max(1, len(sampler.creationTimes))
+
+def Measure(processes, samples):
+    desktop = SimulatedDesktop()
+    traces.Populate(desktop, processes, processes=processes)
+    counter = CountingBackend(desktop)
+    plugin, eg = harness.LoadPlugin(counter, resourceInterval=3600.0, metrics=False)
+    sampler = plugin.resourceSampler
+    pids = list(desktop.processes)
+    best = None
+    calls = 0
+    for i in range(samples):
+        for n, pid in enumerate(pids):
+            desktop.SetProcessResources(
+                pid, cpuTime=0.01 * i * (n % 5), workingSet=(n + i) << 16,
+                handles=100 + n % 50,
+            )
+        desktop.Advance(1.0)
+        counter.Reset()
+        start = default_timer()
+        for pid, kind in sampler.Sample(plugin.pids):
+            plugin.Emit(kind, plugin.pids[pid])
+        elapsed = default_timer() - start
+        calls += counter.Total()
+        if best is None or elapsed < best:
+            best = elapsed
+    tracked = sampler.Stats()["processes"]
+    plugin.__stop__()
+    return {
+        "tracked": tracked,
+        "sample_us": best * 1e6,
+        "us_per_process": best * 1e6 / tracked,
+        "win32_calls_per_sample": float(calls) / samples,
+        "bytes_per_process": SampleBytes(sampler),
+    }
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default="100,1000,10000", help="comma-separated process counts",
+    )
+    parser.add_argument(
+        "--samples", "-n", type=int, default=10,
+        help="samples per run; the fastest is kept",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    for size in [int(x) for x in args.sizes.split(",")]:
+        scenarios["processes_%d" % size] = Measure(size, max(1, args.samples))
+    report = results.MakeResults("resources", scenarios)
+    results.PrintTable(report, (
+        "tracked", "sample_us", "us_per_process", "win32_calls_per_sample",
+        "bytes_per_process",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
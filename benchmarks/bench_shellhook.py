@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Shell-hook throughput benchmark.
+
+Drives MyWndProc and the WM_APP handlers with generated message traces on a
+SimulatedDesktop and reports, per scenario: messages/sec, p50/p99
+per-message latency, Win32 calls per message, events emitted and peak
+memory allocated while processing the trace. In scenarios that enable
+title coalescing, worker threads or the focus-settle filter, the scheduler
+tasks and posted messages the plugin queues are run after each message,
+inside the timed region.
+
+    python benchmarks/bench_shellhook.py -o before.json
+    ... change the plugin ...
+    python benchmarks/bench_shellhook.py -c before.json
+"""
+
+from __future__ import print_function
+
+import argparse
+import gc
+import sys
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+import results
+import traces
+from TaskMonitorPlus.Backend import CountingBackend, GetBackend
+from TaskMonitorPlus.ProcessCache import processCache
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+from TaskMonitorPlus.WindowInfo import WindowInfo
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+METRICS = {
+    "msgs_per_sec": ("higher", False),
+    "p99_us": ("lower", False),
+    "win32_calls_per_msg": ("lower", True),
+    "peak_kib": ("lower", False),
+}
+
+def Prepare(generator, messages, settings):
+    desktop = SimulatedDesktop()
+    steps = generator(desktop, messages)
+    counter = CountingBackend(desktop)
+    plugin, eg = harness.LoadPlugin(counter, **settings)
+    plugin.events = []
+    counter.Reset()
+    processCache.hits = processCache.misses = processCache.reused = 0
+    WindowInfo.cacheStats.Reset()
+    resolved = [
+        (prepare, traces.Resolve(desktop, mesg), wParam, lParam)
+        for prepare, mesg, wParam, lParam in steps
+    ]
+    return plugin, eg, counter, resolved
+
+def Replay(eg, steps, tick=None, settle=None, timer=default_timer):
+    dispatch = eg.messageReceiver.Dispatch
+    latencies = []
+    append = latencies.append
+    for prepare, mesg, wParam, lParam in steps:
+        if prepare is not None:
+            prepare()
+        if mesg is None:
+            if tick is not None and latencies:
+                # Time passed: what came due is the last message's doing
+                start = timer()
+                tick()
+                latencies[-1] += timer() - start
+            continue
+        start = timer()
+        dispatch(mesg, wParam, lParam)
+        if tick is not None:
+            tick()
+        append(timer() - start)
+    if settle is not None:
+        settle()
+    return latencies
+
+def Tick():
+    harness.InstallEg().scheduler.RunDue()
+    harness.CurrentDesktop().PumpMessages()
+
+def NeedsTick(settings):
+    """
+    True if the plugin will schedule work or post messages to itself with
+    these settings.
+    """
+    return (
+        settings.get("titleCoalesceMode", "off") != "off" or
+        settings.get("workerThreads", 0) or
+        settings.get("focusSettle", 0)
+    )
+
+def Settler(plugin):
+    def Settle():
+        # Let whatever is still pending finish or come due (not timed)
+        if plugin.workerPool is not None:
+            plugin.workerPool.Join()
+            harness.CurrentDesktop().PumpMessages()
+        harness.Advance(GetBackend(), 3600.0)
+    return Settle
+
+def RunScenario(generator, messages, measureMemory=True, repeat=3, settings={}):
+    best = None
+    tick = Tick if NeedsTick(settings) else None
+    for i in range(max(1, repeat)):
+        # Keep the fastest run; the slower ones are mostly noise
+        plugin, eg, counter, steps = Prepare(generator, messages, settings)
+        gc.collect()
+        latencies = Replay(eg, steps, tick, tick and Settler(plugin))
+        coalescer = plugin.titleCoalescer
+        sequencer = plugin.sequencer
+        plugin.__stop__()
+        total = sum(latencies) or 1e-12
+        if best is None or total < best[0]:
+            best = (
+                total, latencies, plugin, counter, processCache.Stats(),
+                WindowInfo.cacheStats.Stats(),
+                coalescer.Stats() if coalescer else None,
+                plugin.eventFilter.Stats() if plugin.eventFilter else None,
+                sequencer.Stats() if sequencer else None,
+            )
+    (
+        total, latencies, plugin, counter, cacheStats, attributeStats,
+        coalescerStats, filterStats, sequencerStats,
+    ) = best
+    messages = len(latencies)
+    latencies.sort()
+    result = {
+        "messages": messages,
+        "events": len(plugin.events),
+        "msgs_per_sec": messages / total,
+        "p50_us": results.Percentile(latencies, 0.50) * 1e6,
+        "p99_us": results.Percentile(latencies, 0.99) * 1e6,
+        "win32_calls": counter.Total(),
+        "win32_calls_per_msg": counter.Total() / float(messages or 1),
+        "win32_calls_by_function": dict(counter.calls),
+        "process_cache_hits": cacheStats["hits"],
+        "process_cache_misses": cacheStats["misses"],
+        "process_cache_reused": cacheStats["reused"],
+        "attribute_cache_calls_avoided": attributeStats["win32CallsAvoided"],
+        "title_timeouts": attributeStats["timeouts"],
+    }
+    if coalescerStats is not None:
+        result["title_checks_deferred"] = coalescerStats["deferred"]
+        result["title_checks_flushed"] = coalescerStats["flushed"]
+    if sequencerStats is not None:
+        result["lookups_off_thread"] = sequencerStats["enriched"]
+        result["lookups_timed_out"] = sequencerStats["timeouts"]
+    if filterStats is not None:
+        result["events_suppressed"] = sum(x[1] for x in filterStats)
+    if measureMemory and tracemalloc is not None:
+        # Separate run: tracing allocations distorts the timings above
+        plugin, eg, counter, steps = Prepare(generator, messages, settings)
+        plugin.recordEvents = False
+        gc.collect()
+        tracemalloc.start()
+        Replay(eg, steps, tick, tick and Settler(plugin))
+        result["peak_kib"] = tracemalloc.get_traced_memory()[1] / 1024.0
+        tracemalloc.stop()
+        plugin.__stop__()
+    return result
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--messages", "-n", type=int, default=20000,
+        help="messages per scenario",
+    )
+    parser.add_argument(
+        "--scenario", "-s", action="append",
+        help="only run this scenario (may be repeated)",
+    )
+    parser.add_argument(
+        "--repeat", "-r", type=int, default=3,
+        help="time each scenario this many times and keep the fastest",
+    )
+    parser.add_argument(
+        "--no-memory", action="store_true",
+        help="skip the peak memory measurement",
+    )
+    parser.add_argument(
+        "--metrics", action="store_true",
+        help="run with \"Collect performance metrics\" on",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    for name, generator, settings in traces.SCENARIOS:
+        if args.scenario and name not in args.scenario:
+            continue
+        if args.metrics:
+            settings = dict(settings, metrics=True)
+        scenarios[name] = RunScenario(
+            generator, args.messages, not args.no_memory, args.repeat, settings
+        )
+    report = results.MakeResults("shellhook", scenarios)
+    results.PrintTable(report, (
+        "msgs_per_sec", "p50_us", "p99_us", "win32_calls_per_msg",
+        "events", "peak_kib",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Start-up benchmark: how long __start__ takes as the desktop grows.
+
+On simulated desktops of 100, 1000 and 10000 windows (over a tenth as many
+processes), reports the wall time and Win32 calls of TaskMonitorPlus's
+__start__, and of registering the windows already open, which happens on
+the message pump once __start__ has returned ("ready"). For comparison,
+"eager" is building the same registry in one go with EnumProcesses(), as
+__start__ used to.
+"""
+
+from __future__ import print_function
+
+import argparse
+import sys
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+import results
+import traces
+import TaskMonitorPlus
+from TaskMonitorPlus.Backend import CountingBackend, SetBackend
+from TaskMonitorPlus.ProcessCache import processCache
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+
+METRICS = {
+    "start_ms": ("lower", False),
+    "start_win32_calls": ("lower", True),
+    "ready_win32_calls": ("lower", True),
+}
+
+def Measure(windows, repeat):
+    desktop = SimulatedDesktop()
+    traces.Populate(desktop, windows, processes=max(1, windows // 10))
+    counter = CountingBackend(desktop)
+    best = {}
+    for i in range(repeat):
+        # Each start looks the process names up again, as after a restart
+        # of EventGhost
+        processCache.Clear()
+        counter.Reset()
+        started = default_timer()
+        plugin, eg = harness.StartPlugin(counter, metrics=False)
+        startTime = default_timer() - started
+        startCalls = counter.Total()
+        counter.Reset()
+        started = default_timer()
+        desktop.PumpMessages()
+        readyTime = default_timer() - started
+        readyCalls = counter.Total()
+        registered = len(plugin.hwnds)
+        plugin.__stop__()
+
+        processCache.Clear()
+        SetBackend(counter)
+        counter.Reset()
+        started = default_timer()
+        pids, hwnds = TaskMonitorPlus.EnumProcesses()
+        eagerTime = default_timer() - started
+        eagerCalls = counter.Total()
+        if registered != len(hwnds):
+            print("%d windows: %d registered, %d expected" % (
+                windows, registered, len(hwnds)
+            ), file=sys.stderr)
+        if not best or startTime + readyTime < best["start_ms"] + best["ready_ms"]:
+            best = {
+                "start_ms": startTime * 1000,
+                "start_win32_calls": startCalls,
+                "ready_ms": readyTime * 1000,
+                "ready_win32_calls": readyCalls,
+                "eager_ms": eagerTime * 1000,
+                "eager_win32_calls": eagerCalls,
+            }
+    return best
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--sizes", default="100,1000,10000", help="comma-separated window counts",
+    )
+    parser.add_argument(
+        "--repeat", "-r", type=int, default=5,
+        help="start this many times and keep the fastest",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    for size in [int(x) for x in args.sizes.split(",")]:
+        scenarios["start_%d" % size] = Measure(size, max(1, args.repeat))
+    report = results.MakeResults("start", scenarios)
+    results.PrintTable(report, (
+        "start_ms", "start_win32_calls", "ready_ms", "ready_win32_calls",
+        "eager_ms", "eager_win32_calls",
+    ))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Waiter benchmark: WaitForTitle() against polling the title.
+
+A macro thread waits for a window's title to change while the main thread
+changes it after a random delay, either by polling (reading the title
+every --interval seconds, as macros do without waiters) or with a blocking
+WaitForTitle(). Reports how long after the change the macro woke up and
+the Win32 calls the wait itself made; the plugin's handling of the title
+change costs the same either way and isn't counted.
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import sys
+import threading
+import time
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+import results
+from TaskMonitorPlus.Backend import CountingBackend
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+
+METRICS = {
+    "wake_ms": ("lower", False),
+    "win32_calls_per_wait": ("lower", True),
+}
+
+def Poll(backend, hwnd, title, interval, woke):
+    while backend.IsWindow(hwnd) and backend.GetWindowText(hwnd) != title:
+        time.sleep(interval)
+    woke.append(default_timer())
+
+def Wait(plugin, hwnd, title, woke):
+    plugin.WaitForTitle(title, hwnd=hwnd, match="exact", timeout=10.0)
+    woke.append(default_timer())
+
+def Measure(method, trials, interval, seed):
+    random.seed(seed)
+    desktop = SimulatedDesktop()
+    plugin, eg = harness.LoadPlugin(desktop, metrics=False)
+    pid = desktop.CreateProcess("app.exe")
+    hwnd = desktop.CreateWindow(pid, "Title 0", "App")
+    desktop.PumpMessages()
+    # The macro's calls only; the plugin's go to the desktop directly
+    counter = CountingBackend(desktop)
+    latencies = []
+    calls = 0
+    for i in range(trials):
+        title = "Title %d" % (i + 1)
+        woke = []
+        counter.Reset()
+        if method == "poll":
+            thread = threading.Thread(
+                target=Poll, args=(counter, hwnd, title, interval, woke)
+            )
+        else:
+            thread = threading.Thread(target=Wait, args=(plugin, hwnd, title, woke))
+        thread.start()
+        if method == "waiter":
+            while not plugin.waiters.count:
+                time.sleep(0.0001)
+        time.sleep(random.uniform(0, 2 * interval))
+        changed = default_timer()
+        desktop.SetWindowText(hwnd, title)
+        desktop.PumpMessages()
+        thread.join()
+        latencies.append(woke[0] - changed)
+        calls += counter.Total()
+    plugin.__stop__()
+    latencies.sort()
+    return {
+        "wake_ms": 1000.0 * sum(latencies) / trials,
+        "max_wake_ms": 1000.0 * latencies[-1],
+        "win32_calls_per_wait": float(calls) / trials,
+    }
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument(
+        "--trials", "-n", type=int, default=20, help="title changes waited for",
+    )
+    parser.add_argument(
+        "--interval", type=float, default=0.05,
+        help="seconds between polls of the title",
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = {}
+    for method in ("poll", "waiter"):
+        scenarios[method] = Measure(method, args.trials, args.interval, args.seed)
+    report = results.MakeResults("waiters", scenarios)
+    results.PrintTable(report, ("wake_ms", "max_wake_ms", "win32_calls_per_wait"))
+    return results.Report(report, args, METRICS)
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Loads TaskMonitorPlus outside of EventGhost, on top of a SimulatedDesktop.
+
+When EventGhost itself isn't importable, a minimal stand-in for the parts of
+the `eg` module the plugin uses is installed first: PluginBase (whose
+TriggerEvent records events instead of queueing them), messageReceiver
+(which dispatches messages synchronously), scheduler (which runs on the
+backend's clock) and the logging functions.
+"""
+
+from __future__ import print_function
+
+import heapq
+import itertools
+import os
+import sys
+import types
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+
+class StandInPluginBase(object):
+    """
+    Replacement for eg.PluginBase. Every triggered event is appended to
+    self.events as (suffix, payload). If logPayloads is set, repr() is
+    called on the payload the way EventGhost's log does.
+    """
+    logPayloads = True
+    recordEvents = True
+
+    def AddEvents(self, *args):
+        pass
+
+    def AddAction(self, *args, **kwargs):
+        pass
+
+    def TriggerEvent(self, suffix, payload=None):
+        if self.logPayloads and payload is not None:
+            repr(payload)
+        if self.recordEvents:
+            self.__dict__.setdefault("events", []).append((suffix, payload))
+
+
+class StandInMessageReceiver(object):
+    """
+    Replacement for eg.messageReceiver; Dispatch() delivers a message to
+    every handler registered for it, on the calling thread.
+    """
+    hwnd = 0x0F00
+
+    def __init__(self):
+        self.handlers = {}
+
+    def AddHandler(self, mesg, handler):
+        self.handlers.setdefault(mesg, []).append(handler)
+
+    def RemoveHandler(self, mesg, handler):
+        handlers = self.handlers.get(mesg, [])
+        if handler in handlers:
+            handlers.remove(handler)
+
+    def Dispatch(self, mesg, wParam, lParam, hwnd=None):
+        result = None
+        for handler in self.handlers.get(mesg, ()):
+            result = handler(hwnd or self.hwnd, mesg, wParam, lParam)
+        return result
+
+
+class StandInScheduler(object):
+    """
+    Replacement for eg.scheduler. Tasks are due according to the backend's
+    Now(), so on a SimulatedDesktop they only run when RunDue() is called
+    after the clock has been advanced.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = itertools.count()
+
+    def AddTask(self, delay, func, *args):
+        from TaskMonitorPlus.Backend import GetBackend
+        task = [GetBackend().Now() + delay, next(self.counter), func, args]
+        heapq.heappush(self.heap, task)
+        return task
+
+    def CancelTask(self, task):
+        # Raises ValueError for a task that already ran, like EventGhost's
+        self.heap.remove(task)
+        heapq.heapify(self.heap)
+
+    def RunDue(self):
+        from TaskMonitorPlus.Backend import GetBackend
+        now = GetBackend().Now()
+        heap = self.heap
+        count = 0
+        while heap and heap[0][0] <= now:
+            dummyWhen, dummyCount, func, args = heapq.heappop(heap)
+            func(*args)
+            count += 1
+        return count
+
+
+def _Ignore(*args, **kwargs):
+    pass
+
+
+def _PrintTraceback(*args, **kwargs):
+    import traceback
+    traceback.print_exc()
+
+
+def InstallEg():
+    """
+    Makes `import eg` work, returning the module in use.
+    """
+    if "eg" in sys.modules:
+        return sys.modules["eg"]
+    eg = types.ModuleType("eg")
+    eg.APP_NAME = "EventGhost"
+    eg.RegisterPlugin = _Ignore
+    eg.PluginBase = StandInPluginBase
+    eg.ActionBase = object
+    eg.messageReceiver = StandInMessageReceiver()
+    eg.scheduler = StandInScheduler()
+    eg.PrintNotice = _Ignore
+    eg.PrintDebugNotice = _Ignore
+    eg.PrintError = _Ignore
+    eg.PrintTraceback = _PrintTraceback
+    eg.SendKeys = _Ignore
+    sys.modules["eg"] = eg
+    return eg
+
+
+def _Desktop(backend):
+    # Unwrap CountingBackends
+    while hasattr(backend, "backend"):
+        backend = backend.backend
+    return backend
+
+
+def CurrentDesktop():
+    """Returns the simulated desktop under the backend in use."""
+    from TaskMonitorPlus.Backend import GetBackend
+    return _Desktop(GetBackend())
+
+
+def LoadPlugin(backend, **settings):
+    """
+    Installs `backend`, then creates and starts a TaskMonitorPlus instance
+    with the given settings (the keyword arguments of __start__), and lets
+    it register the windows already open, as the message loop would right
+    after the start. Returns (plugin, eg).
+    """
+    plugin, eg = StartPlugin(backend, **settings)
+    desktop = _Desktop(backend)
+    if hasattr(desktop, "PumpMessages"):
+        desktop.PumpMessages()
+    return plugin, eg
+
+
+def StartPlugin(backend, **settings):
+    """Like LoadPlugin(), but returns as soon as __start__ does."""
+    eg = InstallEg()
+    from TaskMonitorPlus.Backend import SetBackend
+    import TaskMonitorPlus
+    SetBackend(backend)
+    receiver = eg.messageReceiver
+    receiver.handlers.clear()
+    if isinstance(receiver, StandInMessageReceiver):
+        del eg.scheduler.heap[:]
+        desktop = _Desktop(backend)
+        if hasattr(desktop, "messageSink"):
+            desktop.messageSink = (
+                lambda hwnd, mesg, wParam, lParam:
+                receiver.Dispatch(mesg, wParam, lParam, hwnd)
+            )
+    plugin = TaskMonitorPlus.TaskMonitorPlus()
+    plugin.__start__(**settings)
+    return plugin, eg
+
+
+def Advance(backend, seconds=0.0):
+    """
+    Moves a simulated desktop's clock on, runs the scheduler tasks that
+    have come due and delivers the messages they posted.
+    """
+    eg = InstallEg()
+    desktop = _Desktop(backend)
+    desktop.Advance(seconds)
+    eg.scheduler.RunDue()
+    desktop.PumpMessages()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
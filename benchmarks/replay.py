@@ -0,0 +1,241 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Replays captures of shell-hook traffic and checks the events.
+
+A capture (see TaskMonitorPlus.Capture; set "Capture window messages to
+this file" in the plugin's settings) is fed back through the plugin's
+handlers on a SimulatedDesktop rebuilt from it, with the settings it was
+taken with. Before each message, the desktop's clock is set to the
+message's time and the window it's about is made to look the way it did.
+The plugin's scheduled calls, and the results of its worker threads, are
+run where the capture shows they ran. The events the plugin triggers must
+be the ones it triggered when the capture was taken, in the same order;
+the first difference is reported and the exit code is 1. Messages/sec are
+reported too, so a capture also works as a benchmark.
+
+    python benchmarks/replay.py capture.jsonl [capture2.jsonl ...]
+    python benchmarks/replay.py --realtime capture.jsonl
+    python benchmarks/replay.py --record alt_tab_storm -n 5000 capture.jsonl
+
+--record makes a capture from one of the scenarios of bench_shellhook.py.
+Captures taken with worker threads, the missed-window check, the process
+monitor or resource sampling may not replay exactly: lookups finish in a
+different order, and the desktop (and the processes running) is only known
+as far as the messages showed it.
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+import time
+from timeit import default_timer
+
+import harness
+harness.InstallEg()
+
+import bench_shellhook
+import results
+import traces
+from TaskMonitorPlus.Capture import (
+    ApplyWindow, BuildDesktop, CaptureError, ReadCapture, SHELLHOOK, WINEVENT,
+)
+from TaskMonitorPlus.Constants import WM_APP
+from TaskMonitorPlus.WindowInfo import WindowInfo
+
+METRICS = {
+    "msgs_per_sec": ("higher", False),
+    "mismatches": ("lower", True),
+}
+
+def Record(scenario, messages, path):
+    """Runs a bench_shellhook.py scenario with capturing on."""
+    for name, generator, settings in traces.SCENARIOS:
+        if name == scenario:
+            break
+    else:
+        raise SystemExit("unknown scenario: %s" % scenario)
+    settings = dict(settings, captureFile=path)
+    plugin, eg, counter, steps = bench_shellhook.Prepare(
+        generator, messages, settings
+    )
+    tick = bench_shellhook.Tick if bench_shellhook.NeedsTick(settings) else None
+    def Settle():
+        # Long enough for anything pending, short enough for --realtime
+        if plugin.workerPool is not None:
+            plugin.workerPool.Join()
+            harness.CurrentDesktop().PumpMessages()
+        harness.Advance(harness.CurrentDesktop(), 10.0)
+    bench_shellhook.Replay(eg, steps, tick, Settle)
+    plugin.__stop__()
+
+def Replay(path, realtime=False, timer=default_timer):
+    """
+    Replays a capture. Returns (seconds, messages, expected events, events),
+    events being lists of (suffix, hwnd).
+    """
+    header, records = ReadCapture(path)
+    settings = dict(
+        (key, value) for key, value in header["settings"].items()
+        if not key.endswith("File")
+    )
+    desktop = BuildDesktop(header)
+    WindowInfo.cacheStats.Reset()
+    plugin, eg = harness.LoadPlugin(desktop, **settings)
+    plugin.events = []
+    shellHook = desktop.RegisterWindowMessage("SHELLHOOK")
+    winEvent = desktop.RegisterWindowMessage("TaskMonitorPlus.WinEvent")
+    dispatch = eg.messageReceiver.Dispatch
+    runDue = eg.scheduler.RunDue
+    pump = desktop.PumpMessages
+    pool = plugin.workerPool
+    expected = []
+    messages = 0
+    started = timer()
+    firstTime = None
+    for record in records:
+        if record[0] == "E":
+            kind, exe, hwnd = record[2:]
+            expected.append(("%s.%s" % (kind, exe), hwnd))
+            continue
+        when = record[1]
+        if realtime:
+            if firstTime is None:
+                firstTime = when
+            delay = (when - firstTime) - (timer() - started)
+            if delay > 0:
+                time.sleep(delay)
+        if when > desktop.clock:
+            desktop.clock = when
+        if record[0] == "C":
+            runDue()
+            if pool is not None:
+                pool.Join()
+            pump()
+            continue
+        dummyTag, when, mesg, wParam, lParam, state = record
+        if mesg == SHELLHOOK:
+            ApplyWindow(desktop, lParam, state)
+            dispatch(shellHook, wParam, lParam)
+        elif mesg == WINEVENT:
+            ApplyWindow(desktop, lParam, state)
+            dispatch(winEvent, wParam, lParam)
+        else:
+            ApplyWindow(desktop, wParam, state)
+            dispatch(WM_APP + mesg, wParam, lParam)
+        messages += 1
+    if pool is not None:
+        pool.Join()
+    harness.Advance(desktop, 3600.0)
+    seconds = timer() - started
+    plugin.__stop__()
+    events = [
+        (suffix, getattr(payload, "hwnd", None))
+        for suffix, payload in plugin.events
+    ]
+    return seconds, messages, expected, events
+
+def FirstDifference(expected, events):
+    """Returns the index of the first event that differs, or None."""
+    for i, (want, got) in enumerate(zip(expected, events)):
+        if want != got:
+            return i
+    if len(expected) != len(events):
+        return min(len(expected), len(events))
+    return None
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("captures", nargs="+", help="capture files")
+    parser.add_argument(
+        "--realtime", action="store_true",
+        help="replay at the recorded speed instead of as fast as possible",
+    )
+    parser.add_argument(
+        "--repeat", "-r", type=int, default=3,
+        help="replay each capture this many times and keep the fastest",
+    )
+    parser.add_argument(
+        "--record", metavar="SCENARIO",
+        help="make a capture from this bench_shellhook.py scenario instead",
+    )
+    parser.add_argument(
+        "--messages", "-n", type=int, default=20000,
+        help="messages in a capture made with --record",
+    )
+    results.AddArguments(parser)
+    args = parser.parse_args(argv)
+
+    if args.record:
+        Record(args.record, args.messages, args.captures[0])
+        return 0
+
+    scenarios = {}
+    failed = False
+    for path in args.captures:
+        best = None
+        try:
+            for i in range(1 if args.realtime else max(1, args.repeat)):
+                run = Replay(path, args.realtime)
+                if best is None or run[0] < best[0]:
+                    best = run
+        except CaptureError as exc:
+            print(exc, file=sys.stderr)
+            return 2
+        seconds, messages, expected, events = best
+        index = FirstDifference(expected, events)
+        if index is not None:
+            failed = True
+            print(
+                "%s: events differ from event %d: expected %r, got %r" % (
+                    path, index, expected[index:index + 3], events[index:index + 3]
+                ),
+                file=sys.stderr,
+            )
+        scenarios[os.path.basename(path)] = {
+            "messages": messages,
+            "events": len(events),
+            "expected_events": len(expected),
+            "mismatches": 0 if index is None else 1,
+            "msgs_per_sec": messages / (seconds or 1e-12),
+        }
+    report = results.MakeResults("replay", scenarios)
+    results.PrintTable(report, (
+        "messages", "msgs_per_sec", "events", "expected_events", "mismatches",
+    ))
+    status = results.Report(report, args, METRICS)
+    return 1 if failed else status
+
+if __name__ == "__main__":
+    sys.exit(Main())
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
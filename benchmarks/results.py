@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Saving benchmark results and comparing them against an earlier run.
+
+A result file is JSON: {"benchmark": name, "format": 1, "meta": {...},
+"scenarios": {scenario: {metric: value}}}. Each benchmark declares which
+metrics are compared and in which direction ("higher" is better, or
+"lower" is better). Counted metrics, such as Win32 calls, are exact and
+are compared without tolerance.
+"""
+
+from __future__ import print_function
+
+import json
+import platform
+import sys
+import time
+
+FORMAT = 1
+
+def Percentile(sortedValues, fraction):
+    if not sortedValues:
+        return 0.0
+    index = int(round(fraction * (len(sortedValues) - 1)))
+    return sortedValues[index]
+
+def MakeResults(benchmark, scenarios):
+    return {
+        "benchmark": benchmark,
+        "format": FORMAT,
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "scenarios": scenarios,
+    }
+
+def Save(results, path):
+    with open(path, "w") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+def Load(path):
+    with open(path) as f:
+        return json.load(f)
+
+def Compare(old, new, metrics, tolerance):
+    """
+    Returns a list of (scenario, metric, old, new) that got worse.
+    `metrics` maps metric name to (direction, exact), and `tolerance` is
+    the allowed relative change for the metrics that aren't exact.
+    """
+    regressions = []
+    for scenario, newValues in sorted(new["scenarios"].items()):
+        oldValues = old["scenarios"].get(scenario)
+        if oldValues is None:
+            continue
+        for metric, (direction, exact) in sorted(metrics.items()):
+            if metric not in oldValues or metric not in newValues:
+                continue
+            before, after = oldValues[metric], newValues[metric]
+            allowed = 1e-9 if exact else tolerance
+            if direction == "higher":
+                worse = after < before * (1.0 - allowed)
+            else:
+                worse = after > before * (1.0 + allowed) + 1e-9
+            if worse:
+                regressions.append((scenario, metric, before, after))
+    return regressions
+
+def PrintTable(results, columns):
+    names = sorted(results["scenarios"])
+    width = max([len(x) for x in names] + [8])
+    print("%-*s" % (width, "scenario"), *["%14s" % c for c in columns])
+    for name in names:
+        values = results["scenarios"][name]
+        cells = []
+        for column in columns:
+            value = values.get(column, "")
+            if isinstance(value, float):
+                cells.append("%14.2f" % value)
+            else:
+                cells.append("%14s" % (value,))
+        print("%-*s" % (width, name), *cells)
+
+def Report(results, args, metrics):
+    """
+    Saves and compares `results` according to the standard --output,
+    --compare and --tolerance options. Returns the process exit code.
+    """
+    if args.output:
+        Save(results, args.output)
+    if not args.compare:
+        return 0
+    regressions = Compare(Load(args.compare), results, metrics, args.tolerance)
+    for scenario, metric, before, after in regressions:
+        print(
+            "REGRESSION %s %s: %s -> %s" % (scenario, metric, before, after),
+            file=sys.stderr,
+        )
+    return 1 if regressions else 0
+
+def AddArguments(parser):
+    parser.add_argument(
+        "--output", "-o", help="save results as JSON to this file"
+    )
+    parser.add_argument(
+        "--compare", "-c", help="compare against results saved earlier"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.10,
+        help="allowed relative slowdown before reporting a regression",
+    )
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,294 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Generated message traces for the benchmarks.
+
+Each generator populates a SimulatedDesktop (before the plugin starts) and
+returns a list of steps. A step is (prepare, mesg, wParam, lParam):
+`prepare` is None or a callable that changes the desktop so it matches the
+message (it isn't timed), and the rest is what gets dispatched to
+eg.messageReceiver. `mesg` is either the name "SHELLHOOK" or a WM_APP
+offset number, resolved by Resolve(), or None for a step that only
+prepares.
+
+SCENARIOS lists (name, generator, settings); settings are passed to the
+plugin's __start__.
+"""
+
+import os
+import random
+import tempfile
+
+from TaskMonitorPlus.Constants import (
+    HSHELL_FLASH, HSHELL_REDRAW, HSHELL_WINDOWACTIVATED,
+    HSHELL_WINDOWCREATED, HSHELL_WINDOWDESTROYED, WM_APP,
+)
+
+SHELLHOOK = "SHELLHOOK"
+EXE_NAMES = (
+    "chrome", "explorer2", "outlook", "code", "putty", "vlc", "winword",
+    "excel", "slack", "cmd", "mintty", "firefox", "steam", "spotify",
+    "devenv", "notepad++", "msbuild", "qbittorrent", "teams", "mmc",
+)
+
+def Resolve(desktop, mesg):
+    if mesg is None:
+        return None
+    if mesg == SHELLHOOK:
+        return desktop.RegisterWindowMessage(SHELLHOOK)
+    return WM_APP + mesg
+
+def Populate(desktop, count, processes=10, visible=True):
+    """Creates `count` windows spread over `processes` processes."""
+    pids = [
+        desktop.CreateProcess(EXE_NAMES[i % len(EXE_NAMES)] + ".exe")
+        for i in range(processes)
+    ]
+    return [
+        desktop.CreateWindow(
+            pids[i % processes],
+            "Window %d" % i,
+            "Class%d" % (i % 7),
+            visible=visible,
+            notify=False,
+        )
+        for i in range(count)
+    ]
+
+def _Activate(desktop, hwnd, elapsed=0.0):
+    def Prepare():
+        desktop.Advance(elapsed)
+        desktop.activeWindow = desktop.focusWindow = hwnd
+    return Prepare
+
+def _Show(desktop, hwnd):
+    def Prepare():
+        desktop.windows[hwnd].visible = True
+    return Prepare
+
+def _Destroy(desktop, hwnd):
+    def Prepare():
+        desktop.windows.pop(hwnd, None)
+    return Prepare
+
+def _Retitle(desktop, hwnd, title, elapsed=0.0):
+    def Prepare():
+        desktop.Advance(elapsed)
+        desktop.windows[hwnd].title = title
+    return Prepare
+
+def _Reuse(desktop, pid, name):
+    def Prepare():
+        desktop.processes.pop(pid, None)
+        desktop.creationTimes.pop(pid, None)
+        desktop.CreateProcess(name, pid=pid)
+    return Prepare
+
+def AltTabStorm(desktop, messages, windows=50, seed=1):
+    """The user holds alt-tab and cycles through many windows."""
+    rnd = random.Random(seed)
+    hwnds = Populate(desktop, windows)
+    steps = []
+    for i in range(messages):
+        hwnd = hwnds[rnd.randrange(len(hwnds))]
+        steps.append(
+            (_Activate(desktop, hwnd), SHELLHOOK, HSHELL_WINDOWACTIVATED, hwnd)
+        )
+    return steps
+
+def _Pause(desktop, elapsed):
+    def Prepare():
+        desktop.Advance(elapsed)
+    return Prepare
+
+def AltTabBursts(desktop, messages, windows=50, seed=7, burst=8, step=0.06, dwell=3.0):
+    """
+    The user alt-tabs through a few windows at a time (`step` seconds
+    apart), then stays on the last one for `dwell` seconds.
+    """
+    rnd = random.Random(seed)
+    hwnds = Populate(desktop, windows)
+    steps = []
+    for i in range(messages):
+        hwnd = hwnds[rnd.randrange(len(hwnds))]
+        steps.append(
+            (
+                _Activate(desktop, hwnd, step),
+                SHELLHOOK, HSHELL_WINDOWACTIVATED, hwnd,
+            )
+        )
+        if i % burst == burst - 1:
+            steps.append((_Pause(desktop, dwell), None, 0, 0))
+    return steps
+
+def MassWindowCreation(desktop, messages, processes=40):
+    """Many windows (and processes) appear, then all of them close."""
+    count = max(1, messages // 2)
+    hwnds = Populate(desktop, count, processes=processes, visible=False)
+    steps = [
+        (_Show(desktop, hwnd), SHELLHOOK, HSHELL_WINDOWCREATED, hwnd)
+        for hwnd in hwnds
+    ]
+    steps.extend(
+        (_Destroy(desktop, hwnd), SHELLHOOK, HSHELL_WINDOWDESTROYED, hwnd)
+        for hwnd in hwnds
+    )
+    return steps
+
+def TitleRedrawFlood(desktop, messages, windows=20, seed=2, rate=500.0):
+    """
+    Progress-bar style title updates, `rate` redraws per second in all.
+    About half of the redraws don't actually change the title, as happens
+    with real applications.
+    """
+    rnd = random.Random(seed)
+    hwnds = Populate(desktop, windows)
+    progress = dict.fromkeys(hwnds, 0)
+    steps = []
+    for i in range(messages):
+        hwnd = hwnds[rnd.randrange(len(hwnds))]
+        if rnd.random() < 0.5:
+            progress[hwnd] = (progress[hwnd] + 1) % 101
+        title = "Downloading... %d%%" % progress[hwnd]
+        steps.append(
+            (
+                _Retitle(desktop, hwnd, title, 1.0 / rate),
+                SHELLHOOK, HSHELL_REDRAW, hwnd,
+            )
+        )
+    return steps
+
+def HungWindowTitles(desktop, messages, windows=20, hung=2, every=50, seed=6):
+    """
+    A title-redraw flood where a couple of the windows are hung: reading
+    their title blocks (for desktop.hangTime). One redraw in `every` is for
+    a hung window.
+    """
+    rnd = random.Random(seed)
+    hwnds = Populate(desktop, windows)
+    for hwnd in hwnds[:hung]:
+        desktop.SetWindowHung(hwnd)
+    steps = []
+    for i in range(messages):
+        if i % every == every - 1:
+            hwnd = hwnds[rnd.randrange(hung)]
+        else:
+            hwnd = hwnds[rnd.randrange(hung, len(hwnds))]
+        title = "Step %d" % (i // 3)
+        steps.append(
+            (_Retitle(desktop, hwnd, title, 0.002), SHELLHOOK, HSHELL_REDRAW, hwnd)
+        )
+    return steps
+
+def FlashStorm(desktop, messages, windows=20, seed=3):
+    """Windows flash for attention and the user switches between them."""
+    rnd = random.Random(seed)
+    hwnds = Populate(desktop, windows)
+    steps = []
+    for i in range(messages):
+        hwnd = hwnds[rnd.randrange(len(hwnds))]
+        if rnd.random() < 0.8:
+            steps.append((None, SHELLHOOK, HSHELL_FLASH, hwnd))
+        else:
+            steps.append(
+                (_Activate(desktop, hwnd), SHELLHOOK, HSHELL_WINDOWACTIVATED, hwnd)
+            )
+    return steps
+
+def ProcessChurn(desktop, messages, processes=30, seed=5):
+    """
+    Applications open and close their only window over and over; now and
+    then one exits and its pid is reused by a different executable.
+    """
+    rnd = random.Random(seed)
+    pids = [
+        desktop.CreateProcess(EXE_NAMES[i % len(EXE_NAMES)] + ".exe")
+        for i in range(processes)
+    ]
+    steps = []
+    for i in range(max(1, messages // 2)):
+        pid = pids[rnd.randrange(len(pids))]
+        if rnd.random() < 0.05:
+            steps.append((_Reuse(desktop, pid, EXE_NAMES[i % 7] + "_new.exe"), None, 0, 0))
+        hwnd = desktop.CreateWindow(pid, "Dialog %d" % i, visible=False, notify=False)
+        steps.append((_Show(desktop, hwnd), SHELLHOOK, HSHELL_WINDOWCREATED, hwnd))
+        steps.append((_Destroy(desktop, hwnd), SHELLHOOK, HSHELL_WINDOWDESTROYED, hwnd))
+    return steps
+
+def DirectFocusAndDestroy(desktop, messages, windows=200, seed=4):
+    """
+    The WM_APP+1 (focus) and WM_APP+3 (destroyed) messages posted to
+    eg.messageReceiver by other components, bypassing the shell hook.
+    """
+    rnd = random.Random(seed)
+    hwnds = Populate(desktop, windows)
+    alive = list(hwnds)
+    steps = []
+    for i in range(messages):
+        if len(alive) > 1 and rnd.random() < 0.1:
+            hwnd = alive.pop(rnd.randrange(len(alive)))
+            steps.append((_Destroy(desktop, hwnd), 3, hwnd, 0))
+        else:
+            hwnd = alive[rnd.randrange(len(alive))]
+            steps.append((_Activate(desktop, hwnd), 1, hwnd, 0))
+    return steps
+
+SCENARIOS = (
+    ("alt_tab_storm", AltTabStorm, {}),
+    ("mass_window_creation", MassWindowCreation, {}),
+    ("title_redraw_flood", TitleRedrawFlood, {}),
+    ("title_redraw_flood_coalesced", TitleRedrawFlood, {
+        "titleCoalesceMode": "both",
+        "titleCoalesceInterval": 250,
+    }),
+    ("alt_tab_storm_metrics", AltTabStorm, {"metrics": True}),
+    ("alt_tab_storm_filtered", AltTabStorm, {
+        "eventFilter": "allow exe=chrome\ndeny kind=Activated,Deactivated",
+    }),
+    ("title_redraw_flood_filtered", TitleRedrawFlood, {
+        "eventFilter": "deny kind=TitleChanged",
+    }),
+    ("hung_windows_blocking", HungWindowTitles, {"lookupTimeout": 0}),
+    ("hung_windows_timeout", HungWindowTitles, {}),
+    ("hung_windows_workers", HungWindowTitles, {"workerThreads": 2}),
+    ("flash_storm", FlashStorm, {}),
+    ("direct_focus_destroy", DirectFocusAndDestroy, {}),
+    ("process_churn", ProcessChurn, {}),
+    ("alt_tab_bursts", AltTabBursts, {}),
+    ("alt_tab_bursts_settled", AltTabBursts, {"focusSettle": 150}),
+    ("alt_tab_storm_journal", AltTabStorm, {
+        "journalFile": os.path.join(
+            tempfile.gettempdir(), "TaskMonitorPlus-bench.journal"
+        ),
+        "journalSize": 1,
+    }),
+)
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Shared set-up for the tests: loads the plugin through the benchmarks'
+harness, on top of a SimulatedDesktop, so the tests run without EventGhost
+or Windows.
+"""
+
+import os
+import sys
+import unittest
+
+BENCHMARKS = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"
+)
+if BENCHMARKS not in sys.path:
+    sys.path.insert(0, BENCHMARKS)
+
+import harness
+harness.InstallEg()
+
+from TaskMonitorPlus.SimulatedDesktop import SimulatedDesktop
+
+
+class PluginTestCase(unittest.TestCase):
+    """
+    Gives each test a fresh desktop (self.desktop) and stops the plugin
+    started with Load() when the test ends.
+    """
+
+    def setUp(self):
+        self.desktop = SimulatedDesktop()
+        self.plugin = None
+
+    def tearDown(self):
+        if self.plugin is not None:
+            self.plugin.__stop__()
+            self.plugin = None
+
+    def Load(self, **settings):
+        """Starts the plugin with these settings and lets it register."""
+        self.plugin = harness.LoadPlugin(self.desktop, **settings)[0]
+        return self.plugin
+
+    def Settle(self):
+        """Lets the workers finish, and delivers what they posted."""
+        if self.plugin.workerPool is not None:
+            self.plugin.workerPool.Join()
+        self.desktop.PumpMessages()
+
+    def Advance(self, seconds):
+        harness.Advance(self.desktop, seconds)
+
+    def Events(self, prefix=""):
+        """
+        Returns and forgets the (suffix, payload) pairs of the events
+        triggered so far whose suffix starts with prefix.
+        """
+        events = getattr(self.plugin, "events", [])
+        self.plugin.events = []
+        return [x for x in events if x[0].startswith(prefix)]
+
+    def Kinds(self, prefix=""):
+        """Like Events(), but returns just the suffixes."""
+        return [suffix for suffix, dummyPayload in self.Events(prefix)]
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
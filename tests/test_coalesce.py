@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""TitleChanged flood control and focus settling."""
+
+import unittest
+
+import support
+
+
+class TitleCoalescerTest(support.PluginTestCase):
+
+    def Flood(self, count, spacing, **settings):
+        """
+        Retitles a window `count` times, `spacing` seconds apart. Returns
+        how many TitleChanged events came with each retitle, followed by
+        how many came once it stopped, and the last title reported.
+        """
+        desktop = self.desktop
+        self.Load(**settings)
+        pid = desktop.CreateProcess("app.exe")
+        hwnd = desktop.CreateWindow(pid, "Title", "C")
+        desktop.PumpMessages()
+        self.Events()
+        counts = []
+        title = None
+        for i in range(count + 1):
+            if i < count:
+                desktop.SetWindowText(hwnd, "Title %d" % i)
+                desktop.PumpMessages()
+                self.Advance(spacing)
+            else:
+                self.Advance(5.0)
+            events = self.Events("TitleChanged")
+            counts.append(len(events))
+            if events:
+                title = events[-1][1].title
+        return counts, title
+
+    def testOff(self):
+        counts, title = self.Flood(10, 0.05)
+        self.assertEqual(counts, [1] * 10 + [0])
+        self.assertEqual(title, "Title 9")
+
+    def testLeading(self):
+        counts, title = self.Flood(
+            10, 0.05, titleCoalesceMode="leading", titleCoalesceInterval=500
+        )
+        self.assertEqual(counts, [1] + [0] * 9 + [1])
+        self.assertEqual(title, "Title 9")
+
+    def testTrailing(self):
+        counts, title = self.Flood(
+            10, 0.05, titleCoalesceMode="trailing", titleCoalesceInterval=500
+        )
+        self.assertEqual(counts, [0] * 10 + [1])
+        self.assertEqual(title, "Title 9")
+
+    def testBoth(self):
+        counts, title = self.Flood(
+            10, 0.05, titleCoalesceMode="both", titleCoalesceInterval=500
+        )
+        self.assertEqual(counts, [1] + [0] * 9 + [1])
+        self.assertEqual(title, "Title 9")
+
+    def testTrailingWaitsForQuiet(self):
+        # A flood that never pauses for the interval is reported once,
+        # however long it lasts
+        counts, title = self.Flood(
+            40, 0.1, titleCoalesceMode="trailing", titleCoalesceInterval=500
+        )
+        self.assertEqual(sum(counts), 1)
+        self.assertEqual(title, "Title 39")
+
+    def testMaxRate(self):
+        # 4 seconds of retitling, at no more than 2 checks a second
+        counts, title = self.Flood(40, 0.1, titleMaxRate=2)
+        self.assertEqual(counts[0], 1)
+        self.assertTrue(sum(counts) <= 10, counts)
+        self.assertEqual(title, "Title 39")
+
+    def testMaxRateCapsTrailing(self):
+        # The cap still applies to a mode that checks on every pause
+        counts, title = self.Flood(
+            20, 0.3, titleCoalesceMode="trailing", titleCoalesceInterval=200,
+            titleMaxRate=1
+        )
+        self.assertTrue(sum(counts) <= 7, counts)
+        self.assertEqual(title, "Title 19")
+
+    def testOverrides(self):
+        counts, dummyTitle = self.Flood(
+            10, 0.05, titleCoalesceMode="trailing", titleCoalesceInterval=500,
+            titleCoalesceOverrides="APP=off"
+        )
+        self.assertEqual(counts, [1] * 10 + [0])
+
+
+class FocusSettlerTest(support.PluginTestCase):
+
+    def testAltTab(self):
+        desktop = self.desktop
+        self.Load(focusSettle=150)
+        pid = desktop.CreateProcess("app.exe")
+        hwnds = [
+            desktop.CreateWindow(pid, "Window %d" % i, "C") for i in range(4)
+        ]
+        desktop.PumpMessages()
+        self.Advance(1.0)
+        self.Events()
+        suppressed = self.plugin.focusSettler.Stats()["suppressed"]
+        # The last window created has the focus already
+        for hwnd in hwnds[:3]:
+            desktop.SetForegroundWindow(hwnd)
+            desktop.PumpMessages()
+            self.Advance(0.05)
+        self.Advance(1.0)
+        events = self.Events()
+        self.assertEqual(
+            [(suffix, payload.hwnd) for suffix, payload in events],
+            [("Deactivated.app", hwnds[3]), ("Activated.app", hwnds[2])]
+        )
+        self.assertEqual(
+            self.plugin.focusSettler.Stats()["suppressed"], suppressed + 2
+        )
+
+    def testClosedBeforeSettling(self):
+        desktop = self.desktop
+        self.Load(focusSettle=150)
+        pid = desktop.CreateProcess("app.exe")
+        desktop.CreateWindow(pid, "One", "C")
+        desktop.PumpMessages()
+        self.Advance(1.0)
+        self.Events()
+        hwnd = desktop.CreateWindow(pid, "Two", "C")
+        desktop.SetForegroundWindow(hwnd)
+        desktop.PumpMessages()
+        desktop.DestroyWindow(hwnd)
+        desktop.PumpMessages()
+        self.Advance(1.0)
+        self.assertEqual(self.Events("Activated"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""Event ordering while lookups run on the worker pool."""
+
+import threading
+import unittest
+
+import support
+
+from TaskMonitorPlus.Enrichment import EventSequencer, WorkerPool
+
+
+class EventSequencerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.pool = WorkerPool(2)
+        self.posted = []
+        self.postedLock = threading.Lock()
+        self.tasks = []
+        self.emitted = []
+        self.sequencer = EventSequencer(
+            self.Emit, self.pool, self.PostCall, self.CallLater,
+            self.CancelCall, 5.0
+        )
+
+    def tearDown(self):
+        self.pool.Stop()
+
+    def Emit(self, kind, processInfo, hwnd, windowInfo):
+        self.emitted.append(kind)
+
+    def PostCall(self, func, args):
+        # Called on the workers; the calls run on the test's thread, as
+        # they would on the message pump
+        with self.postedLock:
+            self.posted.append((func, args))
+
+    def CallLater(self, delay, func, *args):
+        task = [func, args]
+        self.tasks.append(task)
+        return task
+
+    def CancelCall(self, task):
+        self.tasks.remove(task)
+
+    def Pump(self):
+        self.pool.Join()
+        with self.postedLock:
+            posted = self.posted[:]
+            del self.posted[:]
+        for func, args in posted:
+            func(*args)
+
+    def Expire(self):
+        tasks = self.tasks[:]
+        del self.tasks[:]
+        for func, args in tasks:
+            func(*args)
+
+    def testOrderKept(self):
+        # The first lookup finishes last, yet its event still goes first
+        firstGate = threading.Event()
+        secondDone = threading.Event()
+
+        def First():
+            firstGate.wait(5.0)
+            return "first"
+
+        def Second():
+            secondDone.set()
+            return "second"
+
+        sequencer = self.sequencer
+        sequencer.Add("One", None, fetch=First, apply=lambda result: True)
+        sequencer.Add("Two", None, fetch=Second, apply=lambda result: True)
+        sequencer.Add("Three", None)
+        self.assertTrue(secondDone.wait(5.0))
+        with self.postedLock:
+            posted = self.posted[:]
+            del self.posted[:]
+        for func, args in posted:
+            func(*args)
+        self.assertEqual(self.emitted, [])
+        firstGate.set()
+        self.Pump()
+        self.assertEqual(self.emitted, ["One", "Two", "Three"])
+        self.assertEqual(sequencer.Stats()["pending"], 0)
+        self.assertEqual(sequencer.Stats()["enriched"], 2)
+        self.assertEqual(self.tasks, [])
+
+    def testApplySeesResult(self):
+        results = []
+
+        def Apply(result):
+            results.append(result)
+            return result != "drop"
+
+        sequencer = self.sequencer
+        sequencer.Add("One", None, fetch=lambda: "keep", apply=Apply)
+        sequencer.Add("Two", None, fetch=lambda: "drop", apply=Apply)
+        sequencer.Add("Three", None, fetch=lambda: "keep", apply=Apply)
+        self.Pump()
+        self.assertEqual(sorted(results), ["drop", "keep", "keep"])
+        self.assertEqual(self.emitted, ["One", "Three"])
+
+    def testTimeout(self):
+        gate = threading.Event()
+        results = []
+
+        def Apply(result):
+            results.append(result)
+            return True
+
+        sequencer = self.sequencer
+        sequencer.Add("One", None, fetch=gate.wait, args=(5.0,), apply=Apply)
+        sequencer.Add("Two", None)
+        self.Expire()
+        self.assertEqual(results, [None])
+        self.assertEqual(self.emitted, ["One", "Two"])
+        # The late answer is ignored
+        gate.set()
+        self.Pump()
+        self.assertEqual(results, [None])
+        self.assertEqual(self.emitted, ["One", "Two"])
+        self.assertEqual(sequencer.Stats()["timeouts"], 1)
+
+
+class PluginOrderTest(support.PluginTestCase):
+
+    def testOrderWithWorkers(self):
+        desktop = self.desktop
+        self.Load(workerThreads=4)
+        pid = desktop.CreateProcess("app.exe")
+        hwnds = [
+            desktop.CreateWindow(pid, "Window %d" % i, "C") for i in range(8)
+        ]
+        self.Settle()
+        self.assertEqual(
+            [payload.hwnd for dummySuffix, payload in self.Events("NewWindow")],
+            hwnds
+        )
+        for hwnd in reversed(hwnds):
+            desktop.SetWindowText(hwnd, "Retitled")
+        self.Settle()
+        self.assertEqual(
+            [payload.hwnd for dummySuffix, payload in self.Events()],
+            hwnds[::-1]
+        )
+
+if __name__ == "__main__":
+    unittest.main()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
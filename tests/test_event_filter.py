@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""Event filter rules."""
+
+import unittest
+
+import support
+
+from TaskMonitorPlus.EventFilter import EventFilter, ParseRules
+from TaskMonitorPlus.ProcessInfo import ProcessInfo
+
+
+class ParseRulesTest(unittest.TestCase):
+
+    def testRules(self):
+        rules = ParseRules(
+            "# comment\n"
+            "\n"
+            "deny exe=qbit* kind=TitleChanged,Flashed\n"
+            "ALLOW class=Notepad\n"
+        )
+        self.assertEqual(len(rules), 2)
+        self.assertFalse(rules[0].allow)
+        self.assertEqual(rules[0].kinds, frozenset(["TitleChanged", "Flashed"]))
+        self.assertTrue(rules[1].allow)
+        self.assertIsNone(rules[1].kinds)
+
+    def testErrors(self):
+        for text in (
+            "block exe=foo", "deny title=foo", "deny exe", "deny kind=Opened",
+        ):
+            self.assertRaises(ValueError, ParseRules, text)
+
+
+class EventFilterTest(unittest.TestCase):
+
+    def Filter(self, text):
+        return EventFilter(ParseRules(text))
+
+    def testFirstMatchDecides(self):
+        eventFilter = self.Filter(
+            "allow exe=notepad kind=Created\n"
+            "deny kind=Created\n"
+        )
+        self.assertTrue(eventFilter.Allowed("Created", ProcessInfo(1, "notepad")))
+        self.assertFalse(eventFilter.Allowed("Created", ProcessInfo(2, "calc")))
+        self.assertTrue(eventFilter.Allowed("Destroyed", ProcessInfo(2, "calc")))
+
+    def testExePatternsIgnoreCase(self):
+        eventFilter = self.Filter("deny exe=QBIT*")
+        self.assertFalse(
+            eventFilter.Allowed("Created", ProcessInfo(1, "qbittorrent"))
+        )
+
+    def testSuppressedCount(self):
+        eventFilter = self.Filter("deny kind=Created")
+        processInfo = ProcessInfo(1, "calc")
+        eventFilter.Allowed("Created", processInfo)
+        eventFilter.Allowed("Created", processInfo, count=False)
+        self.assertEqual(eventFilter.Stats(), [("deny kind=Created", 1)])
+
+    def testDisabledKinds(self):
+        eventFilter = self.Filter(
+            "deny kind=Flashed\n"
+            "deny exe=calc kind=TitleChanged\n"
+        )
+        self.assertEqual(list(eventFilter.DisabledKinds()), ["Flashed"])
+
+
+class PluginFilterTest(support.PluginTestCase):
+
+    def testClassRules(self):
+        desktop = self.desktop
+        self.Load(eventFilter="deny class=tooltips_class32")
+        pid = desktop.CreateProcess("app.exe")
+        desktop.CreateWindow(pid, "Main", "AppClass")
+        desktop.CreateWindow(pid, "Tip", "TOOLTIPS_CLASS32")
+        desktop.PumpMessages()
+        newWindows = self.Events("NewWindow")
+        self.assertEqual(
+            [x[1].window_class for x in newWindows], ["AppClass"]
+        )
+
+    def testDeniedKindNotTriggered(self):
+        desktop = self.desktop
+        self.Load(eventFilter="deny exe=app kind=TitleChanged")
+        app = desktop.CreateProcess("app.exe")
+        other = desktop.CreateProcess("other.exe")
+        hwnd1 = desktop.CreateWindow(app, "One", "C")
+        hwnd2 = desktop.CreateWindow(other, "Two", "C")
+        desktop.PumpMessages()
+        self.Events()
+        desktop.SetWindowText(hwnd1, "One!")
+        desktop.SetWindowText(hwnd2, "Two!")
+        desktop.PumpMessages()
+        self.assertEqual(self.Kinds("TitleChanged"), ["TitleChanged.other"])
+
+    def testWithWorkers(self):
+        desktop = self.desktop
+        self.Load(workerThreads=2, eventFilter="deny kind=Activated")
+        pid = desktop.CreateProcess("app.exe")
+        hwnd = desktop.CreateWindow(pid, "One", "C")
+        desktop.SetForegroundWindow(hwnd)
+        self.Settle()
+        self.assertEqual(self.Kinds(), ["Created.app", "NewWindow.app"])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
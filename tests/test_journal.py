@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""The memory-mapped journal."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import support
+
+from TaskMonitorPlus.Journal import Journal, JournalError, JournalReader
+
+
+class JournalTestCase(object):
+    """Gives each test a scratch directory."""
+
+    def setUp(self):
+        super(JournalTestCase, self).setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "journal.bin")
+
+    def tearDown(self):
+        super(JournalTestCase, self).tearDown()
+        shutil.rmtree(self.directory)
+
+
+class JournalTest(JournalTestCase, unittest.TestCase):
+
+    def Write(self, capacity, count):
+        journal = Journal(self.path, capacity)
+        for i in range(count):
+            journal.Append(
+                float(i), "TitleChanged", 0x1000 + i, 42, "app",
+                "AppClass", u"Title é %d" % i
+            )
+        return journal
+
+    def Read(self, start=None, end=None):
+        with JournalReader(self.path) as reader:
+            return list(reader.Records(start, end))
+
+    def testRoundTrip(self):
+        self.Write(16, 3).Close()
+        records = self.Read()
+        self.assertEqual(len(records), 3)
+        record = records[1]
+        self.assertEqual(record.timestamp, 1.0)
+        self.assertEqual(record.kind, "TitleChanged")
+        self.assertEqual(record.hwnd, 0x1001)
+        self.assertEqual(record.pid, 42)
+        self.assertEqual(record.exe, "app")
+        self.assertEqual(record.window_class, "AppClass")
+        self.assertEqual(record.title, u"Title é 1")
+
+    def testTimeRange(self):
+        self.Write(16, 10).Close()
+        self.assertEqual(
+            [x.timestamp for x in self.Read(3.0, 6.0)], [3.0, 4.0, 5.0]
+        )
+        self.assertEqual([x.timestamp for x in self.Read(8.5)], [9.0])
+        self.assertEqual(len(self.Read(end=2.0)), 2)
+
+    def testWrapAround(self):
+        self.Write(4, 10).Close()
+        self.assertEqual(
+            [x.timestamp for x in self.Read()], [6.0, 7.0, 8.0, 9.0]
+        )
+        self.assertEqual([x.timestamp for x in self.Read(7.0, 9.0)], [7.0, 8.0])
+
+    def testReadWhileWriting(self):
+        journal = self.Write(4, 2)
+        try:
+            self.assertEqual(len(self.Read()), 2)
+            journal.Append(2.0, "Activated", 1, 42, "app", "", "")
+            self.assertEqual(self.Read()[-1].kind, "Activated")
+        finally:
+            journal.Close()
+
+    def testReopened(self):
+        self.Write(8, 3).Close()
+        self.Write(8, 2).Close()
+        self.assertEqual(len(self.Read()), 5)
+        # A different capacity starts afresh
+        self.Write(4, 1).Close()
+        self.assertEqual(len(self.Read()), 1)
+
+    def testNotAJournal(self):
+        with open(self.path, "wb") as f:
+            f.write(b"something else" * 10)
+        self.assertRaises(JournalError, JournalReader, self.path)
+
+
+class PluginJournalTest(JournalTestCase, support.PluginTestCase):
+
+    def testReadJournal(self):
+        desktop = self.desktop
+        self.Load(journalFile=self.path, journalSize=1)
+        pid = desktop.CreateProcess("app.exe")
+        hwnd = desktop.CreateWindow(pid, "Title", "AppClass")
+        desktop.SetWindowText(hwnd, "Retitled")
+        desktop.PumpMessages()
+        records = list(self.plugin.ReadJournal())
+        self.assertEqual(
+            [x.kind for x in records],
+            [suffix.split(".")[0] for suffix in self.Kinds()]
+        )
+        self.assertEqual(records[0].kind, "Created")
+        self.assertEqual(records[0].hwnd, 0)
+        record = records[-1]
+        self.assertEqual(record.kind, "TitleChanged")
+        self.assertEqual(
+            (record.hwnd, record.pid, record.exe, record.title),
+            (hwnd, pid, "app", "Retitled")
+        )
+        self.assertEqual(
+            list(self.plugin.ReadJournal(end=records[0].timestamp)), []
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
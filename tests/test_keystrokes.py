@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""Keystrokes queued for windows."""
+
+import threading
+import unittest
+
+import support
+
+import eg
+from TaskMonitorPlus.Keystrokes import KeystrokeQueue
+from TaskMonitorPlus.WindowInfo import WindowInfo
+
+
+class KeystrokeQueueTest(support.PluginTestCase):
+
+    def setUp(self):
+        super(KeystrokeQueueTest, self).setUp()
+        self.sendKeys = eg.SendKeys
+        self.printTraceback = eg.PrintTraceback
+        eg.SendKeys = self.SendKeys
+        # Held until the test lets the sending thread go on
+        self.gate = threading.Event()
+        self.sending = threading.Event()
+        self.sent = []
+        self.queue = KeystrokeQueue()
+        desktop = self.desktop
+        self.Load()
+        self.pid = desktop.CreateProcess("app.exe")
+        self.windowInfo = WindowInfo(desktop.CreateWindow(self.pid, "One", "C"))
+
+    def tearDown(self):
+        self.gate.set()
+        self.queue.Join(5.0)
+        eg.SendKeys = self.sendKeys
+        eg.PrintTraceback = self.printTraceback
+        super(KeystrokeQueueTest, self).tearDown()
+
+    def SendKeys(self, hwnd, text, useAlternateMethod, mode):
+        self.sending.set()
+        self.gate.wait(5.0)
+        if text == "fail":
+            raise RuntimeError(text)
+        self.sent.append((text, useAlternateMethod, mode))
+
+    def Hold(self, windowInfo, text):
+        """Queues text, and waits until the thread is blocked sending it."""
+        self.queue.Put(windowInfo, text)
+        self.assertTrue(self.sending.wait(5.0))
+
+    def testInOrder(self):
+        queue = self.queue
+        windowInfo = self.windowInfo
+        for text in "abc":
+            queue.Put(windowInfo, text)
+        self.gate.set()
+        self.assertTrue(queue.Join(5.0))
+        self.assertEqual("".join(x[0] for x in self.sent), "abc")
+
+    def testMerged(self):
+        queue = self.queue
+        windowInfo = self.windowInfo
+        self.Hold(windowInfo, "a")
+        for text in "bcd":
+            queue.Put(windowInfo, text)
+        self.gate.set()
+        self.assertTrue(queue.Join(5.0))
+        self.assertEqual(self.sent, [("a", False, 2), ("bcd", False, 2)])
+        stats = queue.Stats()
+        self.assertEqual(stats["sent"], 4)
+        self.assertEqual(stats["batches"], 2)
+        self.assertEqual(stats["merged"], 2)
+
+    def testModesKeepOrder(self):
+        # Only the window's last entry is merged into, so a change of mode
+        # in between isn't jumped over
+        queue = self.queue
+        windowInfo = self.windowInfo
+        self.Hold(windowInfo, "w")
+        queue.Put(windowInfo, "x", mode=2)
+        queue.Put(windowInfo, "y", mode=1)
+        queue.Put(windowInfo, "z", mode=2)
+        queue.Put(windowInfo, "!", mode=2)
+        queue.Put(windowInfo, "?", True, 2)
+        self.gate.set()
+        self.assertTrue(queue.Join(5.0))
+        self.assertEqual(
+            self.sent, [
+                ("w", False, 2), ("x", False, 2), ("y", False, 1),
+                ("z!", False, 2), ("?", True, 2),
+            ]
+        )
+
+    def testWindowsInterleaved(self):
+        queue = self.queue
+        one = self.windowInfo
+        two = WindowInfo(self.desktop.CreateWindow(self.pid, "Two", "C"))
+        self.Hold(one, "1")
+        queue.Put(two, "a")
+        queue.Put(one, "2")
+        queue.Put(two, "b")
+        self.gate.set()
+        self.assertTrue(queue.Join(5.0))
+        self.assertEqual([x[0] for x in self.sent], ["1", "ab", "2"])
+
+    def testDeadWindow(self):
+        queue = self.queue
+        windowInfo = self.windowInfo
+        self.Hold(windowInfo, "a")
+        queue.Put(windowInfo, "b")
+        self.desktop.DestroyWindow(windowInfo.hwnd)
+        self.gate.set()
+        self.assertTrue(queue.Join(5.0))
+        self.assertEqual(self.sent, [("a", False, 2)])
+        self.assertEqual(queue.Stats()["dead"], 1)
+
+    def testFailed(self):
+        eg.PrintTraceback = lambda *args, **kwargs: None
+        queue = self.queue
+        self.gate.set()
+        queue.Put(self.windowInfo, "fail")
+        queue.Put(self.windowInfo, "ok", mode=1)
+        self.assertTrue(queue.Join(5.0))
+        self.assertEqual(self.sent, [("ok", False, 1)])
+        self.assertEqual(queue.Stats()["failed"], 1)
+
+    def testJoinTimeout(self):
+        self.Hold(self.windowInfo, "a")
+        self.assertFalse(self.queue.Join(0.05))
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
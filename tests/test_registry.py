@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""The windows already open when the plugin starts."""
+
+import unittest
+
+import support
+
+
+class WindowsOpenAtStartTest(support.PluginTestCase):
+
+    def Check(self, **settings):
+        desktop = self.desktop
+        pid = desktop.CreateProcess("app.exe")
+        hwnd = desktop.CreateWindow(pid, "Doc - App", "AppClass", notify=False)
+        owned = desktop.CreateWindow(
+            pid, "Find", "Dialog", owner=hwnd, notify=False
+        )
+        plugin = self.Load(**settings)
+        self.assertIn(hwnd, plugin.hwnds)
+        self.assertNotIn(owned, plugin.hwnds)
+        self.Events()
+
+        desktop.DestroyWindow(hwnd)
+        self.Settle()
+        events = self.Events()
+        self.assertEqual(
+            [x[0] for x in events], ["ClosedWindow.app", "Destroyed.app"]
+        )
+        payload = events[0][1]
+        self.assertEqual(
+            (payload.hwnd, payload.title, payload.window_class),
+            (hwnd, "Doc - App", "AppClass")
+        )
+
+    def testClosedWindowPayload(self):
+        self.Check()
+
+    def testClosedWindowPayloadWithWorkers(self):
+        self.Check(workerThreads=2)
+
+    def testNotReportedAsNew(self):
+        desktop = self.desktop
+        pid = desktop.CreateProcess("app.exe")
+        desktop.CreateWindow(pid, "Doc - App", "AppClass", notify=False)
+        self.Load()
+        self.assertEqual(self.Kinds("NewWindow"), [])
+        self.assertEqual(self.Kinds("Created"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
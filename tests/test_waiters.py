@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""Waiting for a window's title, activation or closing."""
+
+import threading
+import unittest
+
+import support
+
+
+class WaitersTest(support.PluginTestCase):
+
+    def setUp(self):
+        super(WaitersTest, self).setUp()
+        desktop = self.desktop
+        self.Load()
+        self.pid = desktop.CreateProcess("app.exe")
+        self.hwnd = desktop.CreateWindow(self.pid, "Loading", "AppClass")
+        desktop.PumpMessages()
+
+    def testNoWaitersUntilAsked(self):
+        self.assertIsNone(self.plugin.waiters)
+
+    def testAlreadyMatches(self):
+        windowInfo = self.plugin.WaitForTitle("Load*", hwnd=self.hwnd)
+        self.assertEqual(windowInfo.hwnd, self.hwnd)
+
+    def testTitleCallback(self):
+        resolved = []
+        waiter = self.plugin.WaitForTitle(
+            "*Ready", exe="APP.EXE", callback=resolved.append
+        )
+        self.assertFalse(waiter.done)
+        self.desktop.SetWindowText(self.hwnd, "Still loading")
+        self.desktop.PumpMessages()
+        self.assertFalse(waiter.done)
+        self.desktop.SetWindowText(self.hwnd, "App - Ready")
+        self.desktop.PumpMessages()
+        self.assertEqual(resolved, [waiter])
+        self.assertEqual(waiter.result.hwnd, self.hwnd)
+        self.assertFalse(waiter.timedOut)
+        self.assertEqual(self.plugin.waiters.Stats()["waiting"], 0)
+
+    def testRegexMatch(self):
+        waiter = self.plugin.WaitForTitle(
+            r"^Step \d+$", hwnd=self.hwnd, match="regex", wait=False
+        )
+        self.desktop.SetWindowText(self.hwnd, "Step 3")
+        self.desktop.PumpMessages()
+        self.assertTrue(waiter.done)
+
+    def testBlockingWait(self):
+        # Blocks on another thread while the message pump carries on
+        results = []
+        thread = threading.Thread(
+            target=lambda: results.append(
+                self.plugin.WaitForTitle("Ready", hwnd=self.hwnd, timeout=10)
+            )
+        )
+        thread.start()
+        while self.plugin.waiters is None or not (
+            self.plugin.waiters.Stats()["waiting"]
+        ):
+            thread.join(0.01)
+        self.desktop.SetWindowText(self.hwnd, "Ready")
+        self.desktop.PumpMessages()
+        thread.join(5.0)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(results[0].hwnd, self.hwnd)
+
+    def testTimeout(self):
+        resolved = []
+        waiter = self.plugin.WaitForTitle(
+            "Ready", hwnd=self.hwnd, timeout=2.0, callback=resolved.append
+        )
+        self.Advance(1.0)
+        self.assertFalse(waiter.done)
+        self.Advance(1.5)
+        self.assertEqual(resolved, [waiter])
+        self.assertTrue(waiter.timedOut)
+        self.assertIsNone(waiter.result)
+
+    def testCancel(self):
+        self.desktop.CreateWindow(self.pid, "Other", "AppClass")
+        self.desktop.PumpMessages()
+        waiter = self.plugin.WaitForActivation(hwnd=self.hwnd, wait=False)
+        self.assertFalse(waiter.done)
+        waiter.Cancel()
+        self.assertTrue(waiter.done)
+        self.assertTrue(waiter.timedOut)
+
+    def testCloseWaitsForLastWindow(self):
+        desktop = self.desktop
+        hwnd2 = desktop.CreateWindow(self.pid, "Second", "AppClass")
+        desktop.PumpMessages()
+        waiter = self.plugin.WaitForClose(exe="app", wait=False)
+        desktop.DestroyWindow(self.hwnd)
+        desktop.PumpMessages()
+        self.assertFalse(waiter.done)
+        desktop.DestroyWindow(hwnd2)
+        desktop.PumpMessages()
+        self.assertTrue(waiter.done)
+        self.assertFalse(waiter.timedOut)
+
+    def testCloseOfClosedWindow(self):
+        self.desktop.DestroyWindow(self.hwnd)
+        self.desktop.PumpMessages()
+        self.assertTrue(self.plugin.WaitForClose(hwnd=self.hwnd))
+
+    def testActivation(self):
+        desktop = self.desktop
+        desktop.CreateWindow(self.pid, "Other", "AppClass")
+        desktop.PumpMessages()
+        waiter = self.plugin.WaitForActivation(hwnd=self.hwnd, wait=False)
+        self.assertFalse(waiter.done)
+        desktop.SetForegroundWindow(self.hwnd)
+        desktop.PumpMessages()
+        self.assertTrue(waiter.done)
+        self.assertEqual(waiter.result.hwnd, self.hwnd)
+
+    def testErrors(self):
+        plugin = self.plugin
+        self.assertRaises(ValueError, plugin.WaitForActivation)
+        self.assertRaises(
+            ValueError, plugin.WaitForActivation, hwnd=self.hwnd, exe="app"
+        )
+        self.assertRaises(
+            ValueError, plugin.WaitForTitle, "x", hwnd=0xDEAD, wait=False
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
+
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8:
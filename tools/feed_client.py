@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+#
+# This file is a plugin for EventGhost.
+# Copyright © 2005-2016 EventGhost Project <http://www.eventghost.org/>
+#
+# EventGhost is free software: you can redistribute it and/or modify it under
+# the terms of the GNU General Public License as published by the Free
+# Software Foundation, either version 2 of the License, or (at your option)
+# any later version.
+#
+# EventGhost is distributed in the hope that it will be useful, but WITHOUT
+# ANY WARRANTY; without even the implied warranty of MERCHANTABILITY or
+# FITNESS FOR A PARTICULAR PURPOSE. See the GNU General Public License for
+# more details.
+#
+# You should have received a copy of the GNU General Public License along
+# with EventGhost. If not, see <http://www.gnu.org/licenses/>.
+
+"""
+Receives TaskMonitorPlus's events in another program.
+
+Set "Publish events to other programs on local TCP port" in the plugin's
+settings, then either run this script with that port, to print the events
+as they come:
+
+    python tools/feed_client.py 7755
+
+or copy it next to your program and read them there:
+
+    from feed_client import FeedClient
+    for event in FeedClient(7755).Events():
+        print(event["kind"], event["exe"], event["title"])
+
+Each event is a dict with the keys time (as by time.time()), kind
+("Activated", "NewWindow"...), hwnd (0 for process events), pid, exe,
+class and title. Only the events triggered after connecting are sent. A
+client that falls too far behind is disconnected by the plugin; Events()
+then ends, as it does when EventGhost exits.
+"""
+
+from __future__ import print_function
+
+import argparse
+import json
+import socket
+import struct
+import sys
+
+_LENGTH = struct.Struct("<I")
+
+
+class FeedClient(object):
+
+    def __init__(self, port, host="127.0.0.1", timeout=None):
+        self.connection = socket.create_connection((host, port), timeout)
+        self.connection.settimeout(timeout)
+        self.received = 0
+
+    def Frames(self):
+        """Yields the body of each frame, as bytes, until disconnected."""
+        buffer = b""
+        offset = 0
+        recv = self.connection.recv
+        headerSize = _LENGTH.size
+        while True:
+            data = recv(65536)
+            if not data:
+                return
+            buffer = buffer[offset:] + data
+            offset = 0
+            end = len(buffer)
+            while end - offset >= headerSize:
+                length = _LENGTH.unpack_from(buffer, offset)[0]
+                if end - offset - headerSize < length:
+                    break
+                offset += headerSize
+                self.received += 1
+                yield buffer[offset:offset + length]
+                offset += length
+
+    def Events(self):
+        """Yields each event as a dict, until disconnected."""
+        for body in self.Frames():
+            yield json.loads(body.decode("utf-8"))
+
+    def Close(self):
+        self.connection.close()
+
+
+def Main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("port", type=int, help="the port set in the plugin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument(
+        "--kinds", help="comma-separated event kinds to print (default: all)",
+    )
+    args = parser.parse_args(argv)
+    kinds = set(args.kinds.split(",")) if args.kinds else None
+    client = FeedClient(args.port, args.host)
+    try:
+        for event in client.Events():
+            if kinds is None or event["kind"] in kinds:
+                print(
+                    "%(time).3f %(kind)s.%(exe)s %(hwnd)d %(title)s" % event
+                )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.Close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(Main())
+#
+# Editor modelines  -  https://www.wireshark.org/tools/modelines.html
+#
+# Local variables:
+# c-basic-offset: 4
+# tab-width: 4
+# indent-tabs-mode: nil
+# coding: utf-8
+# End:
+#
+# vi: set shiftwidth=4 tabstop=4 expandtab fileencoding=utf-8:
+# :indentSize=4:tabSize=4:noTabs=true:coding=utf-8: